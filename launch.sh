@@ -1,9 +1,7 @@
-pushd sample_data/scripts/
+pushd src
 echo "Download eAIP locally"
-./download_all.sh
-popd
+python3 download_eaip.py
 
-pushd src
 echo "Generate JSON from eAIP"
 python3 generate_json_from_eaip.py
 
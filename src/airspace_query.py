@@ -0,0 +1,295 @@
+import io
+import json
+import math
+import argparse
+import contextlib
+from collections import defaultdict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# === Recherche des volumes contenant un point (lat, lon, altitude) ===
+#
+# Les couches sont résolues une fois (polygone de parse_polygon_coords,
+# limites de parse_vertical_limits, classe) ou relues depuis la géométrie
+# binaire de geometry_store.py. Une grille uniforme sur les emprises donne
+# les couches candidates; l'intervalle vertical et l'emprise les filtrent
+# avant le test point dans polygone (pair-impair, lon en abscisse). Les
+# altitudes sont en mètres, comme dans la sortie KML.
+#
+# query_batch traite des milliers de points par appel (trace GPS): les couples
+# (point, couche candidate) sont filtrés ensemble, puis le test point dans
+# polygone est vectorisé avec numpy, un appel par couche.
+#
+# query_bbox sélectionne les couches dont l'emprise coupe une fenêtre
+# (serve_airspaces.py), sans test exact sur le polygone.
+
+
+# --- Chargement des couches ---
+def layers_from_json(data, france_border, territorial_waters):
+    import generate_kml_from_json as kmlgen
+
+    layers = []
+    # parse_polygon_coords signale les segments non reconnus sur stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        for cat in data:
+            for page in data[cat].values():
+                for airspace in page:
+                    for layer in airspace["layers"]:
+                        try:
+                            coords = kmlgen.parse_polygon_coords(layer["coord"], france_border, territorial_waters)
+                            lower, upper = kmlgen.parse_vertical_limits(layer["limit"])
+                        except Exception:
+                            continue
+                        layers.append({
+                            "category": cat,
+                            "airspace": airspace["ident"],
+                            "ident": layer["ident"],
+                            "class": layer["class"],
+                            "lower": lower,
+                            "upper": upper,
+                            "coords": coords,
+                        })
+    return layers
+
+
+def layers_from_store(store):
+    return [store.layer(i) for i in range(len(store))]
+
+
+# --- Test point dans polygone ---
+def point_in_polygon(lat, lon, coords):
+    inside = False
+    n = len(coords)
+    j = n - 1
+    for i in range(n):
+        lat_i, lon_i = coords[i]
+        lat_j, lon_j = coords[j]
+        if (lat_i > lat) != (lat_j > lat):
+            if lon < (lon_j - lon_i) * (lat - lat_i) / (lat_j - lat_i) + lon_i:
+                inside = not inside
+        j = i
+    return inside
+
+
+def points_in_polygon(lats, lons, edges, max_cells=2000000):
+    """Version vectorisée: edges = (lat_i, lon_i, lat_j, lon_j) en tableaux numpy.
+
+    Les points sont traités par paquets pour borner la matrice points x arêtes à max_cells éléments.
+    """
+    lat_i, lon_i, lat_j, lon_j = edges
+    step = max(1, max_cells // max(1, len(lat_i)))
+    inside = np.empty(len(lats), dtype=bool)
+    for start in range(0, len(lats), step):
+        p_lats = lats[start:start + step, None]
+        p_lons = lons[start:start + step, None]
+        straddle = (lat_i > p_lats) != (lat_j > p_lats)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cross_lon = (lon_j - lon_i) * (p_lats - lat_i) / (lat_j - lat_i) + lon_i
+        crossings = straddle & (p_lons < cross_lon)
+        inside[start:start + step] = (np.count_nonzero(crossings, axis=1) % 2) == 1
+    return inside
+
+
+class AirspaceIndex:
+    def __init__(self, layers, cell_size=0.25):
+        # polygones de moins de 3 sommets: aucune surface
+        self.layers = [layer for layer in layers if len(layer["coords"]) >= 3]
+        self.cell_size = cell_size
+        self.bboxes = []
+        self.grid = defaultdict(list)
+        self.edges = [None] * len(self.layers)
+
+        for k, layer in enumerate(self.layers):
+            lats = [lat for lat, _ in layer["coords"]]
+            lons = [lon for _, lon in layer["coords"]]
+            bbox = (min(lats), min(lons), max(lats), max(lons))
+            self.bboxes.append(bbox)
+            row0, col0 = self.cell_of(bbox[0], bbox[1])
+            row1, col1 = self.cell_of(bbox[2], bbox[3])
+            for row in range(row0, row1 + 1):
+                for col in range(col0, col1 + 1):
+                    self.grid[(row, col)].append(k)
+
+        if np is not None:
+            self.build_arrays()
+
+    def __len__(self):
+        return len(self.layers)
+
+    def cell_of(self, lat, lon):
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+    def candidates(self, lat, lon, alt):
+        for k in self.grid.get(self.cell_of(lat, lon), ()):
+            layer = self.layers[k]
+            south, west, north, east = self.bboxes[k]
+            if south <= lat <= north and west <= lon <= east and layer["lower"] <= alt <= layer["upper"]:
+                yield k
+
+    def query(self, lat, lon, alt):
+        """Indices des couches contenant le point."""
+        return [k for k in self.candidates(lat, lon, alt) if point_in_polygon(lat, lon, self.layers[k]["coords"])]
+
+    def query_bbox(self, south, west, north, east, lower=None, upper=None, categories=None):
+        """Indices triés des couches dont l'emprise coupe la boîte et l'intervalle vertical [lower, upper]."""
+        row0, col0 = self.cell_of(south, west)
+        row1, col1 = self.cell_of(north, east)
+        # grande boîte: plus de cellules que de couches, parcours direct des emprises
+        if (row1 - row0 + 1) * (col1 - col0 + 1) > len(self.layers):
+            candidates = range(len(self.layers))
+        else:
+            candidates = set()
+            for row in range(row0, row1 + 1):
+                for col in range(col0, col1 + 1):
+                    candidates.update(self.grid.get((row, col), ()))
+
+        hits = []
+        for k in candidates:
+            b_south, b_west, b_north, b_east = self.bboxes[k]
+            if b_south > north or b_north < south or b_west > east or b_east < west:
+                continue
+            layer = self.layers[k]
+            if lower is not None and layer["upper"] < lower:
+                continue
+            if upper is not None and layer["lower"] > upper:
+                continue
+            if categories is not None and layer["category"] not in categories:
+                continue
+            hits.append(k)
+        hits.sort()
+        return hits
+
+    def layer_edges(self, k):
+        if self.edges[k] is None:
+            coords = np.array(self.layers[k]["coords"], dtype=float)
+            previous = np.roll(coords, 1, axis=0)
+            self.edges[k] = (coords[:, 0], coords[:, 1], previous[:, 0], previous[:, 1])
+        return self.edges[k]
+
+    def build_arrays(self):
+        """Grille à plat (cellule -> tranche de cell_layers) et emprises en tableaux, pour query_batch."""
+        self.cell_slices = {}
+        flat = []
+        for cell, ks in self.grid.items():
+            self.cell_slices[cell] = (len(flat), len(ks))
+            flat.extend(ks)
+        self.cell_layers = np.array(flat, dtype=np.int64)
+        self.bbox_array = np.array(self.bboxes, dtype=float).reshape(-1, 4)
+        self.lower_array = np.array([layer["lower"] for layer in self.layers], dtype=float)
+        self.upper_array = np.array([layer["upper"] for layer in self.layers], dtype=float)
+
+    def query_batch(self, lats, lons, alts, chunk=100000):
+        """Pour chaque point, la liste triée des indices des couches qui le contiennent."""
+        if np is None:
+            raise RuntimeError("query_batch nécessite numpy")
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        alts = np.asarray(alts, dtype=float)
+        results = []
+        for start in range(0, len(lats), chunk):
+            end = start + chunk
+            results.extend(self.query_chunk(lats[start:end], lons[start:end], alts[start:end]))
+        return results
+
+    def query_chunk(self, lats, lons, alts):
+        n = len(lats)
+
+        # cellule de chaque point, puis couples (point, couche candidate)
+        rows = np.floor(lats / self.cell_size).astype(np.int64)
+        cols = np.floor(lons / self.cell_size).astype(np.int64)
+        cells, inverse = np.unique(np.stack([rows, cols], axis=1), axis=0, return_inverse=True)
+        cell_slices = [self.cell_slices.get(cell, (0, 0)) for cell in map(tuple, cells.tolist())]
+        cell_starts = np.array([s for s, _ in cell_slices], dtype=np.int64)
+        cell_counts = np.array([c for _, c in cell_slices], dtype=np.int64)
+        inverse = inverse.reshape(-1)
+
+        counts = cell_counts[inverse]
+        pair_points = np.repeat(np.arange(n), counts)
+        first_pair = np.repeat(np.cumsum(counts) - counts, counts)
+        pair_layers = self.cell_layers[np.repeat(cell_starts[inverse], counts) + np.arange(len(pair_points)) - first_pair]
+
+        # emprise et intervalle vertical, tous les couples d'un coup
+        bbox = self.bbox_array[pair_layers]
+        p_lats = lats[pair_points]
+        p_lons = lons[pair_points]
+        p_alts = alts[pair_points]
+        keep = ((p_lats >= bbox[:, 0]) & (p_lons >= bbox[:, 1]) & (p_lats <= bbox[:, 2]) & (p_lons <= bbox[:, 3])
+                & (p_alts >= self.lower_array[pair_layers]) & (p_alts <= self.upper_array[pair_layers]))
+        pair_points = pair_points[keep]
+        pair_layers = pair_layers[keep]
+
+        # test point dans polygone, un appel vectorisé par couche
+        order = np.argsort(pair_layers, kind="stable")
+        pair_points = pair_points[order]
+        pair_layers = pair_layers[order]
+        inside = np.zeros(len(pair_points), dtype=bool)
+        layer_ids, layer_starts = np.unique(pair_layers, return_index=True)
+        layer_ends = np.append(layer_starts[1:], len(pair_layers))
+        for k, s, e in zip(layer_ids.tolist(), layer_starts.tolist(), layer_ends.tolist()):
+            idx = pair_points[s:e]
+            inside[s:e] = points_in_polygon(lats[idx], lons[idx], self.layer_edges(k))
+
+        results = [[] for _ in range(n)]
+        for i, k in zip(pair_points[inside].tolist(), pair_layers[inside].tolist()):
+            results[i].append(k)
+        for hits in results:
+            hits.sort()
+        return results
+
+
+def load_layers(geometry=None, airspaces="../extracts/airspaces.json", data_dir="../data/"):
+    if geometry:
+        from geometry_store import GeometryStore
+        with GeometryStore(geometry) as store:
+            return layers_from_store(store)
+
+    import generate_kml_from_json as kmlgen
+    france_border = kmlgen.load_france_boundary(f"{data_dir}/metropole-version-simplifiee.geojson")
+    territorial_waters = kmlgen.load_france_boundary(f"{data_dir}/EspMar_FR_MT_WGS84.geojson")
+    with open(airspaces, encoding="utf-8") as f:
+        data = json.load(f)
+    return layers_from_json(data, france_border, territorial_waters)
+
+
+def load_index(geometry=None, airspaces="../extracts/airspaces.json", data_dir="../data/", cell_size=0.25):
+    return AirspaceIndex(load_layers(geometry, airspaces, data_dir), cell_size)
+
+
+def read_points(path):
+    """Fichier texte ou CSV: une ligne lat,lon,altitude_m par point."""
+    points = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.replace(";", ",").split(",")
+            try:
+                points.append(tuple(float(v) for v in fields[:3]))
+            except ValueError:
+                continue  # en-tête ou ligne vide
+    return points
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Volumes contenant des points lat,lon,altitude (mètres)")
+    parser.add_argument("points", nargs="*", metavar="LAT,LON,ALT")
+    parser.add_argument("--track", metavar="CSV", help="fichier de points lat,lon,altitude_m (trace GPS)")
+    parser.add_argument("--geometry", metavar="PATH", help="géométrie binaire de geometry_store.py au lieu du JSON")
+    parser.add_argument("--airspaces", default="../extracts/airspaces.json")
+    parser.add_argument("--cell-size", type=float, default=0.25, help="taille des cellules de la grille en degrés")
+    args = parser.parse_args()
+
+    points = [tuple(float(v) for v in p.split(",")) for p in args.points]
+    if args.track:
+        points.extend(read_points(args.track))
+    if not points:
+        parser.error("aucun point à rechercher")
+
+    index = load_index(args.geometry, args.airspaces, cell_size=args.cell_size)
+    lats, lons, alts = zip(*points)
+    results = index.query_batch(lats, lons, alts) if np is not None else [index.query(*p) for p in points]
+
+    for point, hits in zip(points, results):
+        names = [f"{index.layers[k]['ident']} ({index.layers[k]['class']})" for k in hits]
+        print(f"{point[0]:.5f},{point[1]:.5f},{point[2]:.0f}: {', '.join(names) or '-'}")
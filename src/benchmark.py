@@ -0,0 +1,243 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+
+import generate_json_from_eaip as eaip
+import generate_kml_from_json as kmlgen
+from coord_parser import Arc, Border, Circle, compile_coords
+
+# === Banc de mesure par étape sur sample_data et extracts/airspaces.json ===
+#
+# Chaque étape est chronométrée (meilleur temps sur --repeat passes) puis
+# rejouée une fois sous tracemalloc pour le pic mémoire. Les résultats sont
+# écrits en JSON; --compare signale les étapes plus lentes que la référence
+# au-delà de --threshold. Sur une machine partagée, une même étape varie de
+# 10 à 20 % d'une exécution à l'autre: seul le meilleur temps est comparé, le
+# seuil par défaut est de 25 %, et une régression ne fait échouer l'exécution
+# que si la mesure et la référence ont chacune au moins MIN_COMPARE_REPEAT
+# passes.
+
+PAGE_TYPES = [
+    ("parse_html_file AD-2", "AD-2-AERODROMES"),
+    ("parse_html_file ENR-2.1", "ENR-2.1-FIR_UIR_TMA_CTA"),
+    ("parse_html_file ENR-2.2", "ENR-2.2-TMZ_ACC_UAC_APP_FRA_DLG_SIV"),
+]
+
+MIN_COMPARE_REPEAT = 3
+
+
+def clear_caches():
+    for fn in (kmlgen.cached_dms_to_decimal, kmlgen.cached_parse_coord_pair,
+               kmlgen.cached_arc_points, kmlgen.cached_circle):
+        fn.cache_clear()
+
+
+def measure(fn, repeat):
+    """fn() renvoie (nombre d'éléments, unité); on garde le meilleur temps et le pic mémoire."""
+    best = None
+    for _ in range(repeat):
+        clear_caches()
+        start = time.perf_counter()
+        items, unit = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    clear_caches()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "wall_s": best,
+        "peak_mem_kb": peak / 1024,
+        "items": items,
+        "unit": unit,
+        "throughput": items / best if best else None,
+    }
+
+
+# --- Jeux de données ---
+def load_pages(sample_dir, category):
+    cat_dir = os.path.join(sample_dir, category)
+    pages = []
+    if os.path.isdir(cat_dir):
+        for f in sorted(os.listdir(cat_dir)):
+            if f.endswith(".html") or f.endswith(".htm"):
+                with open(os.path.join(cat_dir, f), "rb") as fh:
+                    pages.append(fh.read())
+    return pages
+
+
+def all_layers(data):
+    return [layer for cat in data for page in data[cat].values() for airspace in page for layer in airspace["layers"]]
+
+
+def geometry_inputs(layers):
+    """Arcs, cercles et portions de frontière présents dans les chaînes coord."""
+    arcs, circles, borders = [], [], []
+    for layer in layers:
+        try:
+            program = compile_coords(layer["coord"])
+        except ValueError:
+            continue
+        for op in program.ops:
+            if isinstance(op, Arc):
+                arcs.append((op.start, op.center, op.end, op.radius_nm, op.clockwise))
+            elif isinstance(op, Circle):
+                circles.append((op.center, op.radius_nm))
+            elif isinstance(op, Border):
+                borders.append((op.border, op.start, op.end))
+    return arcs, circles, borders
+
+
+# --- Étapes ---
+def run_stages(args):
+    results = {}
+    devnull = open(os.devnull, "w")
+
+    for name, category in PAGE_TYPES:
+        pages = load_pages(args.sample_data, category)
+        if not pages:
+            continue
+
+        def parse_pages(pages=pages):
+            for content in pages:
+                eaip.parse_html_content(content, args.backend)
+            return len(pages), "pages"
+
+        results[name] = measure(parse_pages, args.repeat)
+
+    with open(args.airspaces, encoding="utf-8") as f:
+        data = json.load(f)
+    layers = all_layers(data)
+
+    france_border = kmlgen.load_france_boundary(os.path.join(args.data, "metropole-version-simplifiee.geojson"))
+    territorial_waters = kmlgen.load_france_boundary(os.path.join(args.data, "EspMar_FR_MT_WGS84.geojson"))
+    borders = {"france": france_border, "sea": territorial_waters}
+
+    def polygon_coords():
+        vertices = 0
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            for layer in layers:
+                vertices += len(kmlgen.parse_polygon_coords(layer["coord"], france_border, territorial_waters))
+        finally:
+            sys.stdout = stdout
+        return vertices, "vertices"
+
+    def vertical_limits():
+        for layer in layers:
+            try:
+                kmlgen.parse_vertical_limits(layer["limit"])
+            except Exception:
+                pass
+        return len(layers), "layers"
+
+    arcs, circles, border_segments = geometry_inputs(layers)
+
+    def arcs_circles():
+        vertices = 0
+        for start, center, end, radius, clockwise in arcs:
+            vertices += len(kmlgen.generate_arc_points(start, center, end, radius, clockwise=clockwise))
+        for center, radius in circles:
+            vertices += len(kmlgen.generate_circle(center, radius))
+        return vertices, "vertices"
+
+    def border_points():
+        vertices = 0
+        for which, start, end in border_segments:
+            vertices += len(kmlgen.extract_border_points(borders[which], start, end))
+        return vertices, "vertices"
+
+    results["parse_polygon_coords"] = measure(polygon_coords, args.repeat)
+    results["parse_vertical_limits"] = measure(vertical_limits, args.repeat)
+    results["arc/circle generation"] = measure(arcs_circles, args.repeat)
+    results["extract_border_points"] = measure(border_points, args.repeat)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        def emit():
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                kmlgen.generate_kml(data, france_border, territorial_waters, output_dir=output_dir, compact=args.compact)
+            finally:
+                sys.stdout = stdout
+            return len(layers), "layers"
+
+        results["KML/KMZ emission"] = measure(emit, args.repeat)
+
+    devnull.close()
+    return results
+
+
+# --- Comparaison avec une référence ---
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        ref = baseline["stages"].get(name)
+        if ref is None:
+            continue
+        ratio = result["wall_s"] / ref["wall_s"] if ref["wall_s"] else 1
+        flag = "REGRESSION" if ratio > 1 + threshold else ""
+        print(f"{name:28s} {ref['wall_s']:9.4f}s -> {result['wall_s']:9.4f}s ({ratio - 1:+7.1%}) {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def print_results(results):
+    for name, r in results.items():
+        print(f"{name:28s} {r['wall_s']:9.4f}s {r['peak_mem_kb']:10.0f} KB "
+              f"{r['throughput']:12.1f} {r['unit']}/s ({r['items']} {r['unit']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mesure des étapes du pipeline eAIP -> JSON -> KML")
+    parser.add_argument("--sample-data", default="../sample_data/")
+    parser.add_argument("--airspaces", default="../extracts/airspaces.json")
+    parser.add_argument("--data", default="../data/")
+    parser.add_argument("--backend", default="html.parser", choices=eaip.PARSER_BACKENDS)
+    parser.add_argument("--geodesic", default=kmlgen.geodesic_engine, choices=kmlgen.GEODESIC_ENGINES)
+    parser.add_argument("--compact", action="store_true", help="mesure l'émission KML en mode compact")
+    parser.add_argument("--repeat", type=int, default=3, help="nombre de passes chronométrées par étape")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="fichier de résultats JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="résultats de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="ralentissement relatif toléré avant de signaler une régression")
+    args = parser.parse_args()
+
+    kmlgen.geodesic_engine = args.geodesic
+    results = run_stages(args)
+    print_results(results)
+
+    report = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "backend": args.backend,
+            "geodesic": args.geodesic,
+            "compact": args.compact,
+            "repeat": args.repeat,
+        },
+        "stages": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats écrits dans {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            repeat = min(args.repeat, baseline["meta"].get("repeat", 1))
+            if repeat < MIN_COMPARE_REPEAT:
+                print(f"Meilleur temps sur {repeat} passe(s) seulement, dans le bruit de mesure: "
+                      f"pas d'échec sans --repeat {MIN_COMPARE_REPEAT} ou plus des deux côtés")
+            else:
+                sys.exit(1)
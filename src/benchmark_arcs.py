@@ -0,0 +1,110 @@
+import sys
+import json
+import argparse
+
+from geographiclib.geodesic import Geodesic
+
+import coord_parser
+from coord_parser import Arc, Circle
+import generate_kml_from_json as kmlgen
+
+# === Vérification de la densification des arcs et cercles ===
+#
+# Tous les arcs et cercles de extracts/airspaces.json sont calculés pour chaque
+# tolérance de corde demandée (et pour les 20 points par tour historiques), puis
+# mesurés avec geographiclib:
+#   - écart entre chaque corde et l'arc: distance entre le milieu géodésique de
+#     la corde et le point de l'arc à l'azimut médian, qui doit rester sous la
+#     tolérance;
+#   - dernier sommet d'un arc: à l'azimut de la fin de l'arc vu du centre, sans
+#     dépassement ni arc tronqué.
+# Le nombre de sommets produits est affiché pour comparer les tolérances.
+
+g = Geodesic.WGS84
+
+# écart toléré sur l'azimut du dernier sommet (degrés)
+END_AZIMUTH_TOLERANCE = 1e-6
+
+
+def azimuth(center, p):
+    return g.Inverse(center[0], center[1], p[0], p[1])["azi1"] % 360
+
+
+def angle_diff(a, b):
+    return (b - a + 180) % 360 - 180
+
+
+def chord_error(center, radius_m, p, q):
+    azi_p = azimuth(center, p)
+    azi_mid = azi_p + angle_diff(azi_p, azimuth(center, q)) / 2
+    on_arc = g.Direct(center[0], center[1], azi_mid, radius_m)
+    line = g.InverseLine(p[0], p[1], q[0], q[1])
+    mid = line.Position(line.s13 / 2)
+    return g.Inverse(on_arc["lat2"], on_arc["lon2"], mid["lat2"], mid["lon2"])["s12"]
+
+
+def check(ops, tolerance):
+    kmlgen.chord_tolerance_m = tolerance
+    for fn in (kmlgen.cached_arc_points, kmlgen.cached_circle):
+        fn.cache_clear()
+
+    vertices = 0
+    max_error = 0
+    worst = None
+    bad_ends = []
+    for op in ops:
+        center = kmlgen.as_point(op.center)
+        radius_m = op.radius_nm * 1852
+        if isinstance(op, Arc):
+            points = kmlgen.generate_arc_points(op.start, op.center, op.end, op.radius_nm,
+                                                max_circle_points=kmlgen.circle_points(op.radius_nm),
+                                                clockwise=op.clockwise)
+            end = kmlgen.as_point(op.end)
+            if abs(angle_diff(azimuth(center, end), azimuth(center, points[-1]))) > END_AZIMUTH_TOLERANCE:
+                bad_ends.append(op)
+        else:
+            points = kmlgen.generate_circle(op.center, op.radius_nm, total_points=kmlgen.circle_points(op.radius_nm))
+        vertices += len(points)
+        for p, q in zip(points, points[1:]):
+            error = chord_error(center, radius_m, p, q)
+            if error > max_error:
+                max_error, worst = error, op
+    return vertices, max_error, worst, bad_ends
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Écart corde/arc et fin des arcs pour chaque tolérance de corde")
+    parser.add_argument("--airspaces", default="../extracts/airspaces.json")
+    parser.add_argument("--tolerances", default="25,100,500", help="tolérances de corde en mètres, séparées par des virgules")
+    args = parser.parse_args()
+
+    with open(args.airspaces, encoding="utf-8") as f:
+        data = json.load(f)
+    ops = []
+    for cat in data:
+        for page in data[cat].values():
+            for airspace in page:
+                for layer in airspace["layers"]:
+                    try:
+                        program = coord_parser.compile_coords(layer["coord"])
+                    except ValueError:
+                        continue
+                    ops.extend(op for op in program.ops if isinstance(op, (Arc, Circle)))
+    nb_arcs = sum(1 for op in ops if isinstance(op, Arc))
+    print(f"{nb_arcs} arcs, {len(ops) - nb_arcs} cercles")
+
+    failed = False
+    print(f"{'tolérance':>12s} {'sommets':>9s} {'écart max':>10s} {'fins fausses':>13s}")
+    for tolerance in [None] + [float(t) for t in args.tolerances.split(",")]:
+        vertices, max_error, worst, bad_ends = check(ops, tolerance)
+        label = "20 pts/tour" if tolerance is None else f"{tolerance:.0f} m"
+        print(f"{label:>12s} {vertices:9d} {max_error:9.1f}m {len(bad_ends):13d}")
+        if tolerance is not None and max_error > tolerance:
+            failed = True
+            print(f"  écart {max_error:.1f} m > {tolerance:.0f} m sur {worst}")
+        for op in bad_ends:
+            failed = True
+            print(f"  dernier sommet hors de la fin de l'arc: {op}")
+
+    if failed:
+        sys.exit(1)
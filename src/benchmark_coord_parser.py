@@ -0,0 +1,140 @@
+import re
+import sys
+import json
+import time
+import argparse
+
+import coord_parser
+import generate_kml_from_json as kmlgen
+
+# === Vérification et débit de coord_parser sur tout le corpus ===
+#
+# Chaque chaîne coord de extracts/airspaces.json est compilée puis résolue, et
+# comparée à l'ancienne analyse segment par segment (reprise ci-dessous comme
+# référence): mêmes sommets, mêmes segments non reconnus, mêmes couches en
+# erreur. Le débit est mesuré pour la compilation seule, la résolution seule
+# (programmes déjà compilés) et l'analyse complète, ancienne et nouvelle.
+# L'analyse complète est dominée par la résolution des arcs, cercles et
+# frontières, commune aux deux: la compilation ne fait gagner que sur sa
+# part, et les deux analyses complètes restent du même ordre.
+
+
+# --- Ancienne analyse (découpe, puis expressions régulières et minuscules sur chaque segment) ---
+def legacy_parse_polygon_coords(coord_string, france_border, sea_border, problems):
+    segments = re.split(r"\s-\s", coord_string)
+    coords = []
+    i = 0
+    while i < len(segments):
+        segment = segments[i]
+        arc_match = coord_parser.re_arc.match(segment)
+        circle_match = coord_parser.re_circle.match(segment)
+        if arc_match and i > 0 and i < len(segments) - 1:
+            radius = kmlgen.convert_dist_to_nm(float(arc_match.group(2)), arc_match.group(3))
+            center = f"{arc_match.group(4)},{arc_match.group(5)}"
+            coords.extend(kmlgen.generate_arc_points(segments[i - 1], center, segments[i + 1], radius,
+                                                     max_circle_points=kmlgen.circle_points(radius),
+                                                     clockwise=arc_match.group(1) is None))
+            i += 2
+        elif circle_match:
+            radius = kmlgen.convert_dist_to_nm(float(circle_match.group(1)), circle_match.group(2))
+            center = f"{circle_match.group(3)},{circle_match.group(4)}"
+            coords.extend(kmlgen.generate_circle(center, radius, total_points=kmlgen.circle_points(radius)))
+            i += 1
+        elif ("frontière" in segment.lower() or "la côte atlantique" in segment.lower()) and 0 < i < len(segments) - 1:
+            start = kmlgen.parse_coord_pair(segments[i - 1])
+            end = kmlgen.parse_coord_pair(segments[i + 1])
+            coords.extend(kmlgen.extract_border_points(france_border, start, end))
+            i += 2
+        elif "eaux territoriales" in segment.lower() and 0 < i < len(segments) - 1:
+            start = kmlgen.parse_coord_pair(segments[i - 1])
+            end = kmlgen.parse_coord_pair(segments[i + 1])
+            coords.extend(kmlgen.extract_border_points(sea_border, start, end))
+            i += 2
+        else:
+            try:
+                coords.append(kmlgen.parse_coord_pair(segment))
+            except Exception:
+                problems.append(segment)
+            i += 1
+    return coords
+
+
+def new_parse(coord_string, france_border, sea_border, problems):
+    program = coord_parser.compile_coords(coord_string)
+    problems.extend(p.segment for p in program.problems)
+    return kmlgen.resolve_program(program, france_border, sea_border)
+
+
+def run(parse, corpus, france_border, sea_border):
+    results = []
+    for coord in corpus:
+        problems = []
+        try:
+            results.append((parse(coord, france_border, sea_border, problems), problems, None))
+        except ValueError as e:
+            results.append((None, problems, e))
+    return results
+
+
+def clear_caches():
+    for fn in (kmlgen.cached_dms_to_decimal, kmlgen.cached_parse_coord_pair,
+               kmlgen.cached_arc_points, kmlgen.cached_circle):
+        fn.cache_clear()
+
+
+def best_time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        clear_caches()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vérification et débit de coord_parser sur extracts/airspaces.json")
+    parser.add_argument("--airspaces", default="../extracts/airspaces.json")
+    parser.add_argument("--data", default="../data/")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.airspaces, encoding="utf-8") as f:
+        data = json.load(f)
+    corpus = [layer["coord"] for cat in data for page in data[cat].values() for airspace in page
+              for layer in airspace["layers"]]
+    segments = sum(len(coord_parser.tokenize(coord)) for coord in corpus)
+
+    france_border = kmlgen.load_france_boundary(f"{args.data}/metropole-version-simplifiee.geojson")
+    sea_border = kmlgen.load_france_boundary(f"{args.data}/EspMar_FR_MT_WGS84.geojson")
+
+    # --- Corpus: mêmes sommets, problèmes et erreurs que l'ancienne analyse ---
+    legacy = run(legacy_parse_polygon_coords, corpus, france_border, sea_border)
+    new = run(new_parse, corpus, france_border, sea_border)
+    mismatches = 0
+    for coord, (old_coords, old_problems, old_error), (coords, problems, error) in zip(corpus, legacy, new):
+        if old_coords != coords or old_problems != problems or (old_error is None) != (error is None):
+            mismatches += 1
+            print(f"Différence sur: {coord[:120]}")
+    errors = [e for _, _, e in new if e is not None]
+    nb_problems = sum(len(p) for _, p, _ in new)
+    print(f"{len(corpus)} chaînes coord, {segments} segments: {mismatches} différences, "
+          f"{nb_problems} segments non reconnus, {len(errors)} chaînes en erreur")
+    for e in errors:
+        print(f"  {e}")
+
+    # --- Débit ---
+    compile_s = best_time(lambda: [coord_parser.compile_coords(c) for c in corpus], args.repeat)
+    programs = [coord_parser.compile_coords(c) for c, (_, _, error) in zip(corpus, new) if error is None]
+    resolve_s = best_time(lambda: [kmlgen.resolve_program(p, france_border, sea_border) for p in programs],
+                          args.repeat)
+    legacy_s = best_time(lambda: run(legacy_parse_polygon_coords, corpus, france_border, sea_border), args.repeat)
+    new_s = best_time(lambda: run(new_parse, corpus, france_border, sea_border), args.repeat)
+    for name, seconds in [("compilation seule", compile_s), ("résolution seule", resolve_s),
+                          ("analyse complète, ancienne", legacy_s),
+                          ("analyse complète, nouvelle", new_s)]:
+        print(f"{name:28s} {seconds:8.3f}s {len(corpus) / seconds:10.0f} chaînes/s {segments / seconds:10.0f} segments/s")
+
+    if mismatches:
+        sys.exit(1)
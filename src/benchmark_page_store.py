@@ -0,0 +1,154 @@
+import os
+import sys
+import json
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+from generate_json_from_eaip import CATEGORIES
+from page_store import PageStore, scan_directory
+
+# === Archives d'édition contre répertoires de pages ===
+#
+# Plusieurs éditions AIRAC sont simulées à partir de sample_data: à chaque
+# édition les pages ENR changent et une fraction des pages d'aérodromes
+# (--changed) aussi, les autres sont identiques. Elles sont écrites une fois
+# en répertoires complets (une copie de sample_data par édition) et une fois
+# en archives page_store.py, puis on compare:
+#   - l'occupation disque (blocs alloués) et le nombre de fichiers: les
+#     pages identiques d'une édition à l'autre ne sont stockées qu'une fois;
+#   - le démarrage à froid sur la dernière édition, dans un interpréteur
+#     neuf, après avoir retiré les fichiers du cache du système
+#     (posix_fadvise DONTNEED): lecture de toutes les pages, puis analyse
+#     complète (parse_local, -j 1). Les deux analyses doivent donner le même JSON.
+
+PROBE = r"""
+import io, sys, json, time, hashlib, contextlib
+mode, source, edition, backend = sys.argv[1:5]
+result = {}
+start = time.perf_counter()
+if mode == "dir-read":
+    from generate_json_from_eaip import CATEGORIES
+    from page_store import scan_directory
+    size = 0
+    for cat, name, path in scan_directory(source, CATEGORIES):
+        with open(path, "rb") as f:
+            size += len(f.read())
+elif mode == "store-read":
+    from page_store import PageStore, read_page
+    size = sum(len(read_page(ref)) for _, _, ref in PageStore(source).pages(edition))
+else:
+    import generate_json_from_eaip as g
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode == "dir-parse":
+            data = g.parse_local(source, workers=1, nb_slowest=0, backend=backend)
+        else:
+            data = g.parse_local(workers=1, nb_slowest=0, backend=backend, store=source, edition=edition)
+    size = hashlib.sha256(json.dumps(data).encode()).hexdigest()
+result["seconds"] = time.perf_counter() - start
+result["result"] = size
+print(json.dumps(result))
+"""
+
+
+def make_editions(input_dir, count, changed, seed):
+    """[(édition, [(catégorie, nom, contenu)])]: pages ENR modifiées à chaque édition, une fraction des AD."""
+    rng = random.Random(seed)
+    pages = []
+    for cat, name, path in scan_directory(input_dir, CATEGORIES):
+        with open(path, "rb") as f:
+            pages.append((cat, name, f.read()))
+
+    editions = []
+    for i in range(count):
+        if i > 0:
+            pages = [(cat, name, content + f"\n<!-- édition {i} -->\n".encode("utf-8"))
+                     if not cat.startswith("AD-") or rng.random() < changed else (cat, name, content)
+                     for cat, name, content in pages]
+        editions.append((f"AIRAC-2099-{i + 1:02d}-01", pages))
+    return editions
+
+
+def write_directory(root, pages):
+    for cat, name, content in pages:
+        os.makedirs(os.path.join(root, cat), exist_ok=True)
+        with open(os.path.join(root, cat, name), "wb") as f:
+            f.write(content)
+
+
+def disk_usage(root):
+    files = 0
+    size = 0
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            files += 1
+            size += os.stat(os.path.join(dirpath, name)).st_blocks * 512
+    return files, size
+
+
+def evict(root):
+    """Retire les fichiers de root du cache de pages du système (ils doivent avoir été écrits sur disque)."""
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            fd = os.open(os.path.join(dirpath, name), os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+
+
+def cold_run(mode, root, source, edition, backend):
+    evict(root)
+    out = subprocess.run([sys.executable, "-c", PROBE, mode, source, edition, backend],
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def best(mode, root, source, edition, backend, repeat):
+    runs = [cold_run(mode, root, source, edition, backend) for _ in range(repeat)]
+    return min(runs, key=lambda r: r["seconds"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Occupation disque et démarrage à froid: archives contre répertoires")
+    parser.add_argument("input_dir", nargs="?", default="../sample_data/")
+    parser.add_argument("--editions", type=int, default=3, help="éditions AIRAC simulées")
+    parser.add_argument("--changed", type=float, default=0.2, help="part des pages d'aérodromes modifiées par édition")
+    parser.add_argument("--codec", default="zlib")
+    parser.add_argument("--backend", default="lxml", help="analyseur HTML de la mesure d'analyse complète")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    tmp = tempfile.mkdtemp(prefix="eaip_store_")
+    try:
+        dirs_root = os.path.join(tmp, "dirs")
+        store_root = os.path.join(tmp, "store")
+        store = PageStore(store_root)
+        editions = make_editions(args.input_dir, args.editions, args.changed, args.seed)
+        for edition, pages in editions:
+            write_directory(os.path.join(dirs_root, edition), pages)
+            stats = store.add_edition(edition, pages, args.codec)
+            print(f"{edition}: {stats['pages']} pages, {stats['stored']} stockées, {stats['shared']} reprises, "
+                  f"{stats['added_bytes'] / 1024:.0f} Ko ajoutés")
+        os.sync()
+
+        dir_files, dir_bytes = disk_usage(dirs_root)
+        store_files, store_bytes = disk_usage(store_root)
+        print(f"\n{'disque, ' + str(args.editions) + ' éditions':28s} {'fichiers':>9s} {'Ko':>10s}")
+        print(f"{'répertoires':28s} {dir_files:9d} {dir_bytes / 1024:10.0f}")
+        print(f"{'archives':28s} {store_files:9d} {store_bytes / 1024:10.0f}   ({dir_bytes / store_bytes:.1f}x moins)")
+
+        latest, _ = editions[-1]
+        latest_dir = os.path.join(dirs_root, latest)
+        print(f"\n{'à froid, ' + latest:28s} {'répertoire':>11s} {'archive':>11s}")
+        for label, mode in [("lecture des pages", "read"), (f"analyse ({args.backend}, -j 1)", "parse")]:
+            d = best(f"dir-{mode}", latest_dir, latest_dir, latest, args.backend, args.repeat)
+            s = best(f"store-{mode}", store_root, store_root, latest, args.backend, args.repeat)
+            same = "" if d["result"] == s["result"] else "  RÉSULTATS DIFFÉRENTS"
+            print(f"{label:28s} {d['seconds'] * 1000:9.0f}ms {s['seconds'] * 1000:9.0f}ms{same}")
+    finally:
+        shutil.rmtree(tmp)
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import argparse
+
+from generate_json_from_eaip import PARSER_BACKENDS, parse_html_content
+
+# === Liste des pages de sample_data ===
+def list_pages(input_dir):
+    pages = []
+    for root, _, files in os.walk(input_dir):
+        for f in sorted(files):
+            if f.endswith(".html") or f.endswith(".htm"):
+                pages.append(os.path.join(root, f))
+    return sorted(pages)
+
+# === Vérification: chaque backend doit produire le même résultat que html.parser ===
+def check_equivalence(contents, backends):
+    errors = 0
+    for path, content in contents.items():
+        reference = parse_html_content(content, "html.parser")
+        for backend in backends:
+            if backend == "html.parser":
+                continue
+            if parse_html_content(content, backend) != reference:
+                print(f"Différence {backend} sur {path}")
+                errors += 1
+    return errors
+
+# === Mesure du débit en pages/seconde ===
+def benchmark(contents, backend):
+    start = time.perf_counter()
+    for content in contents.values():
+        parse_html_content(content, backend)
+    elapsed = time.perf_counter() - start
+    return len(contents) / elapsed, elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Comparaison des backends d'analyse HTML sur sample_data")
+    parser.add_argument("--input", default="../sample_data/")
+    parser.add_argument("--backend", choices=PARSER_BACKENDS, action="append",
+                        help="backend à tester (par défaut: tous)")
+    parser.add_argument("--no-check", action="store_true", help="ne vérifie pas l'équivalence des résultats")
+    args = parser.parse_args()
+
+    backends = args.backend or PARSER_BACKENDS
+
+    contents = {}
+    for path in list_pages(args.input):
+        with open(path, "rb") as f:
+            contents[path] = f.read()
+
+    if not args.no_check:
+        errors = check_equivalence(contents, backends)
+        print(f"Equivalence: {len(contents)} pages, {errors} différence(s)")
+        if errors:
+            sys.exit(1)
+
+    for backend in backends:
+        rate, elapsed = benchmark(contents, backend)
+        print(f"{backend:12s} {rate:8.2f} pages/s ({elapsed:.2f}s)")
@@ -0,0 +1,67 @@
+import time
+import random
+import argparse
+
+import airspace_query as aq
+
+# === Banc de la recherche de volumes: grille + lot vectorisé contre parcours exhaustif ===
+#
+# Points tirés au hasard sur l'emprise de la France métropolitaine, altitudes
+# entre le sol et FL300. Le parcours exhaustif (test point dans polygone sur
+# toutes les couches) sert de référence: les résultats doivent être identiques.
+
+FRANCE_BBOX = (41.0, -5.5, 51.5, 10.0)
+
+
+def brute_force(layers, lat, lon, alt):
+    return [k for k, layer in enumerate(layers)
+            if layer["lower"] <= alt <= layer["upper"] and aq.point_in_polygon(lat, lon, layer["coords"])]
+
+
+def random_points(n, seed):
+    rng = random.Random(seed)
+    south, west, north, east = FRANCE_BBOX
+    return [(rng.uniform(south, north), rng.uniform(west, east), rng.uniform(0, 9144)) for _ in range(n)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc de la recherche de volumes par point")
+    parser.add_argument("-n", "--points", type=int, default=20000, help="points de la requête par lot")
+    parser.add_argument("--brute-points", type=int, default=1000,
+                        help="points vérifiés par parcours exhaustif (plus lent)")
+    parser.add_argument("--geometry", metavar="PATH", help="géométrie binaire de geometry_store.py au lieu du JSON")
+    parser.add_argument("--cell-size", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    index, elapsed = timed(lambda: aq.load_index(args.geometry, cell_size=args.cell_size))
+    print(f"{len(index)} couches indexées en {elapsed:.2f}s ({len(index.grid)} cellules)")
+
+    points = random_points(args.points, args.seed)
+    lats, lons, alts = zip(*points)
+    batch, batch_s = timed(lambda: index.query_batch(lats, lons, alts))
+    single, single_s = timed(lambda: [index.query(*p) for p in points])
+
+    checked = points[:args.brute_points]
+    brute, brute_s = timed(lambda: [brute_force(index.layers, *p) for p in checked])
+
+    mismatches = sum(1 for k in range(len(checked)) if brute[k] != batch[k] or brute[k] != single[k])
+    mismatches += sum(1 for k in range(len(points)) if batch[k] != single[k])
+    hits = sum(len(h) for h in batch)
+
+    rows = [
+        ("parcours exhaustif", len(checked), brute_s),
+        ("grille, point par point", len(points), single_s),
+        ("grille, lot numpy", len(points), batch_s),
+    ]
+    for name, n, seconds in rows:
+        print(f"{name:26s} {n:7d} points {seconds:8.3f}s {n / seconds:12.0f} points/s")
+    print(f"{hits} couches trouvées, {mismatches} différences avec le parcours exhaustif")
+    if mismatches:
+        raise SystemExit(1)
@@ -0,0 +1,171 @@
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlsplit, urlencode
+
+# === Banc de charge de serve_airspaces.py ===
+#
+# Lance le serveur dans un processus à part (ou vise --url), puis des clients
+# en parallèle, chacun sur une connexion persistante, demandent des fenêtres
+# tirées au hasard sur la France métropolitaine (de 0.25° à 4° de côté),
+# parfois filtrées par catégorie ou altitude, en GeoJSON ou KML.
+#
+# Deux phases: "fenêtres uniques" (presque toujours hors cache) puis
+# "fenêtres répétées" (tirées dans un petit ensemble, comme des clients qui
+# reviennent sur les mêmes vues). Pour chaque phase: débit, latences p50/p90/p99,
+# volume servi et taux de réussite du cache côté serveur.
+
+FRANCE_BBOX = (41.0, -5.5, 51.5, 10.0)
+VIEWPORT_SIZES = [0.25, 0.5, 1.0, 2.0, 4.0]
+CATEGORY_FILTERS = [None, None, None, "AD-2-AERODROMES", "ENR-2.1-FIR_UIR_TMA_CTA",
+                    "AD-2-AERODROMES,ENR-2.1-FIR_UIR_TMA_CTA", "ENR-5.1-ZI_ZR_ZD"]
+ALTITUDE_FILTERS = [None, None, (0, 1981), (1981, 5944)]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, server_args):
+    process = subprocess.Popen([sys.executable, "serve_airspaces.py", "--port", str(port), *server_args],
+                               stdout=subprocess.PIPE, text=True)
+    # la première ligne est écrite quand le serveur écoute
+    print(process.stdout.readline().strip())
+    return process
+
+
+def random_request(rng):
+    south, west, north, east = FRANCE_BBOX
+    size = rng.choice(VIEWPORT_SIZES)
+    lat = rng.uniform(south, north - size)
+    lon = rng.uniform(west, east - size)
+    params = {"bbox": f"{lon:.4f},{lat:.4f},{lon + size:.4f},{lat + size:.4f}"}
+    category = rng.choice(CATEGORY_FILTERS)
+    if category:
+        params["category"] = category
+    altitudes = rng.choice(ALTITUDE_FILTERS)
+    if altitudes:
+        params["lower"], params["upper"] = altitudes
+    fmt = "geojson" if rng.random() < 0.7 else "kml"
+    return f"/airspaces.{fmt}?{urlencode(params)}"
+
+
+def get(conn, path, gzip):
+    conn.request("GET", path, headers={"Accept-Encoding": "gzip"} if gzip else {})
+    response = conn.getresponse()
+    body = response.read()
+    return response.status, body
+
+
+def client(url, paths, gzip, latencies, errors, sizes):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    for path in paths:
+        start = time.perf_counter()
+        try:
+            status, body = get(conn, path, gzip)
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+            errors.append(path)
+            continue
+        latencies.append(time.perf_counter() - start)
+        sizes.append(len(body))
+        if status != 200:
+            errors.append(path)
+    conn.close()
+
+
+def server_stats(url):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    _, body = get(conn, "/stats", False)
+    conn.close()
+    return json.loads(body)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def run_phase(name, url, paths, clients, gzip):
+    latencies, errors, sizes = [], [], []
+    before = server_stats(url)["cache"]
+    threads = [threading.Thread(target=client, args=(url, paths[i::clients], gzip, latencies, errors, sizes))
+               for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    after = server_stats(url)["cache"]
+
+    hits = after["hits"] - before["hits"]
+    misses = after["misses"] - before["misses"]
+    result = {
+        "phase": name,
+        "requests": len(paths),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "requests_per_s": len(paths) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_kb": sum(sizes) / max(1, len(sizes)) / 1024,
+        "cache_hit_ratio": hits / max(1, hits + misses),
+    }
+    print(f"{name:22s} {result['requests']:6d} req {result['requests_per_s']:8.0f} req/s  "
+          f"p50 {result['p50_ms']:6.1f} ms  p90 {result['p90_ms']:6.1f} ms  p99 {result['p99_ms']:6.1f} ms  "
+          f"{result['mean_kb']:7.1f} Ko/rép  cache {result['cache_hit_ratio']:4.0%}  erreurs {result['errors']}")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc de charge du serveur serve_airspaces.py")
+    parser.add_argument("--url", help="serveur déjà lancé (par défaut un serveur est démarré pour le banc)")
+    parser.add_argument("-n", "--requests", type=int, default=2000, help="requêtes par phase")
+    parser.add_argument("-c", "--clients", type=int, default=8, help="clients en parallèle")
+    parser.add_argument("--distinct", type=int, default=50, help="fenêtres différentes de la phase répétée")
+    parser.add_argument("--no-gzip", action="store_true", help="demande les réponses non compressées")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", metavar="PATH", help="écrit les résultats en JSON")
+    parser.add_argument("server_args", nargs=argparse.REMAINDER,
+                        help="options passées au serveur lancé par le banc, après --")
+    args = parser.parse_args()
+
+    process = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        process = start_server(port, [a for a in args.server_args if a != "--"])
+        url = f"http://127.0.0.1:{port}"
+
+    try:
+        rng = random.Random(args.seed)
+        unique = [random_request(rng) for _ in range(args.requests)]
+        pool = [random_request(rng) for _ in range(args.distinct)]
+        repeated = [rng.choice(pool) for _ in range(args.requests)]
+
+        gzip = not args.no_gzip
+        results = [
+            run_phase("fenêtres uniques", url, unique, args.clients, gzip),
+            run_phase("fenêtres répétées", url, repeated, args.clients, gzip),
+        ]
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,88 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# === Budget de démarrage ===
+#
+# Chaque mesure est faite dans un interpréteur neuf (meilleur temps sur
+# --repeat lancements): import des modules, création d'un Toolkit, première
+# conversion JSON -> KMZ (chargement des contours et des dépendances) puis
+# conversion suivante dans le même processus. Le script échoue si une mesure
+# dépasse son budget.
+
+# secondes; les imports ne doivent charger ni bs4, ni requests, ni numpy
+BUDGETS = {
+    "import eaip_airspaces": 0.005,
+    "import generate_json_from_eaip": 0.050,
+    "import generate_kml_from_json": 0.060,
+    "Toolkit()": 0.100,
+    "première conversion": 3.0,
+    "conversion suivante": 2.0,
+}
+HEAVY_MODULES = ["bs4", "requests", "numpy", "lxml", "simplekml"]
+
+PROBE = r"""
+import sys, time, json
+start = time.perf_counter()
+exec(sys.argv[1])
+result = {"seconds": time.perf_counter() - start, "heavy": [m for m in sys.argv[2].split(",") if m in sys.modules]}
+exec(sys.argv[3])
+print(json.dumps(result))
+"""
+
+CONVERSION = r"""
+import tempfile
+from eaip_airspaces import Toolkit
+toolkit = Toolkit()
+data = toolkit.load_json("../extracts/airspaces.json")
+with tempfile.TemporaryDirectory() as out:
+    t = time.perf_counter()
+    toolkit.write_kmz(data, out)
+    result["first"] = time.perf_counter() - t
+    t = time.perf_counter()
+    toolkit.write_kmz(data, out)
+    result["next"] = time.perf_counter() - t
+"""
+
+
+def probe(code, after=""):
+    out = subprocess.run([sys.executable, "-c", PROBE, code, ",".join(HEAVY_MODULES), after],
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def best(code, repeat, after=""):
+    runs = [probe(code, after) for _ in range(repeat)]
+    return min(runs, key=lambda r: r["seconds"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mesure du temps d'import et de démarrage")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    results = {}
+    for name in ["eaip_airspaces", "generate_json_from_eaip", "generate_kml_from_json"]:
+        r = best(f"import {name}", args.repeat)
+        results[f"import {name}"] = (r["seconds"], r["heavy"])
+    r = best("from eaip_airspaces import Toolkit; Toolkit()", args.repeat)
+    results["Toolkit()"] = (r["seconds"], r["heavy"])
+
+    r = probe("pass", CONVERSION)
+    results["première conversion"] = (r["first"], None)
+    results["conversion suivante"] = (r["next"], None)
+
+    over = []
+    for name, (seconds, heavy) in results.items():
+        budget = BUDGETS[name]
+        flag = "" if seconds <= budget else "HORS BUDGET"
+        loaded = "" if heavy is None else f" modules lourds chargés: {', '.join(heavy) or 'aucun'}"
+        print(f"{name:32s} {seconds * 1000:9.1f} ms (budget {budget * 1000:.0f} ms){loaded} {flag}")
+        if flag or heavy:
+            over.append(name)
+
+    if over:
+        sys.exit(1)
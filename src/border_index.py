@@ -0,0 +1,140 @@
+import bisect
+import math
+from collections import defaultdict
+
+
+# === Index spatial des contours (frontière, eaux territoriales) ===
+#
+# Les anneaux du GeoJSON sont conservés séparément: les points sont mis bout à
+# bout dans `points` et `ring_offsets` donne l'indice cumulé du début de chaque
+# anneau. Une grille uniforme permet de trouver le sommet le plus proche sans
+# parcourir tout le contour, et le parcours entre deux sommets reste sur un
+# seul anneau. Les distances sont calculées en degrés au carré, comme
+# auparavant. La même grille donne les arêtes proches d'un segment, pour les
+# tests d'intersection de simplify.py (sur les frontières comme sur les
+# contours des zones).
+class BorderIndex:
+    def __init__(self, rings, points_per_cell=4):
+        self.points = []
+        self.ring_offsets = []
+
+        for ring in rings:
+            ring = list(ring)
+            # anneau fermé: le dernier point répète le premier
+            if len(ring) > 1 and ring[0] == ring[-1]:
+                ring.pop()
+            if ring:
+                self.ring_offsets.append(len(self.points))
+                self.points.extend(ring)
+        self.ring_offsets.append(len(self.points))
+
+        if not self.points:
+            raise ValueError("Border must contain at least one point")
+
+        lats = [p[0] for p in self.points]
+        lons = [p[1] for p in self.points]
+        self.min_lat = min(lats)
+        self.min_lon = min(lons)
+        height = max(lats) - self.min_lat
+        width = max(lons) - self.min_lon
+
+        area = max(height * width, 1e-12)
+        self.cell = max(math.sqrt(area * points_per_cell / len(self.points)), 1e-6)
+        self.rows = int(height / self.cell) + 1
+        self.cols = int(width / self.cell) + 1
+
+        self.grid = defaultdict(list)
+        for i, (lat, lon) in enumerate(self.points):
+            self.grid[self.cell_of(lat, lon)].append(i)
+
+        # arêtes par cellule couverte par leur boîte, construites à la première recherche d'arêtes
+        self.edge_grid = None
+
+    def __len__(self):
+        return len(self.points)
+
+    def cell_of(self, lat, lon):
+        return (math.floor((lat - self.min_lat) / self.cell), math.floor((lon - self.min_lon) / self.cell))
+
+    def ring_of(self, i):
+        return bisect.bisect_right(self.ring_offsets, i) - 1
+
+    def ring_neighbours(self, i):
+        """Sommets précédent et suivant de i sur son anneau."""
+        ring = self.ring_of(i)
+        offset = self.ring_offsets[ring]
+        n = self.ring_offsets[ring + 1] - offset
+        return offset + (i - offset - 1) % n, offset + (i - offset + 1) % n
+
+    def cells_of(self, a, b):
+        """Cellules de la grille couvertes par la boîte du segment [ab]."""
+        row0, col0 = self.cell_of(min(a[0], b[0]), min(a[1], b[1]))
+        row1, col1 = self.cell_of(max(a[0], b[0]), max(a[1], b[1]))
+        return [(r, c) for r in range(max(row0, 0), min(row1, self.rows) + 1)
+                for c in range(max(col0, 0), min(col1, self.cols) + 1)]
+
+    def edges_near(self, a, b):
+        """Arêtes (i, suivant) pouvant couper le segment [ab]: leur boîte partage une cellule avec la sienne."""
+        if self.edge_grid is None:
+            self.edge_grid = defaultdict(list)
+            for i in range(len(self.points)):
+                j = self.ring_neighbours(i)[1]
+                for cell in self.cells_of(self.points[i], self.points[j]):
+                    self.edge_grid[cell].append((i, j))
+        edges = set()
+        for cell in self.cells_of(a, b):
+            edges.update(self.edge_grid.get(cell, ()))
+        return edges
+
+    def nearest(self, point, ring=None):
+        """Indice du sommet le plus proche de point, éventuellement limité à un anneau."""
+        lat, lon = point
+        row, col = self.cell_of(lat, lon)
+
+        # au-delà de cette distance (en cellules), la grille ne contient plus rien
+        max_k = max(abs(row), abs(row - self.rows), abs(col), abs(col - self.cols)) + 1
+
+        best = None
+        best_d = math.inf
+        for k in range(max_k + 1):
+            for r in range(row - k, row + k + 1):
+                step = 1 if r in (row - k, row + k) else 2 * k
+                for c in range(col - k, col + k + 1, max(step, 1)):
+                    for i in self.grid.get((r, c), ()):
+                        if ring is not None and self.ring_of(i) != ring:
+                            continue
+                        p = self.points[i]
+                        d = (p[0] - lat) ** 2 + (p[1] - lon) ** 2
+                        # à distance égale, le plus petit indice, comme min()
+                        if d < best_d or (d == best_d and i < best):
+                            best = i
+                            best_d = d
+
+            # tout point d'une cellule plus éloignée est à plus de k cellules
+            if best is not None and best_d <= (k * self.cell) ** 2:
+                break
+
+        return best
+
+    def distance2(self, i, point):
+        p = self.points[i]
+        return (p[0] - point[0]) ** 2 + (p[1] - point[1]) ** 2
+
+    def walk(self, i0, i1):
+        """Sommets de i0 à i1 par le plus court chemin le long de leur anneau commun."""
+        return [self.points[i] for i in self.walk_indices(i0, i1)]
+
+    def walk_indices(self, i0, i1):
+        ring = self.ring_of(i0)
+        offset = self.ring_offsets[ring]
+        n = self.ring_offsets[ring + 1] - offset
+        j0 = i0 - offset
+        j1 = i1 - offset
+
+        dist_cw = (j1 - j0) % n
+        dist_ccw = (j0 - j1) % n
+        if dist_cw <= dist_ccw:
+            indices = [(j0 + k) % n for k in range(dist_cw + 1)]
+        else:
+            indices = [(j0 - k) % n for k in range(dist_ccw + 1)]
+        return [offset + j for j in indices]
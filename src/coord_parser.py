@@ -0,0 +1,181 @@
+import re
+import functools
+from collections import namedtuple
+
+# === Compilation des limites latérales en programme géométrique ===
+#
+# Une chaîne coord de l'eAIP ("point - arc ... - point - Frontière ... - point")
+# est lue en une passe: chaque segment est classé une fois, les points voisins
+# des arcs et des frontières sont analysés une seule fois, et le résultat est
+# une suite d'opérations typées (Point, Arc, Circle, Border) que le générateur
+# résout ensuite en sommets. Les segments non reconnus sont gardés comme
+# problèmes avec leur position dans la chaîne; un arc ou une frontière sans
+# point voisin valide lève CoordSyntaxError.
+
+# === Pré-compilation des expressions régulières ===
+re_dms = re.compile(r"(\d+)°(\d+)'(\d+)(?:\"|')?([NSEW])")
+re_arc = re.compile(r"arc (anti-)?horaire de (\d+(?:\.\d+)?)\s*(NM|km|m) de rayon centré sur (.+?)\s*,\s*([0-9°'\"]+[NEWS])(?:\s*\(.*\))?\s*$")
+re_circle = re.compile(r"cercle de (\d+(?:\.\d+)?)\s*(NM|km|m) de rayon centré sur (.+?)\s*,\s*([0-9°'\"]+[NEWS]).*$")
+re_separator = re.compile(r"\s-\s")
+# segment "lat , lon" complet, lu d'un coup par le compilateur; tout autre segment passe par parse_coord_pair
+re_pair = re.compile(r"\s*(\d+)°(\d+)'(\d+)[\"']?([NSEW])\s*,\s*(\d+)°(\d+)'(\d+)[\"']?([NSEW])\s*")
+
+# === Mémoïsation des primitives géométriques ===
+# les mêmes chaînes DMS, centres d'arcs et cercles reviennent souvent d'une couche à l'autre
+CACHE_SIZE = 8192
+
+def normalize_text(s):
+    return " ".join(s.split())
+
+def normalize_pair(pair_str):
+    return ",".join(normalize_text(s) for s in pair_str.split(','))
+
+# === Conversion DMS => décimal ===
+def dms_to_decimal(dms_str):
+    return cached_dms_to_decimal(normalize_text(dms_str))
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def cached_dms_to_decimal(dms_str):
+    match = re_dms.match(dms_str)
+    if not match:
+        raise ValueError(f"Invalid DMS format: {dms_str}")
+    deg, minute, sec, hemi = match.groups()
+    decimal = int(deg) + int(minute) / 60 + int(sec) / 3600
+    if hemi in ['S', 'W']:
+        decimal = -decimal
+    return decimal
+
+def parse_coord_pair(pair_str):
+    return cached_parse_coord_pair(normalize_pair(pair_str))
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def cached_parse_coord_pair(pair_str):
+    try:
+        lat_str, lon_str = [s.strip() for s in pair_str.split(',')]
+        lat = dms_to_decimal(lat_str)
+        lon = dms_to_decimal(lon_str)
+        return (lat, lon)
+    except Exception as e:
+        raise ValueError(f"Invalid coordinate pair: {pair_str} ({e})")
+
+def match_pair(match):
+    """(lat, lon) d'un segment reconnu par re_pair, au bit près comme parse_coord_pair."""
+    deg, minute, sec, hemi, deg2, minute2, sec2, hemi2 = match.groups()
+    lat = int(deg) + int(minute) / 60 + int(sec) / 3600
+    lon = int(deg2) + int(minute2) / 60 + int(sec2) / 3600
+    return (-lat if hemi in "SW" else lat, -lon if hemi2 in "SW" else lon)
+
+def convert_dist_to_nm(dist, unit):
+    result = None
+    if unit == "NM":
+        result = dist
+    elif unit == "km":
+        result = dist / 1.852
+    elif unit == "m":
+        result = dist / 1852
+    else:
+        raise ValueError(f"Unknown unit : {unit}")
+    return result
+
+# === Opérations du programme ===
+# pos: position du segment dans la chaîne coord; points en (lat, lon) décimaux
+Point = namedtuple("Point", "pos point")
+Arc = namedtuple("Arc", "pos start center end radius_nm clockwise")
+Circle = namedtuple("Circle", "pos center radius_nm")
+# border: "france" (frontière, côte atlantique) ou "sea" (eaux territoriales)
+Border = namedtuple("Border", "pos border start end")
+
+Program = namedtuple("Program", "ops problems")
+
+FRANCE_BORDER_KEYWORDS = ("frontière", "la côte atlantique")
+SEA_BORDER_KEYWORDS = ("eaux territoriales",)
+
+
+class CoordSyntaxError(ValueError):
+    def __init__(self, message, pos, segment):
+        super().__init__(f"{message} (position {pos}: {segment!r})")
+        self.message = message
+        self.pos = pos
+        self.segment = segment
+
+
+def tokenize(coord_string):
+    """Segments de la chaîne et leur position de début."""
+    segments = []
+    start = 0
+    for match in re_separator.finditer(coord_string):
+        segments.append((start, coord_string[start:match.start()]))
+        start = match.end()
+    segments.append((start, coord_string[start:]))
+    return segments
+
+
+def compile_coords(coord_string):
+    segments = tokenize(coord_string)
+    ops = []
+    problems = []
+
+    # la plupart des segments sont des points: un seul appel à re_pair, sans découpe ni normalisation
+    pairs = [re_pair.fullmatch(segment) for _, segment in segments]
+
+    def neighbour_point(i, what):
+        if pairs[i]:
+            return match_pair(pairs[i])
+        pos, segment = segments[i]
+        try:
+            return parse_coord_pair(segment)
+        except ValueError as e:
+            raise CoordSyntaxError(f"{what}: {e}", pos, segment)
+
+    i = 0
+    last = len(segments) - 1
+    while i <= last:
+        pos, segment = segments[i]
+        if pairs[i]:
+            ops.append(Point(pos, match_pair(pairs[i])))
+            i += 1
+            continue
+        inner = 0 < i < last
+        arc_match = re_arc.match(segment) if segment.startswith("arc ") else None
+        circle_match = re_circle.match(segment) if arc_match is None and segment.startswith("cercle ") else None
+
+        if arc_match and inner:
+            radius = convert_dist_to_nm(float(arc_match.group(2)), arc_match.group(3))
+            try:
+                center = parse_coord_pair(f"{arc_match.group(4)},{arc_match.group(5)}")
+            except ValueError as e:
+                raise CoordSyntaxError(f"Centre d'arc invalide: {e}", pos, segment)
+            start = neighbour_point(i - 1, "Début d'arc invalide")
+            end = neighbour_point(i + 1, "Fin d'arc invalide")
+            ops.append(Arc(pos, start, center, end, radius, arc_match.group(1) is None))
+            i += 2
+        elif circle_match:
+            radius = convert_dist_to_nm(float(circle_match.group(1)), circle_match.group(2))
+            try:
+                center = parse_coord_pair(f"{circle_match.group(3)},{circle_match.group(4)}")
+            except ValueError as e:
+                raise CoordSyntaxError(f"Centre de cercle invalide: {e}", pos, segment)
+            ops.append(Circle(pos, center, radius))
+            i += 1
+        else:
+            lower = segment.lower() if inner else ""
+            if any(k in lower for k in FRANCE_BORDER_KEYWORDS):
+                border = "france"
+            elif any(k in lower for k in SEA_BORDER_KEYWORDS):
+                border = "sea"
+            else:
+                border = None
+
+            if border:
+                start = neighbour_point(i - 1, "Début de frontière invalide")
+                end = neighbour_point(i + 1, "Fin de frontière invalide")
+                ops.append(Border(pos, border, start, end))
+                i += 2
+            else:
+                try:
+                    ops.append(Point(pos, parse_coord_pair(segment)))
+                except ValueError as e:
+                    problems.append(CoordSyntaxError(f"Segment non reconnu: {e}", pos, segment))
+                i += 1
+
+    return Program(ops, problems)
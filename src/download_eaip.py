@@ -0,0 +1,235 @@
+import re
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+
+# === Téléchargement concurrent des pages eAIP ===
+#
+# Remplace download_all.sh: une session HTTP partagée (connexions réutilisées),
+# un nombre borné de téléchargements simultanés, des reprises automatiques et
+# une revalidation ETag/If-Modified-Since qui évite de retélécharger les pages
+# inchangées. Le filtrage des balises <del> est fait en mémoire.
+
+EAIP_VERSION = "eAIP_30_OCT_2025/FRANCE/AIRAC-2025-10-02"
+BASE_URL = "https://www.sia.aviation-civile.gouv.fr/media/dvd/{version}/html/eAIP"
+
+MENU_PAGE = "FR-menu-fr-FR.html"
+
+# pages ENR et répertoire de sample_data correspondant
+ENR_PAGES = [
+    ("FR-ENR-2.1-fr-FR.html", "ENR-2.1-FIR_UIR_TMA_CTA"),
+    ("FR-ENR-2.2-fr-FR.html", "ENR-2.2-TMZ_ACC_UAC_APP_FRA_DLG_SIV"),
+    ("FR-ENR-5.1-fr-FR.html", "ENR-5.1-ZI_ZR_ZD"),
+]
+AD_CATEGORY = "AD-2-AERODROMES"
+
+re_airport_link = re.compile(r'a href="(FR-AD-[23]\.LF[^"#]*)')
+# équivalent de sed 's/<del class.*<\/del>//g', ligne par ligne
+re_del = re.compile(r"<del class.*</del>")
+
+
+class Page:
+    def __init__(self, name, category, content, status):
+        self.name = name
+        self.category = category
+        self.content = content
+        self.status = status
+
+
+def make_session(workers=8, retries=3):
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def strip_del(content):
+    return re_del.sub("", content.decode("utf-8")).encode("utf-8")
+
+
+def airport_pages(menu):
+    return sorted(set(re_airport_link.findall(menu.decode("utf-8"))))
+
+
+# --- Métadonnées de revalidation (ETag, Last-Modified) par URL ---
+class ValidatorStore:
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def headers(self, url, local_path):
+        # sans copie locale, une réponse 304 serait inutilisable
+        entry = self.entries.get(url)
+        if entry is None or not os.path.exists(local_path):
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url, resp):
+        with self.lock:
+            self.entries[url] = {
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+            }
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+class Downloader:
+    def __init__(self, base_url, output_dir, workers=8, retries=3, timeout=30, revalidate=True):
+        self.base_url = base_url.rstrip("/")
+        self.output_dir = output_dir
+        self.workers = workers
+        self.timeout = timeout
+        self.session = make_session(workers, retries)
+        validators_path = os.path.join(output_dir, ".http_validators.json") if revalidate else None
+        self.validators = ValidatorStore(validators_path)
+
+    def fetch(self, name, local_path):
+        """Renvoie (contenu filtré, statut HTTP); sur 304 le contenu est relu depuis local_path."""
+        url = f"{self.base_url}/{name}"
+        resp = self.session.get(url, headers=self.validators.headers(url, local_path), timeout=self.timeout)
+
+        if resp.status_code == 304:
+            with open(local_path, "rb") as f:
+                return f.read(), 304
+
+        resp.raise_for_status()
+        content = strip_del(resp.content)
+
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        tmp_path = local_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, local_path)
+
+        self.validators.update(url, resp)
+        return content, resp.status_code
+
+    def fetch_page(self, name, category):
+        local_path = os.path.join(self.output_dir, category, name)
+        try:
+            content, status = self.fetch(name, local_path)
+        except requests.RequestException as e:
+            print(f"Erreur sur {name}: {e}")
+            return Page(name, category, None, None)
+        return Page(name, category, content, status)
+
+    def run(self):
+        """Télécharge le menu, les pages d'aérodromes et les ENR; renvoie les pages dans un ordre stable.
+        Si le menu est en erreur, il est renvoyé en tête comme une page en erreur et seules les ENR sont téléchargées."""
+        menu = self.fetch_page(MENU_PAGE, "scripts")
+        airports = []
+        if menu.content is not None:
+            airports = airport_pages(menu.content)
+            with open(os.path.join(self.output_dir, "scripts", "airport_list.txt"), "w", encoding="utf-8") as f:
+                f.write("".join(f"{name}\n" for name in airports))
+
+        jobs = [(name, AD_CATEGORY) for name in airports] + ENR_PAGES
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pages = list(executor.map(lambda job: self.fetch_page(*job), jobs))
+        if menu.content is None:
+            pages.insert(0, menu)
+
+        self.validators.save()
+        return pages
+
+
+def print_summary(pages, elapsed):
+    downloaded = sum(1 for p in pages if p.status == 200)
+    unchanged = sum(1 for p in pages if p.status == 304)
+    failed = sum(1 for p in pages if p.content is None)
+    print(f"{len(pages)} pages en {elapsed:.2f}s: {downloaded} téléchargées, {unchanged} inchangées, {failed} en erreur")
+
+
+# === Analyse directe des pages téléchargées ===
+def write_json(pages, backend, output_path):
+    from generate_json_from_eaip import CATEGORIES, parse_html_content
+
+    final_data = {cat: {} for cat in CATEGORIES}
+    for page in pages:
+        if page.content is None:
+            continue
+        airspaces = parse_html_content(page.content, backend)
+        if airspaces:
+            final_data[page.category][page.name] = airspaces
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(final_data, f, indent=2, ensure_ascii=False)
+
+    print(f"Fichier {output_path} généré avec les pages téléchargées.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Téléchargement des pages eAIP dans sample_data")
+    parser.add_argument("--airac", default=EAIP_VERSION, help="répertoire de l'édition eAIP sur le site du SIA")
+    parser.add_argument("--base-url", help="URL du répertoire html/eAIP (par défaut celle du SIA pour --airac)")
+    parser.add_argument("--output", default="../sample_data/")
+    parser.add_argument("-j", "--workers", type=int, default=8, help="téléchargements simultanés")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--no-revalidate", action="store_true",
+                        help="retélécharge toutes les pages sans If-None-Match/If-Modified-Since")
+    parser.add_argument("--json", metavar="PATH",
+                        help="analyse directement les pages téléchargées et écrit le JSON des espaces")
+    parser.add_argument("--backend", default="html.parser", help="analyseur HTML utilisé avec --json")
+    parser.add_argument("--store", nargs="?", const="../store/", metavar="DIR",
+                        help="archive aussi les pages de l'édition dans DIR (page_store.py)")
+    args = parser.parse_args()
+
+    base_url = args.base_url or BASE_URL.format(version=args.airac)
+    downloader = Downloader(base_url, args.output, workers=args.workers, retries=args.retries,
+                            timeout=args.timeout, revalidate=not args.no_revalidate)
+
+    start = time.perf_counter()
+    pages = downloader.run()
+    print_summary(pages, time.perf_counter() - start)
+
+    incomplete = False
+    if args.store:
+        from page_store import PageStore, edition_name
+        store = PageStore(args.store)
+        edition = edition_name(args.airac)
+        failed = [f"{p.category}/{p.name}" for p in pages if p.content is None]
+        if edition in store.editions():
+            print(f"Édition {edition} déjà archivée dans {args.store}, archive inchangée")
+        elif failed:
+            # l'index d'une édition n'est jamais réécrit: une édition incomplète ne pourrait plus être complétée
+            incomplete = True
+            print(f"Édition {edition} non archivée: {len(failed)} pages en erreur ({', '.join(failed[:5])}"
+                  f"{', ...' if len(failed) > 5 else ''}), relancer le téléchargement", file=sys.stderr)
+        else:
+            stats = store.add_edition(edition, [(p.category, p.name, p.content) for p in pages if p.content is not None])
+            print(f"Édition {edition} archivée: {stats['pages']} pages, {stats['stored']} stockées, "
+                  f"{stats['shared']} reprises, {stats['added_bytes'] / 1024:.0f} Ko ajoutés")
+
+    if args.json:
+        write_json(pages, args.backend, args.json)
+
+    if incomplete:
+        sys.exit(1)
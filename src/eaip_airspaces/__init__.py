@@ -0,0 +1,21 @@
+# === Point d'entrée importable des outils eAIP ===
+#
+# Depuis un service ou un notebook (src/ dans sys.path):
+#
+#   from eaip_airspaces import Toolkit
+#   toolkit = Toolkit()                    # rien n'est chargé ici
+#   data = toolkit.parse_pages("../sample_data/")
+#   toolkit.write_kmz(data, "/tmp/out")    # contours chargés au premier appel, puis réutilisés
+#
+# Les scripts de src/ restent les points d'entrée en ligne de commande.
+# L'import du paquet ne charge ni bs4, ni requests, ni numpy: les modules
+# sont importés à la première utilisation d'un attribut.
+
+__all__ = ["Toolkit", "CATEGORIES", "DEFAULT_DATA_DIR"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from eaip_airspaces import toolkit
+        return getattr(toolkit, name)
+    raise AttributeError(f"module 'eaip_airspaces' has no attribute '{name}'")
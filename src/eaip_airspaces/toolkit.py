@@ -0,0 +1,135 @@
+import os
+import json
+import functools
+from contextlib import contextmanager
+
+import generate_json_from_eaip as eaip
+import generate_kml_from_json as kmlgen
+
+# === État réutilisable entre conversions ===
+#
+# Un Toolkit garde ses options (moteur géodésique, tolérances) et charge les
+# contours de la France et des eaux territoriales au premier besoin, une seule
+# fois pour toutes les conversions suivantes. Le cache des couches résolues,
+# s'il est demandé, reste aussi en mémoire entre deux appels.
+#
+# Les options du générateur sont des variables du module
+# generate_kml_from_json: elles sont positionnées le temps de chaque appel puis
+# restaurées. Les arcs, cercles et portions de frontière mémorisés par le module
+# ont ces options dans leur clé, et le cache des couches dans son contexte:
+# deux Toolkit aux options différentes peuvent donc coexister dans un même
+# processus (pas dans deux threads à la fois).
+#
+# Les messages de l'analyse et de la résolution (lignes ou segments non
+# reconnus, caches ignorés) passent par logging, sous les noms
+# generate_json_from_eaip et generate_kml_from_json.
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+CATEGORIES = eaip.CATEGORIES
+
+FRANCE_BORDER_FILE = "metropole-version-simplifiee.geojson"
+TERRITORIAL_WATERS_FILE = "EspMar_FR_MT_WGS84.geojson"
+
+
+class Toolkit:
+    def __init__(self, data_dir=DEFAULT_DATA_DIR, geodesic=None, chord_tolerance=None, simplify=None,
+                 cache_path=None):
+        if geodesic is not None and geodesic not in kmlgen.GEODESIC_ENGINES:
+            raise ValueError(f"Moteur géodésique inconnu: {geodesic}")
+        self.data_dir = data_dir
+        self.geodesic = geodesic or kmlgen.geodesic_engine
+        self.chord_tolerance = chord_tolerance
+        self.simplify = simplify
+        self.cache_path = cache_path
+
+    @contextmanager
+    def options(self):
+        saved = (kmlgen.geodesic_engine, kmlgen.chord_tolerance_m, kmlgen.simplify_tolerance_m)
+        kmlgen.geodesic_engine = self.geodesic
+        kmlgen.chord_tolerance_m = self.chord_tolerance
+        kmlgen.simplify_tolerance_m = self.simplify
+        try:
+            yield
+        finally:
+            kmlgen.geodesic_engine, kmlgen.chord_tolerance_m, kmlgen.simplify_tolerance_m = saved
+
+    # --- Données chargées à la demande ---
+    @functools.cached_property
+    def france_border(self):
+        return kmlgen.load_france_boundary(os.path.join(self.data_dir, FRANCE_BORDER_FILE))
+
+    @functools.cached_property
+    def territorial_waters(self):
+        return kmlgen.load_france_boundary(os.path.join(self.data_dir, TERRITORIAL_WATERS_FILE))
+
+    @functools.cached_property
+    def layer_cache(self):
+        if not self.cache_path:
+            return None
+        versions = {
+            "france": kmlgen.file_digest(os.path.join(self.data_dir, FRANCE_BORDER_FILE)),
+            "sea": kmlgen.file_digest(os.path.join(self.data_dir, TERRITORIAL_WATERS_FILE)),
+        }
+        with self.options():
+            cache = kmlgen.LayerCache(self.cache_path, versions)
+        cache.load()
+        return cache
+
+    # --- eAIP -> JSON ---
+    def parse_html(self, content, backend="html.parser"):
+        """Espaces aériens d'une page eAIP (bytes ou str); lignes non reconnues dans eaip.row_problems."""
+        return eaip.parse_html_content(content, backend)
+
+    def parse_pages(self, input_dir, backend="html.parser", workers=1, cache_path=None, report=None):
+        """Toutes les pages d'un répertoire organisé comme sample_data, au format de airspaces.json."""
+        return eaip.parse_local(input_dir, workers=workers, nb_slowest=0, backend=backend, cache_path=cache_path,
+                                report=report)
+
+    def parse_edition(self, store, edition=None, backend="html.parser", workers=1, cache_path=None, report=None):
+        """Pages d'une édition archivée par page_store.py (la plus récente par défaut)."""
+        return eaip.parse_local(workers=workers, nb_slowest=0, backend=backend, cache_path=cache_path, report=report,
+                                store=store, edition=edition)
+
+    @staticmethod
+    def load_json(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    # --- Géométrie ---
+    def resolve_layer(self, layer):
+        """(sommets, plancher, plafond) d'une couche du JSON; ValueError si elle ne peut pas être résolue.
+        Segments non reconnus de la couche dans kmlgen.coord_problems."""
+        with self.options():
+            coords, lower, upper, _ = kmlgen.resolve_layer(layer, self.france_border, self.territorial_waters,
+                                                           self.layer_cache)
+        return coords, lower, upper
+
+    def layers(self, data):
+        from airspace_query import layers_from_json
+        with self.options():
+            return layers_from_json(data, self.france_border, self.territorial_waters)
+
+    def query_index(self, data, cell_size=0.25):
+        from airspace_query import AirspaceIndex
+        return AirspaceIndex(self.layers(data), cell_size)
+
+    # --- JSON -> KMZ ---
+    def write_kmz(self, data, output_dir, compact=False, keep_kml=False, tile_size=None, workers=1, chunk=8,
+                  geometry_path=None, report=None):
+        """Écrit les KMZ global et par catégorie dans output_dir; renvoie les compteurs couches/sommets/placemarks."""
+        os.makedirs(output_dir, exist_ok=True)
+        geometry = [] if geometry_path else None
+        with self.options():
+            # compteurs propres à chaque conversion (les styles sont numérotés par catégorie)
+            kmlgen.geometry_stats.clear()
+            kmlgen.generate_kml(data, self.france_border, self.territorial_waters, output_dir=output_dir,
+                                compact=compact, keep_kml=keep_kml, report=report, geometry=geometry,
+                                tile_size=tile_size, layer_cache=self.layer_cache, workers=workers, chunk=chunk)
+            stats = dict(kmlgen.geometry_stats)
+
+        if geometry is not None:
+            from geometry_store import write_geometry
+            write_geometry(geometry_path, geometry)
+        if self.layer_cache is not None:
+            self.layer_cache.save()
+        return stats
@@ -0,0 +1,91 @@
+import os
+import argparse
+import hashlib
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# === Serveur HTTP local imitant le répertoire html/eAIP du SIA ===
+#
+# Sert les fichiers de sample_data à plat (par nom de page, quel que soit le
+# sous-répertoire) avec ETag et Last-Modified, et répond 304 aux requêtes
+# conditionnelles: permet d'essayer download_eaip.py sans accès réseau.
+#
+#   python3 eaip_stub_server.py --port 8380 &
+#   python3 download_eaip.py --base-url http://127.0.0.1:8380 --output /tmp/eaip
+
+
+def index_pages(root):
+    pages = {}
+    for dirpath, _, files in os.walk(root):
+        for f in files:
+            if f.endswith(".html") or f.endswith(".htm"):
+                pages.setdefault(f, os.path.join(dirpath, f))
+    return pages
+
+
+class EaipHandler(BaseHTTPRequestHandler):
+    pages = {}
+    # compteur propre à chaque serveur (make_server), incrémenté par tous ses threads
+    requests_lock = None
+    requests_served = 0
+
+    def do_GET(self):
+        with self.requests_lock:
+            type(self).requests_served += 1
+        name = self.path.rstrip("/").split("/")[-1]
+        path = self.pages.get(name)
+        if path is None:
+            self.send_error(404)
+            return
+
+        with open(path, "rb") as f:
+            content = f.read()
+        etag = '"{}"'.format(hashlib.sha1(content).hexdigest())
+        mtime = int(os.path.getmtime(path))
+
+        if self.not_modified(etag, mtime):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=UTF-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def not_modified(self, etag, mtime):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return if_none_match == etag
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                return mtime <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(root, host="127.0.0.1", port=0):
+    handler = type("SampleEaipHandler", (EaipHandler,), {"pages": index_pages(root), "requests_lock": threading.Lock()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur eAIP local servant sample_data")
+    parser.add_argument("--root", default="../sample_data/")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8380)
+    args = parser.parse_args()
+
+    server = make_server(args.root, args.host, args.port)
+    print(f"{len(server.RequestHandlerClass.pages)} pages servies sur http://{args.host}:{server.server_port}")
+    server.serve_forever()
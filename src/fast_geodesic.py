@@ -0,0 +1,153 @@
+import numpy as np
+
+# === Géodésiques WGS84 vectorisées (formules de Vincenty) ===
+#
+# Toutes les fonctions acceptent des tableaux de forme quelconque (diffusion
+# NumPy), ce qui permet de calculer en un seul appel tous les sommets d'un arc,
+# d'un cercle ou de plusieurs arcs mis bout à bout.
+#
+# Tolérance documentée, vérifiée par `python3 fast_geodesic.py` contre
+# geographiclib pour des rayons jusqu'à 500 km :
+#   - position des points de direct(): écart < TOLERANCE_M mètres
+#   - azimuts de inverse_azimuth(): écart < TOLERANCE_AZI_DEG degrés
+# Les formules de Vincenty divergent pour des points quasi antipodaux, cas
+# absent des espaces aériens (rayons de quelques dizaines de NM).
+
+TOLERANCE_M = 1e-3
+TOLERANCE_AZI_DEG = 1e-7
+
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+MAX_ITERATIONS = 50
+CONVERGENCE = 1e-13
+
+
+def _reduced_latitude(lat):
+    tan_u = (1 - WGS84_F) * np.tan(np.radians(lat))
+    cos_u = 1 / np.sqrt(1 + tan_u * tan_u)
+    return tan_u * cos_u, cos_u
+
+
+def _normalize_lon(lon):
+    return (lon + 180) % 360 - 180
+
+
+def direct(lat1, lon1, azi1, s12):
+    """Problème direct: point atteint depuis (lat1, lon1) selon l'azimut azi1 (degrés) et la distance s12 (mètres)."""
+    lat1, lon1, azi1, s12 = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (lat1, lon1, azi1, s12)))
+    f = WGS84_F
+
+    alpha1 = np.radians(azi1)
+    sin_alpha1 = np.sin(alpha1)
+    cos_alpha1 = np.cos(alpha1)
+
+    sin_u1, cos_u1 = _reduced_latitude(lat1)
+    sigma1 = np.arctan2(sin_u1 / cos_u1, cos_alpha1)
+    sin_alpha = cos_u1 * sin_alpha1
+    cos2_alpha = 1 - sin_alpha * sin_alpha
+    u2 = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+    big_a = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    big_b = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+
+    sigma0 = s12 / (WGS84_B * big_a)
+    sigma = sigma0
+    for _ in range(MAX_ITERATIONS):
+        cos_2sigma_m = np.cos(2 * sigma1 + sigma)
+        sin_sigma = np.sin(sigma)
+        cos_sigma = np.cos(sigma)
+        delta_sigma = big_b * sin_sigma * (cos_2sigma_m + big_b / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+            - big_b / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+        previous = sigma
+        sigma = sigma0 + delta_sigma
+        if np.all(np.abs(sigma - previous) < CONVERGENCE):
+            break
+
+    cos_2sigma_m = np.cos(2 * sigma1 + sigma)
+    sin_sigma = np.sin(sigma)
+    cos_sigma = np.cos(sigma)
+
+    x = sin_u1 * sin_sigma - cos_u1 * cos_sigma * cos_alpha1
+    lat2 = np.arctan2(sin_u1 * cos_sigma + cos_u1 * sin_sigma * cos_alpha1,
+                      (1 - f) * np.sqrt(sin_alpha * sin_alpha + x * x))
+    lam = np.arctan2(sin_sigma * sin_alpha1, cos_u1 * cos_sigma - sin_u1 * sin_sigma * cos_alpha1)
+    c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+    big_l = lam - (1 - c) * f * sin_alpha * (
+        sigma + c * sin_sigma * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+
+    return np.degrees(lat2), _normalize_lon(lon1 + np.degrees(big_l))
+
+
+def inverse_azimuth(lat1, lon1, lat2, lon2):
+    """Azimut initial (degrés, dans [0, 360[) de la géodésique de (lat1, lon1) vers (lat2, lon2)."""
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (lat1, lon1, lat2, lon2)))
+    f = WGS84_F
+
+    big_l = np.radians(_normalize_lon(lon2 - lon1))
+    sin_u1, cos_u1 = _reduced_latitude(lat1)
+    sin_u2, cos_u2 = _reduced_latitude(lat2)
+
+    lam = big_l
+    for _ in range(MAX_ITERATIONS):
+        sin_lam = np.sin(lam)
+        cos_lam = np.cos(lam)
+        sin_sigma = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+        cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+        sigma = np.arctan2(sin_sigma, cos_sigma)
+        # points confondus: sin_sigma nul, azimut arbitraire
+        safe_sin_sigma = np.where(sin_sigma == 0, 1, sin_sigma)
+        sin_alpha = cos_u1 * cos_u2 * sin_lam / safe_sin_sigma
+        cos2_alpha = 1 - sin_alpha * sin_alpha
+        safe_cos2_alpha = np.where(cos2_alpha == 0, 1, cos2_alpha)
+        cos_2sigma_m = np.where(cos2_alpha == 0, 0, cos_sigma - 2 * sin_u1 * sin_u2 / safe_cos2_alpha)
+        c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+        previous = lam
+        lam = big_l + (1 - c) * f * sin_alpha * (
+            sigma + c * sin_sigma * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+        if np.all(np.abs(lam - previous) < CONVERGENCE):
+            break
+
+    sin_lam = np.sin(lam)
+    cos_lam = np.cos(lam)
+    alpha1 = np.arctan2(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+    return np.degrees(alpha1) % 360
+
+
+# === Vérification de la tolérance contre geographiclib ===
+if __name__ == "__main__":
+    import time
+    from geographiclib.geodesic import Geodesic
+
+    g = Geodesic.WGS84
+    rng = np.random.default_rng(0)
+    n = 20000
+
+    # centres sur la zone couverte par l'eAIP France (métropole et outre-mer proches)
+    lat = rng.uniform(-25, 60, n)
+    lon = rng.uniform(-65, 60, n)
+    azi = rng.uniform(0, 360, n)
+    dist = rng.uniform(10, 500000, n)
+
+    start = time.perf_counter()
+    lat2, lon2 = direct(lat, lon, azi, dist)
+    numpy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ref = [g.Direct(*args) for args in zip(lat, lon, azi, dist)]
+    ref_time = time.perf_counter() - start
+
+    ref_lat2 = np.array([r["lat2"] for r in ref])
+    ref_lon2 = np.array([r["lon2"] for r in ref])
+    err_m = np.array([g.Inverse(a, b, c, d)["s12"] for a, b, c, d in zip(lat2, lon2, ref_lat2, ref_lon2)])
+    print(f"direct: écart max {err_m.max():.2e} m (tolérance {TOLERANCE_M:.0e} m), "
+          f"{n / numpy_time:.0f} points/s contre {n / ref_time:.0f} points/s pour geographiclib")
+
+    azi_back = inverse_azimuth(lat, lon, ref_lat2, ref_lon2)
+    ref_azi = np.array([g.Inverse(a, b, c, d)["azi1"] % 360 for a, b, c, d in zip(lat, lon, ref_lat2, ref_lon2)])
+    err_azi = np.abs((azi_back - ref_azi + 180) % 360 - 180)
+    print(f"inverse_azimuth: écart max {err_azi.max():.2e}° (tolérance {TOLERANCE_AZI_DEG:.0e}°)")
+
+    if err_m.max() > TOLERANCE_M or err_azi.max() > TOLERANCE_AZI_DEG:
+        raise SystemExit("Tolérance dépassée")
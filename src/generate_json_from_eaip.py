@@ -1,11 +1,40 @@
 import re
+import sys
 import json
+import logging
 import os
 import glob
-import requests
-from bs4 import BeautifulSoup
+import time
+import hashlib
+import argparse
+from run_report import NullReport, make_report
 from collections import defaultdict
 
+# messages de l'analyse: le script les affiche sur stdout (__main__), une bibliothèque les reçoit par logging
+log = logging.getLogger(__name__)
+
+# bs4, lxml et requests (via download_eaip) ne sont importés qu'au premier usage:
+# importer ce module ou l'utiliser sur des pages locales ne charge pas la pile HTTP
+def make_soup(markup):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(markup, "html.parser")
+
+def lxml_etree():
+    try:
+        from lxml import etree
+    except ImportError:
+        raise RuntimeError("Le backend lxml nécessite le module lxml")
+    return etree
+
+# backends d'analyse HTML disponibles, "html.parser" est la référence
+PARSER_BACKENDS = ["html.parser", "lxml"]
+
+# catégories de sample_data, dans l'ordre du JSON
+CATEGORIES = ["AD-2-AERODROMES", "ENR-2.1-FIR_UIR_TMA_CTA", "ENR-2.2-TMZ_ACC_UAC_APP_FRA_DLG_SIV", "ENR-5.1-ZI_ZR_ZD"]
+
+# à incrémenter à chaque modification de l'analyse: invalide le cache des pages
+PARSER_VERSION = "1"
+
 URLS = [
     "https://www.sia.aviation-civile.gouv.fr/media/dvd/eAIP_10_JUL_2025/FRANCE/AIRAC-2025-07-10/html/eAIP/FR-AD-2.LFBD-fr-FR.html",
     "https://www.sia.aviation-civile.gouv.fr/media/dvd/eAIP_10_JUL_2025/FRANCE/AIRAC-2025-07-10/html/eAIP/FR-ENR-2.1-fr-FR.html",
@@ -49,6 +78,9 @@ class Airspace:
     def __repr__(self):
         return str(self.to_dict())
 
+# lignes de tableau non reconnues de la dernière page analysée (vidée à chaque page)
+row_problems = []
+
 # --- Fonctions utilitaires ---
 def is_coord_format(s):
     return bool(re.search(r"\d{2}°\d{2}'\d{2}\"[NSEW]", s))
@@ -139,13 +171,42 @@ def parse_rows(rows, is_siv):
             
         else:
             #print(f"Problem parsing row with {ident_coord} {clazz} {limit}")
-            print("Problem:\n[{}]\n[{}]".format(last_ident, last_coord))
+            log.warning("Problem:\n[%s]\n[%s]", last_ident, last_coord)
+            row_problems.append(f"[{last_ident}] [{last_coord}]")
     
     airspaces.append(current_airspace)
     return airspaces
 
 
 # --- Traitement HTML ---
+def is_airspace_header(firstcol):
+    return "identification" in firstcol.lower() and "limites latérales" in firstcol.lower()
+
+def parse_table(tbl):
+    rows = tbl.find_all("tr")
+    if not rows:
+        return []
+
+    hdrcols = rows[0].find_all(["td", "th"])
+    if not hdrcols:
+        return []
+
+    firstcol = hdrcols[0].get_text(" ", strip=True)
+
+    # if TR contains corresponding header, we start processing
+    if not is_airspace_header(firstcol):
+        return []
+
+    secondcol = hdrcols[1].get_text(" ", strip=True)
+
+    # SIV table does not contain class
+    is_siv = "limites verticales" in secondcol.lower()
+
+    rows.pop(0)
+    airspaces = parse_rows(rows, is_siv)
+
+    return [a.to_dict() for a in airspaces]
+
 def parse_html_file(soup):  
 
     result = []
@@ -153,88 +214,283 @@ def parse_html_file(soup):
     # search every tables
     tables = soup.find_all("table")
 
-    
     for tbl in tables:
-        rows = tbl.find_all("tr")
-        if rows:
+        result.extend(parse_table(tbl))
 
-            hdrcols = rows[0].find_all(["td", "th"])
-            if hdrcols:
-                
-                firstcol = hdrcols[0].get_text(" ", strip=True)                
-
-                # if TR contains corresponding header, we start processing
-                if "identification" in firstcol.lower() and "limites latérales" in firstcol.lower():
-                    secondcol = hdrcols[1].get_text(" ", strip=True)
-                    
-                    # SIV table does not contain class
-                    is_siv = "limites verticales" in secondcol.lower()
-                    
-                    rows.pop(0)
-                    airspaces = parse_rows(rows, is_siv)
-                    
-                    for a in airspaces:
-                        result.append(a.to_dict())
+    return result
+
+# --- Backend lxml: seules les tables d'espaces sont converties en BeautifulSoup ---
+def lxml_text(elem):
+    # équivalent de get_text(" ", strip=True)
+    return " ".join(t.strip() for t in elem.itertext() if t.strip())
+
+def parse_html_lxml(content):
+    # lxml refuse une chaîne str qui porte une déclaration d'encodage
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    etree = lxml_etree()
+    parser = etree.HTMLParser(encoding="utf-8")
+    root = etree.fromstring(content, parser)
+    if root is None:
+        return []
+
+    result = []
+    for tbl in root.iter("table"):
+        first_row = next(tbl.iter("tr"), None)
+        if first_row is None:
+            continue
+
+        hdrcols = list(first_row.iter("td", "th"))
+        if not hdrcols or not is_airspace_header(lxml_text(hdrcols[0])):
+            continue
+
+        table_html = etree.tostring(tbl, encoding="unicode", method="html", with_tail=False)
+        soup = make_soup(table_html)
+        result.extend(parse_table(soup.table))
 
     return result
 
-# === Point d’entrée ===
-def main_local():
+def parse_html_content(content, backend="html.parser"):
+    del row_problems[:]
+    if backend == "html.parser":
+        return parse_html_file(make_soup(content))
+    if backend == "lxml":
+        return parse_html_lxml(content)
+    raise ValueError(f"Backend inconnu: {backend}")
+
+# --- Cache des pages analysées, indexé par empreinte du contenu ---
+class PageCache:
+    def __init__(self, path, max_entries=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = {}
+        self.run = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning("Cache illisible, ignoré: %s (%s)", self.path, e)
+            return
+        if data.get("version") != PARSER_VERSION:
+            log.warning("Cache d'une autre version de l'analyseur, ignoré: %s", self.path)
+            return
+        self.entries = data["entries"]
+        self.run = data["run"]
+
+    @staticmethod
+    def digest(content, backend):
+        # les backends doivent donner le même résultat, mais une page n'est reprise que pour celui qui l'a analysée
+        return hashlib.sha256(f"{PARSER_VERSION}\0{backend}\0".encode() + content).hexdigest()
+
+    def get(self, digest, page):
+        entry = self.entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry["page"] = page
+        entry["used"] = self.run + 1
+        return entry["airspaces"]
+
+    def put(self, digest, page, airspaces):
+        self.entries[digest] = {"page": page, "used": self.run + 1, "airspaces": airspaces}
+
+    def evict(self, live_pages):
+        # les entrées qui n'ont pas servi à cette exécution (pages disparues, modifiées, autre backend) partent
+        stale = [d for d, e in self.entries.items() if e["used"] <= self.run or e["page"] not in live_pages]
+        for d in stale:
+            del self.entries[d]
+        # au-delà de max_entries, les moins récemment utilisées
+        if len(self.entries) > self.max_entries:
+            for d in sorted(self.entries, key=lambda d: self.entries[d]["used"])[:len(self.entries) - self.max_entries]:
+                del self.entries[d]
+                stale.append(d)
+        self.evicted += len(stale)
+
+    def save(self, live_pages):
+        self.evict(live_pages)
+        self.run += 1
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": PARSER_VERSION, "run": self.run, "entries": self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0
+        return (f"Cache: {self.hits} pages réutilisées, {self.misses} analysées ({rate:.0f}% de succès), "
+                f"{self.evicted} entrées évincées, {len(self.entries)} en cache")
+
+# === Analyse d'une page (exécutable dans un processus fils) ===
+# source: contenu déjà lu, chemin d'un fichier HTML ou page_store.PageRef dans une archive d'édition
+def read_source(source):
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read()
+    from page_store import read_page
+    return read_page(source)
+
+def parse_page(source, backend="html.parser"):
+    start = time.perf_counter()
+    airspaces = parse_html_content(read_source(source), backend)
+    return airspaces, time.perf_counter() - start, list(row_problems)
+
+def print_timings(timings, nb_slowest):
+    if nb_slowest <= 0 or not timings:
+        return
+    total = sum(t for _, t in timings)
+    log.info("Temps d'analyse cumulé: %.2fs sur %d pages", total, len(timings))
+    log.info("Pages les plus lentes:")
+    for key, t in sorted(timings, key=lambda kt: kt[1], reverse=True)[:nb_slowest]:
+        log.info(" - %8.3fs %s", t, key)
+
+# === Analyse de toutes les pages d'un répertoire au format de sample_data ===
+def parse_local(input_dir="../sample_data/", workers=None, nb_slowest=10, backend="html.parser", cache_path=None,
+                cache_size=1000, report=None, store=None, edition=None):
     final_data = defaultdict(list)
+    report = report or NullReport()
     
     # --- Recherche de tous les fichiers HTML dans sample_data ---
-    input_dir = "../sample_data/"
-    cat_list = ["AD-2-AERODROMES", "ENR-2.1-FIR_UIR_TMA_CTA", "ENR-2.2-TMZ_ACC_UAC_APP_FRA_DLG_SIV", "ENR-5.1-ZI_ZR_ZD"]
-                      
-    input_files_old = [
-        os.path.join(input_dir, f)
-        for f in os.listdir(input_dir)
-        if f.endswith(".html") or f.endswith(".htm")
-    ]
+    cat_list = CATEGORIES
+
+    # liste ordonnée des pages, l'ordre de sortie du JSON en dépend
+    jobs = []
+    with report.stage("scan"):
+        # archive d'une édition (page_store.py) au lieu du répertoire
+        if store is not None:
+            from page_store import PageStore
+            jobs = PageStore(store).pages(edition, cat_list)
+            for cat in sorted(set(cat_list) - {cat for cat, _, _ in jobs}):
+                log.warning("Catégorie absente de l'archive: %s", cat)
+                report.problem("missing_category", cat)
+        else:
+            for cat in cat_list:
+                cat_dir = os.path.join(input_dir, cat)
+                if not os.path.isdir(cat_dir):
+                    log.warning("Répertoire absent: %s", cat_dir)
+                    report.problem("missing_category", cat_dir)
+                    continue
+
+                for filepath in os.listdir(cat_dir):
+                    if filepath.endswith(".html") or filepath.endswith(".htm"):
+                        key = os.path.basename(filepath)
+                        jobs.append((cat, key, os.path.join(cat_dir, filepath)))
 
+    start = time.perf_counter()
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # --- Pages inchangées reprises du cache ---
+    cache = None
+    results = [None] * len(jobs)
+    digests = [None] * len(jobs)
+    sources = [source for _, _, source in jobs]
+    if cache_path:
+        with report.stage("cache lookup"):
+            cache = PageCache(cache_path, cache_size)
+            cache.load()
+            for i, (cat, key, source) in enumerate(jobs):
+                content = read_source(source)
+                digests[i] = PageCache.digest(content, backend)
+                airspaces = cache.get(digests[i], f"{cat}/{key}")
+                if airspaces is not None:
+                    results[i] = (airspaces, None, None)
+                else:
+                    # page à analyser: son contenu déjà lu est passé à l'analyse au lieu d'être relu
+                    sources[i] = content
+
+    todo = [i for i, r in enumerate(results) if r is None]
+    pending = [sources[i] for i in todo]
+
+    with report.stage("parse"), report.profiled():
+        if workers <= 1:
+            parsed = [parse_page(source, backend) for source in pending]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            # map() restitue les résultats dans l'ordre de soumission
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parsed = list(executor.map(parse_page, pending, [backend] * len(pending)))
+
+    for i, result in zip(todo, parsed):
+        results[i] = result
+        if cache is not None:
+            cat, key, _ = jobs[i]
+            cache.put(digests[i], f"{cat}/{key}", result[0])
+
+    timings = []
     for cat in cat_list:
-        cat_data = defaultdict(list)        
-        cat_dir = os.path.join(input_dir, cat)
-        
-        for filepath in os.listdir(cat_dir):
-            if filepath.endswith(".html") or filepath.endswith(".htm"):
-                key = os.path.basename(filepath)
-                
-                fullpath = os.path.join(cat_dir, filepath)
+        final_data[cat] = defaultdict(list)
+
+    for (cat, key, _), (airspaces, elapsed, problems) in zip(jobs, results):
+        if elapsed is not None:
+            timings.append((f"{cat}/{key}", elapsed))
+        if airspaces:
+            final_data[cat][key] = airspaces
 
-                airspaces = None
-                with open(fullpath, encoding="utf-8") as f:
-                    soup = BeautifulSoup(f, "html.parser")
-                    airspaces = parse_html_file(soup)
+        nb_layers = sum(len(a["layers"]) for a in airspaces)
+        report.record("pages", page=f"{cat}/{key}", cached=elapsed is None, seconds=elapsed,
+                      airspaces=len(airspaces), layers=nb_layers,
+                      problems=None if problems is None else len(problems))
+        report.count("pages.cached" if elapsed is None else "pages.parsed")
+        report.count("airspaces", len(airspaces))
+        report.count("layers", nb_layers)
+        for problem in problems or []:
+            report.problem("row", f"{cat}/{key}: {problem}")
 
-                if airspaces:
-                    cat_data[key] = airspaces
-        
-        final_data[cat] = cat_data
+    log.info("%d pages analysées sur %d en %.2fs avec %d processus", len(pending), len(jobs), time.perf_counter() - start,
+             workers)
+    print_timings(timings, nb_slowest)
 
+    if cache is not None:
+        cache.save({f"{cat}/{key}" for cat, key, _ in jobs})
+        log.info(cache.summary())
+
+    return final_data
+
+# === Point d’entrée ===
+def main_local(workers=None, nb_slowest=10, backend="html.parser", cache_path=None, cache_size=1000, report=None,
+               store=None, edition=None):
+    report = report or NullReport()
+    final_data = parse_local(workers=workers, nb_slowest=nb_slowest, backend=backend, cache_path=cache_path,
+                             cache_size=cache_size, report=report, store=store, edition=edition)
 
     # --- Sauvegarde ---
-    with open("../extracts/airspaces.json", "w", encoding="utf-8") as f:
-        json.dump(final_data, f, indent=2, ensure_ascii=False)
+    with report.stage("save"):
+        with open("../extracts/airspaces.json", "w", encoding="utf-8") as f:
+            json.dump(final_data, f, indent=2, ensure_ascii=False)
 
     print("Fichier airspaces.json généré avec tous les fichiers de sample_data.")
+    report.save()
 
 # === Point d’entrée ===
-def main_remote():
+def main_remote(backend="html.parser"):
     final_data = defaultdict(list)
     
+    from download_eaip import make_session
+
     # --- Telechargements des pages web eAIP ---
+    session = make_session()
     for url in URLS:
         key = url.rstrip('/').split('/')[-1]
     
         print(f"Analyse de {url}")
-        resp = requests.get(url)
+        resp = session.get(url)
         if resp.status_code != 200:
             print(f"Erreur HTTP {resp.status_code} pour {url}")
             continue
             
-        soup = BeautifulSoup(resp.content, 'html.parser')
-        airspaces = parse_html_file(soup)
+        airspaces = parse_html_content(resp.content, backend)
 
         if airspaces:
             final_data[key] = airspaces
@@ -247,4 +503,29 @@ def main_remote():
 
 # === Lancement ===
 if __name__ == "__main__":
-    main_local()
+    parser = argparse.ArgumentParser(description="Extraction des espaces aériens de l'eAIP en JSON")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="nombre de processus d'analyse (1 = séquentiel, défaut: nombre de coeurs)")
+    parser.add_argument("--timings", type=int, default=10, metavar="N",
+                        help="affiche les N pages les plus lentes (0 pour désactiver)")
+    parser.add_argument("--backend", choices=PARSER_BACKENDS, default="html.parser",
+                        help="analyseur HTML (lxml ne construit que les tables d'espaces)")
+    parser.add_argument("--cache", default="../cache/eaip_pages.json",
+                        help="fichier de cache des pages analysées, indexé par empreinte du contenu")
+    parser.add_argument("--cache-size", type=int, default=1000,
+                        help="nombre maximal d'entrées conservées dans le cache")
+    parser.add_argument("--no-cache", action="store_true", help="analyse toutes les pages sans cache")
+    parser.add_argument("--store", nargs="?", const="../store/", metavar="DIR",
+                        help="lit les pages dans les archives d'édition de page_store.py au lieu de sample_data")
+    parser.add_argument("--edition", help="édition lue avec --store (la plus récente par défaut)")
+    parser.add_argument("--profile", nargs="?", const="../reports/eaip_run_report.json", metavar="PATH",
+                        help="écrit un rapport JSON des durées et compteurs de l'exécution")
+    parser.add_argument("--cprofile", metavar="PATH",
+                        help="écrit un profil cProfile de l'analyse des pages (à utiliser avec -j 1)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
+    report = make_report("eaip", args.profile, args.cprofile)
+    main_local(workers=args.workers, nb_slowest=args.timings, backend=args.backend,
+               cache_path=None if args.no_cache else args.cache, cache_size=args.cache_size, report=report,
+               store=args.store, edition=args.edition)
@@ -1,157 +1,283 @@
+import os
 import re
-import simplekml
-import zipfile
+import sys
 import json
+import logging
+import hashlib
+import importlib.util
+import argparse
+import functools
+import itertools
+import time
+import math
+from collections import Counter
 from geographiclib.geodesic import Geodesic
+from border_index import BorderIndex
+from kml_stream import KML_HEADER, KML_FOOTER, KmlStreamWriter, TiledKmzWriter, kml_name
+from run_report import NullReport, RecordingReport, make_report, replay
+from geometry_store import write_geometry
+from simplify import simplify_border_walk, restore_crossing_spans
+from coord_parser import (CACHE_SIZE, Arc, Border, Circle, Point, cached_dms_to_decimal, cached_parse_coord_pair,
+                          compile_coords, convert_dist_to_nm, normalize_pair, parse_coord_pair)
+
+# messages des fonctions de résolution: le script les affiche sur stdout (main), une bibliothèque les
+# reçoit par logging
+log = logging.getLogger(__name__)
+
+# numpy et fast_geodesic ne sont importés qu'au premier calcul géodésique (voir load_fast_geodesic)
+np = None
+fast_geodesic = None
 
 # === Pré-compilation des expressions régulières ===
-re_dms = re.compile(r"(\d+)°(\d+)'(\d+)(?:\"|')?([NSEW])")
-re_arc = re.compile(r"arc (anti-)?horaire de (\d+(?:\.\d+)?)\s*(NM|km|m) de rayon centré sur (.+?)\s*,\s*([0-9°'\"]+[NEWS])(?:\s*\(.*\))?\s*$")
-re_circle = re.compile(r"cercle de (\d+(?:\.\d+)?)\s*(NM|km|m) de rayon centré sur (.+?)\s*,\s*([0-9°'\"]+[NEWS]).*$")
 re_fl = re.compile(r"FL\s*(\d+)")
 re_ft = re.compile(r"(\d+)\s*ft\s*")
 
-# === Conversion DMS => décimal ===
-def dms_to_decimal(dms_str):
-    match = re_dms.match(dms_str.strip())
-    if not match:
-        raise ValueError(f"Invalid DMS format: {dms_str}")
-    deg, minute, sec, hemi = match.groups()
-    decimal = int(deg) + int(minute) / 60 + int(sec) / 3600
-    if hemi in ['S', 'W']:
-        decimal = -decimal
-    return decimal
-
-def parse_coord_pair(pair_str):
-    try:
-        lat_str, lon_str = [s.strip() for s in pair_str.split(',')]
-        lat = dms_to_decimal(lat_str)
-        lon = dms_to_decimal(lon_str)
-        return (lat, lon)
-    except Exception as e:
-        raise ValueError(f"Invalid coordinate pair: {pair_str} ({e})")
-
-
-# === Arc de cercle ===
-def generate_arc_points(start_str, center_str, end_str, radius_nm, max_circle_points=20, clockwise=True):
-    radius_m = radius_nm * 1852
-    start_lat, start_lon = parse_coord_pair(start_str)
-    center_lat, center_lon = parse_coord_pair(center_str)
-    end_lat, end_lon = parse_coord_pair(end_str)
-    g = Geodesic.WGS84
-    azi_start = g.Inverse(center_lat, center_lon, start_lat, start_lon)["azi1"] % 360
-    azi_end = g.Inverse(center_lat, center_lon, end_lat, end_lon)["azi1"] % 360
-
+# === Moteur géodésique ===
+# "numpy": calcul vectorisé (fast_geodesic), tous les sommets d'un ou plusieurs arcs en un appel
+# "geographiclib": calcul point par point, conservé comme référence
+GEODESIC_ENGINES = ["numpy", "geographiclib"]
+geodesic_engine = "numpy" if importlib.util.find_spec("numpy") is not None else "geographiclib"
+
+def load_fast_geodesic():
+    global np, fast_geodesic
+    if fast_geodesic is None:
+        import numpy
+        import fast_geodesic as module
+        np, fast_geodesic = numpy, module
+    return fast_geodesic
+
+# pas d'azimut et nombre de segments d'un arc: avec --chord-tolerance (round_up), le nombre de
+# segments est arrondi au supérieur pour que l'angle de chaque corde ne dépasse jamais
+# 360 / max_circle_points; sans tolérance il reste arrondi au plus proche (sortie
+# historique). Le dernier sommet (segments pas depuis le départ) tombe exactement sur
+# la fin de l'arc
+def arc_sweep(azi_start, azi_end, max_circle_points, clockwise, round_up=False):
     if clockwise:
         sweep = (azi_end - azi_start) % 360
-        if sweep == 0:
-            sweep = 360
-        azi_step = sweep / max(1, round(max_circle_points * sweep / 360))
     else:
         sweep = (azi_start - azi_end) % 360
-        if sweep == 0:
-            sweep = 360
-        azi_step = -sweep / max(1, round(max_circle_points * sweep / 360))
+    if sweep == 0:
+        sweep = 360
+
+    if round_up:
+        segments = max(1, math.ceil(max_circle_points * sweep / 360 - 1e-9))
+    else:
+        segments = max(1, round(max_circle_points * sweep / 360))
+    azi_step = sweep / segments if clockwise else -sweep / segments
+    return azi_step, segments
+
+# === Densité des arcs et cercles ===
+# None: 20 points par tour quel que soit le rayon (comportement historique)
+# sinon: écart maximal en mètres entre la corde et l'arc, le nombre de points dépend du rayon
+DEFAULT_CIRCLE_POINTS = 20
+MIN_CIRCLE_POINTS = 8
+MAX_CIRCLE_POINTS = 720
+chord_tolerance_m = None
+
+# tolérance de simplification des portions de frontière (mètres), None pour ne pas simplifier
+simplify_tolerance_m = None
+
+def circle_points(radius_nm):
+    if chord_tolerance_m is None:
+        return DEFAULT_CIRCLE_POINTS
+    radius_m = radius_nm * 1852
+    if radius_m <= chord_tolerance_m:
+        return MIN_CIRCLE_POINTS
+    # flèche d'une corde d'angle a: R * (1 - cos(a / 2))
+    max_angle = 2 * math.acos(1 - chord_tolerance_m / radius_m)
+    return max(MIN_CIRCLE_POINTS, min(MAX_CIRCLE_POINTS, math.ceil(2 * math.pi / max_angle)))
+
+# (lat, lon) déjà résolu par coord_parser, ou chaîne DMS "lat,lon"
+def as_point(p):
+    return p if isinstance(p, tuple) else parse_coord_pair(p)
+
+def point_key(p):
+    return p if isinstance(p, tuple) else normalize_pair(p)
+
+# === Arcs de cercle, calculés ensemble ===
+# arcs: liste de (start, center, end, radius_nm, clockwise), points en (lat, lon) ou en chaînes DMS
+def generate_arcs(arcs, max_circle_points=20, round_up=False):
+    if not arcs:
+        return []
+
+    starts = [as_point(a[0]) for a in arcs]
+    centers = [as_point(a[1]) for a in arcs]
+    ends = [as_point(a[2]) for a in arcs]
+
+    if geodesic_engine == "numpy":
+        load_fast_geodesic()
+        center_lat = np.array([c[0] for c in centers])
+        center_lon = np.array([c[1] for c in centers])
+        azi_starts = fast_geodesic.inverse_azimuth(center_lat, center_lon, [p[0] for p in starts], [p[1] for p in starts])
+        azi_ends = fast_geodesic.inverse_azimuth(center_lat, center_lon, [p[0] for p in ends], [p[1] for p in ends])
+    else:
+        g = Geodesic.WGS84
+        azi_starts = [g.Inverse(c[0], c[1], p[0], p[1])["azi1"] % 360 for c, p in zip(centers, starts)]
+        azi_ends = [g.Inverse(c[0], c[1], p[0], p[1])["azi1"] % 360 for c, p in zip(centers, ends)]
+
+    sweeps = [arc_sweep(float(azi_starts[k]), float(azi_ends[k]), max_circle_points, arcs[k][4], round_up) for k in range(len(arcs))]
+
+    # sommets de tous les arcs: (centre, azimut, rayon)
+    vertices = []
+    for k, (azi_step, segments) in enumerate(sweeps):
+        radius_m = arcs[k][3] * 1852
+        for i in range(segments + 1):
+            vertices.append((centers[k][0], centers[k][1], (float(azi_starts[k]) + i * azi_step) % 360, radius_m))
+
+    points = geodesic_direct(vertices)
+
+    result = []
+    offset = 0
+    for azi_step, segments in sweeps:
+        result.append(points[offset:offset + segments + 1])
+        offset += segments + 1
+    return result
 
-    num_points = max(2, round(max_circle_points * sweep / 360))
+def geodesic_direct(vertices):
+    if geodesic_engine == "numpy":
+        load_fast_geodesic()
+        lat, lon, azi, dist = (np.array(v) for v in zip(*vertices))
+        lat2, lon2 = fast_geodesic.direct(lat, lon, azi, dist)
+        return list(zip(lat2.tolist(), lon2.tolist()))
 
-    arc_points = []
-    for i in range(num_points + 1):
-        azi = (azi_start + i * azi_step) % 360
-        pos = g.Direct(center_lat, center_lon, azi, radius_m)
-        arc_points.append((pos["lat2"], pos["lon2"]))
+    g = Geodesic.WGS84
+    points = []
+    for lat, lon, azi, dist in vertices:
+        pos = g.Direct(lat, lon, azi, dist)
+        points.append((pos["lat2"], pos["lon2"]))
+    return points
 
-    return arc_points
+# === Arc de cercle ===
+def generate_arc_points(start, center, end, radius_nm, max_circle_points=20, clockwise=True):
+    key = (point_key(start), point_key(center), point_key(end))
+    return list(cached_arc_points(*key, radius_nm, max_circle_points, clockwise, geodesic_engine, chord_tolerance_m))
+
+# toutes les options qui changent le résultat font partie de la clé: le cache survit à leur changement
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def cached_arc_points(start, center, end, radius_nm, max_circle_points, clockwise, engine, chord_tolerance):
+    return tuple(generate_arcs([(start, center, end, radius_nm, clockwise)], max_circle_points,
+                               round_up=chord_tolerance is not None)[0])
 
 # === Cercle complet ===
-def generate_circle(center_str, radius_nm, total_points=20):
+def generate_circle(center, radius_nm, total_points=20):
+    return list(cached_circle(point_key(center), radius_nm, total_points, geodesic_engine))
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def cached_circle(center, radius_nm, total_points, engine):
     radius_m = radius_nm * 1852
-    center_lat, center_lon = parse_coord_pair(center_str)
-    g = Geodesic.WGS84
-    circle = []
-    for i in range(total_points):
-        azi = (360 * i) / total_points
-        pos = g.Direct(center_lat, center_lon, azi, radius_m)
-        circle.append((pos["lat2"], pos["lon2"]))
+    center_lat, center_lon = as_point(center)
+    circle = geodesic_direct([(center_lat, center_lon, (360 * i) / total_points, radius_m) for i in range(total_points)])
     circle.append(circle[0])
-    return circle
+    return tuple(circle)
+
+def memo_caches():
+    return [
+        ("dms_to_decimal", cached_dms_to_decimal),
+        ("parse_coord_pair", cached_parse_coord_pair),
+        ("generate_arc_points", cached_arc_points),
+        ("generate_circle", cached_circle),
+        ("simplified_border_points", cached_border_span),
+    ]
+
+def memo_counts():
+    """{nom: (succès, échecs)} des caches de ce processus depuis son lancement."""
+    return {name: (fn.cache_info().hits, fn.cache_info().misses) for name, fn in memo_caches()}
+
+# succès et échecs des caches dans les processus fils (-j N), remontés par chaque job
+worker_memo_counts = Counter()
+
+def print_cache_stats():
+    for name, fn in memo_caches():
+        info = fn.cache_info()
+        hits = info.hits + worker_memo_counts[name, "hits"]
+        total = hits + info.misses + worker_memo_counts[name, "misses"]
+        rate = 100 * hits / total if total else 0
+        if worker_memo_counts:
+            # chaque processus a ses propres caches: leur taille n'a pas de total significatif
+            print(f"Cache {name}: {hits}/{total} ({rate:.0f}%), tous processus")
+        else:
+            print(f"Cache {name}: {hits}/{total} ({rate:.0f}%), {info.currsize}/{info.maxsize} entrées")
 
 
 # === Extraction portion de frontière ===
 def extract_border_points(border, start, end):
-    def dist(a, b):
-        return (a[0]-b[0])**2 + (a[1]-b[1])**2
-        
-    n = len(border)
-    i0 = min(range(n), key=lambda i: dist(border[i], start))
-    i1 = min(range(n), key=lambda i: dist(border[i], end))
-    
-    dist_cw = (i1 - i0) % n
-    dist_ccw = (i0 - i1) % n
-    if dist_cw <= dist_ccw:
-        indices = [(i0 + k) % n for k in range(dist_cw + 1)]
-    else:
-        indices = [(i0 - k) % n for k in range(dist_ccw + 1)]
-    return [border[i] for i in indices]
-
-def convert_dist_to_nm(dist, unit):
-    result = None
-    if unit == "NM":
-        result = dist
-    elif unit == "km":
-        result = dist / 1.852
-    elif unit == "m":
-        result = dist / 1852
-    else:
-        raise ValueError(f"Unknown unit : {unit}")
-    return result
-                
+    return border.walk(*border_ends(border, start, end))
+
+# sommets de la frontière les plus proches de start et end, sur un même anneau
+def border_ends(border, start, end):
+    i0 = border.nearest(start)
+    i1 = border.nearest(end)
+
+    # les deux extrémités doivent être sur le même anneau: on garde celui qui en est le plus proche
+    r0 = border.ring_of(i0)
+    r1 = border.ring_of(i1)
+    if r0 != r1:
+        j1 = border.nearest(end, ring=r0)
+        j0 = border.nearest(start, ring=r1)
+        if border.distance2(i0, start) + border.distance2(j1, end) <= border.distance2(j0, start) + border.distance2(i1, end):
+            i1 = j1
+        else:
+            i0 = j0
+
+    return i0, i1
+
+# === Portion de frontière simplifiée ===
+# Une portion (même frontière entre les mêmes points publiés) est simplifiée
+# une fois, dans un seul sens, et reprise par toutes les couches qui la
+# suivent: les zones voisines partagent exactement la même limite. Elle va du
+# point de départ au point d'arrivée, tous deux compris.
+def simplified_border_points(border, start, end, tolerance_m):
+    if start <= end:
+        return list(cached_border_span(border, start, end, tolerance_m))
+    return list(reversed(cached_border_span(border, end, start, tolerance_m)))
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def cached_border_span(border, start, end, tolerance_m):
+    i0, i1 = border_ends(border, start, end)
+    return tuple(simplify_border_walk(border, start, end, i0, i1, tolerance_m))
+
+# segments de coordonnées non reconnus de la dernière couche traitée (vidée à chaque couche)
+coord_problems = []
+
+# sommets et placemarks écrits depuis le lancement, pour comparer les modes de densification
+geometry_stats = Counter()
+
 # === Parsing des coordonnées avec arcs, cercles et frontière ===
 def parse_polygon_coords(coord_string, france_border, sea_border):
-    segments = re.split(r"\s-\s", coord_string)
+    del coord_problems[:]
+    program = compile_coords(coord_string)
+    for problem in program.problems:
+        log.warning("Probleme avec %s", problem.segment)
+        coord_problems.append(problem.segment)
+    return resolve_program(program, france_border, sea_border)
+
+# === Résolution d'un programme de coord_parser en sommets ===
+def resolve_program(program, france_border, sea_border):
+    borders = {"france": france_border, "sea": sea_border}
     coords = []
-    i = 0
-    while i < len(segments):
-        segment = segments[i]
-        arc_match = re_arc.match(segment)
-        circle_match = re_circle.match(segment)
-        if arc_match and i > 0 and i < len(segments) - 1:
-            is_clockwise = arc_match.group(1) is None
-            raw_radius = float(arc_match.group(2))
-            unit = arc_match.group(3)
-            radius = convert_dist_to_nm(raw_radius, unit)
-            center_lat = arc_match.group(4)
-            center_lon = arc_match.group(5)
-            prev_point = segments[i - 1]
-            next_point = segments[i + 1]
-            arc_pts = generate_arc_points(prev_point, f"{center_lat},{center_lon}", next_point, radius, clockwise=is_clockwise)
-            coords.extend(arc_pts)
-            i += 2
-        elif circle_match:
-            raw_radius = float(circle_match.group(1))
-            unit = circle_match.group(2)           
-            radius = convert_dist_to_nm(raw_radius, unit)
-            center_lat = circle_match.group(3)
-            center_lon = circle_match.group(4)
-            coords.extend(generate_circle(f"{center_lat},{center_lon}", radius))
-            i += 1
-        elif ("frontière" in segment.lower() or "la côte atlantique" in segment.lower()) and i > 0 and i < len(segments) - 1:
-            start = parse_coord_pair(segments[i - 1])
-            end = parse_coord_pair(segments[i + 1])
-            coords.extend(extract_border_points(france_border, start, end))
-            i += 2
-        elif "eaux territoriales" in segment.lower() and i > 0 and i < len(segments) - 1:
-            start = parse_coord_pair(segments[i - 1])
-            end = parse_coord_pair(segments[i + 1])
-            coords.extend(extract_border_points(sea_border, start, end))
-            i += 2
-        else:
-            try:
-                coords.append(parse_coord_pair(segment))
-            except Exception:
-                print(f"Probleme avec {segment}")
-                pass
-            i += 1
+    # portions de frontière simplifiées: (début, fin dans coords, sommets d'origine)
+    border_spans = []
+    for op in program.ops:
+        if isinstance(op, Point):
+            coords.append(op.point)
+        elif isinstance(op, Arc):
+            coords.extend(generate_arc_points(op.start, op.center, op.end, op.radius_nm,
+                                              max_circle_points=circle_points(op.radius_nm), clockwise=op.clockwise))
+        elif isinstance(op, Circle):
+            coords.extend(generate_circle(op.center, op.radius_nm, total_points=circle_points(op.radius_nm)))
+        elif isinstance(op, Border):
+            border = borders[op.border]
+            walk = border.walk(*border_ends(border, op.start, op.end))
+            if simplify_tolerance_m is None:
+                coords.extend(walk)
+            else:
+                # les points publiés encadrent la portion partagée mais restent hors de la couche, comme sans simplification
+                span_start = len(coords)
+                coords.extend(simplified_border_points(border, op.start, op.end, simplify_tolerance_m)[1:-1])
+                border_spans.append((span_start, len(coords) - 1, walk))
+
+    if border_spans:
+        coords = restore_crossing_spans(coords, border_spans)
     return coords
 
 
@@ -202,68 +328,112 @@ def parse_vertical_limits(limits_str):
     raise ValueError(f"Invalid vertical limits format: {limits_str}")
 
 
+# couleurs KML aabbggrr, valeurs de simplekml.Color (purple, green, blue, gray, red, orange, yellow, white)
+CLASS_COLORS = {
+    "C": "ff800080",
+    "D": "ff008000",
+    "E": "ffff0000",
+    "G": "ff808080",
+    
+    "ZI": "ff0000ff",
+    "ZD": "ff00a5ff",
+    "ZR": "ff00ffff",
+}
+DEFAULT_COLOR = "ffffffff"
+
 def class_color(airspace_class):
-    colors = {
-        "C": simplekml.Color.purple,
-        "D": simplekml.Color.green,
-        "E": simplekml.Color.blue,
-        "G": simplekml.Color.gray,
-        
-        "ZI": simplekml.Color.red,
-        "ZD": simplekml.Color.orange,
-        "ZR": simplekml.Color.yellow,
-    }
-    return colors.get(airspace_class.upper(), simplekml.Color.white)
+    return CLASS_COLORS.get(airspace_class.upper(), DEFAULT_COLOR)
 
+def with_alpha(alpha, color):
+    return f"{alpha:02x}{color[2:]}"
 
-def add_zone_to_kml(kml_folder, polygon_coords, lower_alt, upper_alt, name, airspace_class):   
-    style = simplekml.Style()
-    style.polystyle.color = simplekml.Color.changealphaint(100, class_color(airspace_class))
+# === Styles partagés par classe (mode compact) ===
+def class_style_id(airspace_class):
+    airspace_class = airspace_class.upper()
+    return f"class_{airspace_class}" if airspace_class in CLASS_COLORS else "class_other"
 
-    # Contour haut (plafond)
-    pol_top = kml_folder.newpolygon(name=f"{name} upper")
-    pol_top.outerboundaryis = [(lon, lat, upper_alt) for lat, lon in polygon_coords]
-    pol_top.altitudemode = simplekml.AltitudeMode.absolute
-    pol_top.style = style
-    
-    # Contour bas (plancher), ici avec transparence
-    pol_bottom = kml_folder.newpolygon(name=f"{name} lower")
-    pol_bottom.outerboundaryis = [(lon, lat, lower_alt) for lat, lon in polygon_coords]
-    pol_bottom.altitudemode = simplekml.AltitudeMode.absolute
-    pol_bottom.style = style
+def class_styles():
+    styles = [(class_style_id(c), class_color(c)) for c in CLASS_COLORS]
+    styles.append((class_style_id(""), class_color("")))
+    return "".join(
+        f'<Style id="{style_id}"><PolyStyle><color>{with_alpha(100, color)}</color></PolyStyle></Style>'
+        for style_id, color in styles)
 
-    # Faces verticales pour fermer le volume
-    wall_folder = kml_folder.newfolder(name="wall")
-    
+
+# styles zone_<catégorie>_N, numérotés à partir de 1 dans chaque catégorie: le KMZ d'une
+# catégorie ne dépend pas des autres et reste identique quand il est conservé par le cache
+style_prefix = "zone_"
+style_ids = itertools.count(1)
+
+def start_style_numbering(cat):
+    global style_prefix, style_ids
+    style_prefix = f"zone_{cat}_"
+    style_ids = itertools.count(1)
+
+def kml_coordinates(coords):
+    return " ".join(f"{lon},{lat},{alt}" for lon, lat, alt in coords)
+
+def kml_polygon(name, coords, style_id, extrude=None):
+    return f"<Placemark>{kml_name(name)}<styleUrl>#{style_id}</styleUrl>{kml_geometry(coords, extrude)}</Placemark>"
+
+def kml_geometry(coords, extrude=None):
+    extrude_str = "" if extrude is None else f"<extrude>{extrude}</extrude>"
+    return (f"<Polygon>{extrude_str}<altitudeMode>absolute</altitudeMode>"
+            f"<outerBoundaryIs><LinearRing><coordinates>{kml_coordinates(coords)}</coordinates></LinearRing></outerBoundaryIs>"
+            f"</Polygon>")
+
+def wall_coords(polygon_coords, lower_alt, upper_alt):
     # Bugfix to prevent Shapely to throw A LinearRing must have at least 3 coordinate tuples error 
     epsilon = 1e-4
     
     nb_pts = len(polygon_coords)    
     for i in range(nb_pts):
         next_i = (i + 1) % nb_pts
-        ls = wall_folder.newpolygon(name=f"{name} side {i}")
         
         upper_left = (polygon_coords[i][1]+epsilon, polygon_coords[i][0]+epsilon, upper_alt)
         upper_right = (polygon_coords[next_i][1], polygon_coords[next_i][0], upper_alt)
         lower_right = (polygon_coords[next_i][1]+epsilon, polygon_coords[next_i][0]+epsilon, lower_alt)
         lower_left = (polygon_coords[i][1], polygon_coords[i][0], lower_alt)
         
-        ls.outerboundaryis = [
+        yield [
             lower_left,
             lower_right,
             upper_right,
             upper_left,
         ]
-        ls.altitudemode = simplekml.AltitudeMode.absolute
-        ls.extrude = 0
-        ls.style = style
+
+# Volume complet (plafond, plancher et faces) dans un seul placemark, style partagé par classe
+def add_volume_to_kml(kml_buffer, polygon_coords, lower_alt, upper_alt, name, airspace_class):
+    kml_buffer.append(f"<Placemark>{kml_name(name)}<styleUrl>#{class_style_id(airspace_class)}</styleUrl><MultiGeometry>")
+    kml_buffer.append(kml_geometry([(lon, lat, upper_alt) for lat, lon in polygon_coords]))
+    kml_buffer.append(kml_geometry([(lon, lat, lower_alt) for lat, lon in polygon_coords]))
+    for coords in wall_coords(polygon_coords, lower_alt, upper_alt):
+        kml_buffer.append(kml_geometry(coords, extrude=0))
+    kml_buffer.append("</MultiGeometry></Placemark>")
+
+def add_zone_to_kml(kml_buffer, polygon_coords, lower_alt, upper_alt, name, airspace_class):   
+    style_id = f"{style_prefix}{next(style_ids)}"
+    color = with_alpha(100, class_color(airspace_class))
+    kml_buffer.append(f'<Style id="{style_id}"><PolyStyle><color>{color}</color></PolyStyle></Style>')
+
+    # Contour haut (plafond)
+    kml_buffer.append(kml_polygon(f"{name} upper", [(lon, lat, upper_alt) for lat, lon in polygon_coords], style_id))
+    
+    # Contour bas (plancher), ici avec transparence
+    kml_buffer.append(kml_polygon(f"{name} lower", [(lon, lat, lower_alt) for lat, lon in polygon_coords], style_id))
+
+    # Faces verticales pour fermer le volume
+    kml_buffer.append(f"<Folder>{kml_name('wall')}")
+    for i, coords in enumerate(wall_coords(polygon_coords, lower_alt, upper_alt)):
+        kml_buffer.append(kml_polygon(f"{name} side {i}", coords, style_id, extrude=0))
+    kml_buffer.append("</Folder>")
 
 # === Chargement GeoJSON contour France ===   
 def load_france_boundary(path_geojson):
     with open(path_geojson, 'r', encoding='utf-8') as f:
         gj = json.load(f)
 
-    border_points = []
+    rings = []
 
     if gj['type'] != 'GeometryCollection':
         raise ValueError("GeoJSON must be a GeometryCollection")
@@ -272,59 +442,562 @@ def load_france_boundary(path_geojson):
         if geom['type'] == 'MultiPolygon':
             for polygon in geom['coordinates']:
                 for ring in polygon:
-                    border_points.extend((lat, lon) for lon, lat in ring)
+                    rings.append([(lat, lon) for lon, lat in ring])
         elif geom['type'] == 'Polygon':
             for ring in geom['coordinates']:
-                border_points.extend((lat, lon) for lon, lat in ring)
-
-    return border_points   
-
-# === Chargement contour frontière ===
-france_border = load_france_boundary("../data/metropole-version-simplifiee.geojson")
-territorial_waters = load_france_boundary("../data/EspMar_FR_MT_WGS84.geojson")
-
-# === Traitement du JSON en un seul KML global ===
-kml = simplekml.Kml()
-
-with open("../extracts/airspaces.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
-
-for cat in data:
-    kml2 = simplekml.Kml()
-
-    cat_folder = kml.newfolder(name=cat)
-    cat_folder2 = kml2.newfolder(name=cat)
-    
-    for page in data[cat].values():
-        for airspace in page:
-            ident = airspace["ident"]
-            
-            folder = cat_folder.newfolder(name=ident)
-            folder2 = cat_folder2.newfolder(name=ident)
-            for layer in airspace["layers"]:
-                try:
-                    subfolder = folder.newfolder(name=layer["ident"])
-                    subfolder2 = folder2.newfolder(name=layer["ident"])
-                    coords = parse_polygon_coords(layer["coord"], france_border, territorial_waters)
-                    lo_alt, hi_alt = parse_vertical_limits(layer["limit"])                
-            
-                    add_zone_to_kml(subfolder, coords, lo_alt, hi_alt, name=layer["ident"], airspace_class=layer["class"])
-                    add_zone_to_kml(subfolder2, coords, lo_alt, hi_alt, name=layer["ident"], airspace_class=layer["class"])
-                except Exception as e:
-                    print(f"Erreur sur {layer['ident']}: {e}")
-    
-    partial_kml = f"../extracts/airspaces_{cat}.kml"
-    partial_kmz = f"../extracts/airspaces_{cat}.kmz"
-    
-    kml2.save(partial_kml)
-
-    with zipfile.ZipFile(partial_kmz, 'w', zipfile.ZIP_DEFLATED) as kmz:
-        kmz.write(partial_kml, arcname="doc.kml")  # nom attendu dans un KMZ
-
-kml_path = "../extracts/airspaces_global.kml"
-kmz_path = "../extracts/airspaces_global.kmz"
-
-kml.save(kml_path)
-
-with zipfile.ZipFile(kmz_path, 'w', zipfile.ZIP_DEFLATED) as kmz:
-    kmz.write(kml_path, arcname="doc.kml")  # nom attendu dans un KMZ
+                rings.append([(lat, lon) for lon, lat in ring])
+
+    return BorderIndex(rings)
+
+# === Sorties KML/KMZ ===
+# Chaque couche n'est rendue qu'une fois en fragment KML, puis écrite en flux
+# dans toutes les sorties qui l'acceptent.
+class KmlSink:
+    def __init__(self, kmz_path, kml_path=None, compact=False, layer_filter=None):
+        self.layer_filter = layer_filter
+        self.writer = KmlStreamWriter(kmz_path, kml_path)
+        if compact:
+            self.writer.write(class_styles())
+
+    def begin_category(self, cat):
+        self.writer.begin_folder(cat)
+
+    def end_category(self, cat):
+        self.writer.end_folder()
+
+    def add_airspace(self, cat, ident, layers):
+        accepted = [fragment for layer, fragment, extent in layers
+                    if self.layer_filter is None or self.layer_filter(cat, layer)]
+        if self.layer_filter is not None and not accepted:
+            return
+
+        self.writer.begin_folder(ident)
+        for fragment in accepted:
+            self.writer.write(fragment)
+        self.writer.end_folder()
+
+    def save(self):
+        self.writer.close()
+
+# === Sortie découpée en tuiles et tranches d'altitude ===
+# Chaque couche va dans la tuile de son centre et la tranche de son plancher;
+# doc.kml ne contient que des NetworkLink dont la Region couvre l'emprise réelle
+# des volumes de la tuile, chargés par le visualiseur quand ils sont à l'écran.
+ALTITUDE_BANDS = [
+    # (plancher min en mètres, nom)
+    (0, "SFC-FL065"),
+    (6500 * 0.3048, "FL065-FL195"),
+    (19500 * 0.3048, "FL195+"),
+]
+TILE_MIN_LOD_PIXELS = 128
+
+def altitude_band(lower_alt):
+    band = 0
+    for i, (floor, _) in enumerate(ALTITUDE_BANDS):
+        if lower_alt >= floor:
+            band = i
+    return band
+
+def layer_extent(coords, lower_alt, upper_alt):
+    lats = [lat for lat, lon in coords]
+    lons = [lon for lat, lon in coords]
+    return (min(lats), min(lons), max(lats), max(lons), lower_alt, upper_alt)
+
+def merge_extents(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]), min(a[4], b[4]), max(a[5], b[5]))
+
+def kml_region(extent, min_lod_pixels):
+    south, west, north, east, lower_alt, upper_alt = extent
+    return (f"<Region><LatLonAltBox><north>{north}</north><south>{south}</south><east>{east}</east><west>{west}</west>"
+            f"<minAltitude>{lower_alt}</minAltitude><maxAltitude>{upper_alt}</maxAltitude>"
+            f"<altitudeMode>absolute</altitudeMode></LatLonAltBox>"
+            f"<Lod><minLodPixels>{min_lod_pixels}</minLodPixels><maxLodPixels>-1</maxLodPixels></Lod></Region>")
+
+class TiledKmlSink:
+    def __init__(self, kmz_path, compact=False, tile_size=1.0):
+        self.tile_size = tile_size
+        self.writer = TiledKmzWriter(kmz_path, class_styles() if compact else "")
+        self.categories = []
+        # (catégorie, tranche, ligne, colonne) -> [emprise, nombre de couches]
+        self.tiles = {}
+
+    def begin_category(self, cat):
+        self.categories.append(cat)
+
+    def end_category(self, cat):
+        pass
+
+    def tile_href(self, key):
+        cat, band, row, col = key
+        return f"tiles/{cat}/{band}/{row}_{col}.kml"
+
+    def add_airspace(self, cat, ident, layers):
+        for layer, fragment, extent in layers:
+            if extent is None:
+                continue
+            south, west, north, east, lower_alt, upper_alt = extent
+            row = math.floor((south + north) / 2 / self.tile_size)
+            col = math.floor((west + east) / 2 / self.tile_size)
+            key = (cat, altitude_band(lower_alt), row, col)
+
+            self.writer.write_tile(self.tile_href(key), f"<Folder>{kml_name(ident)}{fragment}</Folder>")
+            tile = self.tiles.get(key)
+            if tile is None:
+                self.tiles[key] = [extent, 1]
+            else:
+                tile[0] = merge_extents(tile[0], extent)
+                tile[1] += 1
+
+    def save(self):
+        doc = [KML_HEADER]
+        for cat in self.categories:
+            doc.append(f"<Folder>{kml_name(cat)}")
+            for band, (_, band_name) in enumerate(ALTITUDE_BANDS):
+                keys = sorted(k for k in self.tiles if k[0] == cat and k[1] == band)
+                if not keys:
+                    continue
+                doc.append(f"<Folder>{kml_name(band_name)}")
+                for key in keys:
+                    extent, count = self.tiles[key]
+                    doc.append(f"<NetworkLink>{kml_name(f'{key[2]}_{key[3]} ({count})')}"
+                               f"{kml_region(extent, TILE_MIN_LOD_PIXELS)}"
+                               f"<Link><href>{self.tile_href(key)}</href><viewRefreshMode>onRegion</viewRefreshMode></Link>"
+                               f"</NetworkLink>")
+                doc.append("</Folder>")
+            doc.append("</Folder>")
+        doc.append(KML_FOOTER)
+        self.writer.close("".join(doc))
+
+# === Cache des couches résolues, pour les reconstructions incrémentales ===
+# Une entrée par couche, indexée par l'empreinte de ses chaînes coord/limit/class
+# et du contexte de résolution (version, contours, moteur géodésique, tolérances):
+# polygone et altitudes sont repris tels quels si rien n'a changé. L'empreinte de
+# chaque catégorie (entrées, options, répertoire de sortie) et celle de ses
+# fichiers écrits permettent de ne pas réécrire son KMZ.
+
+# à incrémenter à chaque modification de la résolution des coordonnées: invalide le cache des couches
+GEOMETRY_VERSION = "2"
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+class LayerCache:
+    def __init__(self, path, border_versions, max_entries=20000):
+        self.path = path
+        self.max_entries = max_entries
+        self.context = json.dumps({
+            "version": GEOMETRY_VERSION,
+            "borders": border_versions,
+            "geodesic": geodesic_engine,
+            "chord_tolerance": chord_tolerance_m,
+            "simplify": simplify_tolerance_m,
+        }, sort_keys=True)
+        self.entries = {}
+        self.categories = {}
+        self.run = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.unchanged_categories = 0
+        self.total_categories = 0
+        # couches des catégories dont les KMZ ont tous été conservés sans relecture
+        self.kept_layers = 0
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning("Cache illisible, ignoré: %s (%s)", self.path, e)
+            return
+        if data.get("version") != GEOMETRY_VERSION:
+            log.warning("Cache d'une autre version de la résolution, ignoré: %s", self.path)
+            return
+        self.entries = data["entries"]
+        self.categories = data["categories"]
+        self.run = data["run"]
+
+    def digest(self, layer):
+        key = "\0".join((self.context, layer["coord"], layer["limit"], layer["class"]))
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def category_digest(self, cat, pages, options):
+        key = "\0".join((self.context, options, cat, json.dumps(pages, sort_keys=True, ensure_ascii=False)))
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def category_unchanged(self, cat, digest, paths):
+        # les fichiers doivent être ceux écrits par l'exécution qui a enregistré l'empreinte:
+        # une exécution sans cache ou un autre outil peut les avoir remplacés depuis
+        entry = self.categories.get(cat)
+        if not isinstance(entry, dict) or entry["digest"] != digest or sorted(entry["outputs"]) != sorted(paths):
+            return False
+        return all(os.path.exists(path) and file_digest(path) == entry["outputs"][path] for path in paths)
+
+    def set_category(self, cat, digest, paths):
+        """À appeler une fois les fichiers de la catégorie écrits."""
+        self.categories[cat] = {"digest": digest, "outputs": {path: file_digest(path) for path in paths}}
+
+    def get(self, digest):
+        entry = self.entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry["used"] = self.run + 1
+        return [tuple(p) for p in entry["coords"]], entry["lower"], entry["upper"], entry["problems"]
+
+    def put(self, digest, coords, lower, upper, problems):
+        self.entries[digest] = {"used": self.run + 1, "coords": coords, "lower": lower, "upper": upper,
+                                "problems": problems}
+
+    def evict(self):
+        # les couches absentes de cette exécution partent en premier, les plus anciennes d'abord
+        stale = [d for d, e in self.entries.items() if e["used"] <= self.run]
+        stale.sort(key=lambda d: self.entries[d]["used"])
+        while len(self.entries) > self.max_entries and stale:
+            del self.entries[stale.pop(0)]
+            self.evicted += 1
+
+    def save(self):
+        self.evict()
+        self.run += 1
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": GEOMETRY_VERSION, "run": self.run, "categories": self.categories,
+                       "entries": self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def subset(self, layers):
+        """Copie réduite aux entrées des couches données, à envoyer à un processus fils."""
+        sub = LayerCache(self.path, None, self.max_entries)
+        sub.context = self.context
+        sub.run = self.run
+        for layer in layers:
+            digest = self.digest(layer)
+            if digest in self.entries:
+                sub.entries[digest] = self.entries[digest]
+        return sub
+
+    def merge(self, sub):
+        self.entries.update(sub.entries)
+        self.hits += sub.hits
+        self.misses += sub.misses
+
+    def summary(self):
+        if self.kept_layers:
+            return (f"Cache: KMZ conservés, {self.unchanged_categories}/{self.total_categories} catégories inchangées "
+                    f"({self.kept_layers} couches sans résolution), {len(self.entries)} en cache")
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0
+        return (f"Cache: {self.hits} couches réutilisées, {self.misses} résolues ({rate:.0f}% de succès), "
+                f"{self.unchanged_categories}/{self.total_categories} catégories inchangées, "
+                f"{self.evicted} entrées évincées, {len(self.entries)} en cache")
+
+def resolve_layer(layer, france_border, territorial_waters, layer_cache=None):
+    """Polygone et limites verticales d'une couche, repris du cache si ses chaînes n'ont pas changé."""
+    digest = None
+    if layer_cache is not None:
+        digest = layer_cache.digest(layer)
+        cached = layer_cache.get(digest)
+        if cached is not None:
+            coords, lo_alt, hi_alt, problems = cached
+            coord_problems[:] = problems
+            return coords, lo_alt, hi_alt, True
+
+    coords = parse_polygon_coords(layer["coord"], france_border, territorial_waters)
+    lo_alt, hi_alt = parse_vertical_limits(layer["limit"])
+    if layer_cache is not None:
+        layer_cache.put(digest, coords, lo_alt, hi_alt, list(coord_problems))
+    return coords, lo_alt, hi_alt, False
+
+def build_airspace(airspace, france_border, territorial_waters, compact=False, report=None, resolved=None,
+                   layer_cache=None):
+    report = report or NullReport()
+    start = time.perf_counter()
+    layers = []
+    for layer in airspace["layers"]:
+        kml_buffer = []
+        del coord_problems[:]
+        status = "parsed"
+        vertices = 0
+        extent = None
+        try:
+            coords, lo_alt, hi_alt, cached = resolve_layer(layer, france_border, territorial_waters, layer_cache)
+            if cached:
+                report.count("layers.cached")
+            vertices = len(coords)
+            # moins de 3 sommets: volume dégénéré, écrit mais signalé
+            if vertices < 3:
+                status = "skipped"
+
+            if vertices:
+                extent = layer_extent(coords, lo_alt, hi_alt)
+
+            if resolved is not None:
+                resolved.append((airspace["ident"], layer["ident"], layer["class"], lo_alt, hi_alt, coords))
+
+            if compact:
+                add_volume_to_kml(kml_buffer, coords, lo_alt, hi_alt, name=layer["ident"], airspace_class=layer["class"])
+            else:
+                add_zone_to_kml(kml_buffer, coords, lo_alt, hi_alt, name=layer["ident"], airspace_class=layer["class"])
+        except Exception as e:
+            log.warning("Erreur sur %s: %s", layer["ident"], e)
+            report.problem("layer", f"{layer['ident']}: {e}")
+            status = "failed"
+            kml_buffer = []
+            extent = None
+        if not compact:
+            kml_buffer = [f"<Folder>{kml_name(layer['ident'])}", *kml_buffer, "</Folder>"]
+        layers.append((layer, "".join(kml_buffer), extent))
+
+        for segment in coord_problems:
+            report.problem("segment", f"{layer['ident']}: {segment}")
+        if status != "failed":
+            geometry_stats["layers"] += 1
+            geometry_stats["vertices"] += vertices
+            # hors mode compact: plafond, plancher et une face par arête
+            geometry_stats["placemarks"] += 1 if compact else 2 + vertices
+        report.count(f"layers.{status}")
+        report.count("vertices", vertices)
+        report.record("volumes", airspace=airspace["ident"], layer=layer["ident"], status=status,
+                      vertices=vertices, skipped_segments=len(coord_problems))
+
+    report.record("airspaces", airspace=airspace["ident"], layers=len(layers), seconds=time.perf_counter() - start)
+    return layers
+
+# === Résolution des espaces dans des processus fils ===
+# Chaque processus reçoit une fois les contours et les options; un job est un
+# espace (toutes ses couches) avec la partie du cache qui le concerne. Les
+# identifiants de style zone_<catégorie>_N sont numérotés localement puis
+# décalés dans le parent, pour que la sortie soit identique à l'exécution
+# séquentielle.
+
+worker_borders = None
+
+def init_worker(france_border, territorial_waters, options):
+    global worker_borders, geodesic_engine, chord_tolerance_m, simplify_tolerance_m
+    worker_borders = (france_border, territorial_waters)
+    geodesic_engine, chord_tolerance_m, simplify_tolerance_m = options
+
+def build_airspace_job(job):
+    airspace, cat, compact, with_geometry, layer_cache = job
+    memo_before = memo_counts()
+    start_style_numbering(cat)
+    geometry_stats.clear()
+    report = RecordingReport()
+    resolved = [] if with_geometry else None
+    try:
+        layers = build_airspace(airspace, *worker_borders, compact, report, resolved, layer_cache)
+    except Exception as e:
+        # build_airspace traite déjà les erreurs couche par couche: filet de sécurité pour le reste du lot
+        layers = []
+        for layer in airspace["layers"]:
+            log.warning("Erreur sur %s: %s", layer["ident"], e)
+            report.problem("layer", f"{layer['ident']}: {e}")
+            report.count("layers.failed")
+            layers.append((layer, "" if compact else f"<Folder>{kml_name(layer['ident'])}</Folder>", None))
+    memo_used = {name: (hits - memo_before[name][0], misses - memo_before[name][1])
+                 for name, (hits, misses) in memo_counts().items()}
+    return layers, resolved, report.calls, dict(geometry_stats), next(style_ids) - 1, layer_cache, memo_used
+
+def renumber_styles(layers, offset, re_style_id):
+    if not offset:
+        return layers
+    shift = lambda m: f"{m.group(1)}{int(m.group(2)) + offset}"
+    return [(layer, re_style_id.sub(shift, fragment), extent) for layer, fragment, extent in layers]
+
+def build_airspaces_parallel(executor, airspaces, cat, compact, report, resolved, layer_cache, chunk):
+    """Résultats de build_airspace pour chaque espace de la catégorie cat, dans l'ordre d'origine."""
+    global style_ids
+    re_style_id = re.compile(f'((?:id="|#){re.escape(style_prefix)})(\\d+)')
+    jobs = [(airspace, cat, compact, resolved is not None,
+             layer_cache.subset(airspace["layers"]) if layer_cache is not None else None) for airspace in airspaces]
+
+    style_offset = next(style_ids) - 1
+    results = []
+    # map() restitue les résultats dans l'ordre de soumission
+    for layers, job_resolved, calls, stats, styles_used, job_cache, memo_used in executor.map(build_airspace_job, jobs,
+                                                                                             chunksize=chunk):
+        results.append(renumber_styles(layers, style_offset, re_style_id))
+        style_offset += styles_used
+        if resolved is not None:
+            resolved.extend(job_resolved)
+        replay(calls, report)
+        geometry_stats.update(stats)
+        for name, (hits, misses) in memo_used.items():
+            worker_memo_counts[name, "hits"] += hits
+            worker_memo_counts[name, "misses"] += misses
+        if layer_cache is not None:
+            layer_cache.merge(job_cache)
+    style_ids = itertools.count(style_offset + 1)
+    return results
+
+# === Traitement du JSON en un KML global et un KML par catégorie ===
+def generate_kml(data, france_border, territorial_waters, output_dir="../extracts", compact=False, keep_kml=False, report=None,
+                 geometry=None, tile_size=None, layer_cache=None, workers=1, chunk=8):
+    def make_sink(name):
+        kml_path = f"{output_dir}/airspaces_{name}.kml" if keep_kml else None
+        return KmlSink(f"{output_dir}/airspaces_{name}.kmz", kml_path, compact)
+
+    def output_paths(name):
+        # le KMZ global découpé en tuiles n'a pas de KML intermédiaire
+        kml = keep_kml and not (name == "global" and tile_size)
+        return [f"{output_dir}/airspaces_{name}.kmz"] + ([f"{output_dir}/airspaces_{name}.kml"] if kml else [])
+
+    def outputs_written(name):
+        if layer_cache is not None:
+            layer_cache.set_category(name, digests[name], output_paths(name))
+
+    # catégories dont les entrées, options et KMZ n'ont pas changé depuis la dernière exécution: KMZ conservé
+    unchanged = set()
+    digests = {}
+    if layer_cache is not None:
+        options = f"compact={compact} keep_kml={keep_kml} output_dir={os.path.abspath(output_dir)}"
+        digests = {cat: layer_cache.category_digest(cat, data[cat], options) for cat in data}
+        digests["global"] = layer_cache.category_digest("global", sorted(digests.items()), f"{options} tiled={tile_size}")
+        unchanged = {cat for cat, digest in digests.items()
+                     if layer_cache.category_unchanged(cat, digest, output_paths(cat))}
+        layer_cache.unchanged_categories = len(unchanged - {"global"})
+        layer_cache.total_categories = len(data)
+
+        if "global" in unchanged and geometry is None:
+            layer_cache.kept_layers = sum(len(airspace["layers"]) for cat in data for page in data[cat].values()
+                                          for airspace in page)
+            log.info("Aucune catégorie modifiée, KMZ conservés")
+            return
+
+    # tile_size: KMZ global découpé en tuiles de tile_size degrés (les KMZ par catégorie restent en un document)
+    if tile_size:
+        global_sink = TiledKmlSink(f"{output_dir}/airspaces_global.kmz", compact, tile_size)
+    else:
+        global_sink = make_sink("global")
+
+    executor = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        options = (geodesic_engine, chord_tolerance_m, simplify_tolerance_m)
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                       initargs=(france_border, territorial_waters, options))
+
+    for cat in data:
+        start_style_numbering(cat)
+        sinks = [global_sink] if cat in unchanged else [global_sink, make_sink(cat)]
+        for sink in sinks:
+            sink.begin_category(cat)
+
+        resolved = [] if geometry is not None else None
+        airspaces = [airspace for page in data[cat].values() for airspace in page]
+        if executor is not None:
+            built = build_airspaces_parallel(executor, airspaces, cat, compact, report or NullReport(), resolved,
+                                             layer_cache, chunk)
+        else:
+            built = (build_airspace(airspace, france_border, territorial_waters, compact, report, resolved, layer_cache)
+                     for airspace in airspaces)
+        for airspace, layers in zip(airspaces, built):
+            for sink in sinks:
+                sink.add_airspace(cat, airspace["ident"], layers)
+
+        if geometry is not None:
+            geometry.extend((cat, *item) for item in resolved)
+
+        for sink in sinks:
+            sink.end_category(cat)
+        for sink in sinks[1:]:
+            sink.save()
+            outputs_written(cat)
+
+    if executor is not None:
+        executor.shutdown()
+    global_sink.save()
+    outputs_written("global")
+
+def main():
+    global geodesic_engine, chord_tolerance_m, simplify_tolerance_m
+
+    # === Options ===
+    arg_parser = argparse.ArgumentParser(description="Génération des KML/KMZ depuis airspaces.json")
+    arg_parser.add_argument("--geodesic", choices=GEODESIC_ENGINES, default=geodesic_engine,
+                            help="moteur de calcul des arcs et cercles (geographiclib = référence point par point)")
+    arg_parser.add_argument("--keep-kml", action="store_true",
+                            help="écrit aussi les fichiers .kml intermédiaires à côté des .kmz")
+    arg_parser.add_argument("--compact", action="store_true",
+                            help="un placemark MultiGeometry par volume et un style partagé par classe")
+    arg_parser.add_argument("--tiled", nargs="?", type=float, const=1.0, metavar="DEG",
+                            help="découpe le KMZ global en tuiles de DEG degrés (1 par défaut) et tranches d'altitude, "
+                                 "chargées par Region/NetworkLink")
+    arg_parser.add_argument("--chord-tolerance", type=float, metavar="M",
+                            help="densité des arcs et cercles selon l'écart maximal corde/arc en mètres "
+                                 "(par défaut 20 points par tour)")
+    arg_parser.add_argument("--simplify", type=float, metavar="M",
+                            help="simplifie les portions de frontière avec cette tolérance en mètres, "
+                                 "sans créer d'auto-intersection")
+    arg_parser.add_argument("-j", "--workers", type=int, default=1,
+                            help="nombre de processus de résolution des couches (1 = séquentiel)")
+    arg_parser.add_argument("--chunk", type=int, default=8,
+                            help="nombre d'espaces envoyés à la fois à chaque processus")
+    arg_parser.add_argument("--cache", default="../cache/kml_layers.json",
+                            help="cache des couches résolues, indexé par empreinte des chaînes coord/limit/class")
+    arg_parser.add_argument("--no-cache", action="store_true", help="résout toutes les couches et réécrit tous les KMZ")
+    arg_parser.add_argument("--geometry-out", nargs="?", const="../extracts/airspaces_geometry.bin", metavar="PATH",
+                            help="écrit aussi la géométrie résolue au format binaire de geometry_store.py")
+    arg_parser.add_argument("--profile", nargs="?", const="../reports/kml_run_report.json", metavar="PATH",
+                            help="écrit un rapport JSON des durées, compteurs et sommets par volume")
+    arg_parser.add_argument("--cprofile", metavar="PATH",
+                            help="écrit un profil cProfile de la génération des KML")
+    args = arg_parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    if args.geodesic == "numpy" and importlib.util.find_spec("numpy") is None:
+        raise SystemExit("Le moteur numpy nécessite le module numpy")
+    geodesic_engine = args.geodesic
+    chord_tolerance_m = args.chord_tolerance
+    simplify_tolerance_m = args.simplify
+
+    report = make_report("kml", args.profile, args.cprofile)
+
+    # === Chargement contour frontière ===
+    france_path = "../data/metropole-version-simplifiee.geojson"
+    sea_path = "../data/EspMar_FR_MT_WGS84.geojson"
+    with report.stage("load borders"):
+        france_border = load_france_boundary(france_path)
+        territorial_waters = load_france_boundary(sea_path)
+
+    layer_cache = None
+    if not args.no_cache:
+        with report.stage("cache load"):
+            layer_cache = LayerCache(args.cache, {"france": file_digest(france_path), "sea": file_digest(sea_path)})
+            layer_cache.load()
+
+    with report.stage("load json"):
+        with open("../extracts/airspaces.json", "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+    geometry = [] if args.geometry_out else None
+    with report.stage("generate"), report.profiled():
+        generate_kml(data, france_border, territorial_waters, compact=args.compact, keep_kml=args.keep_kml, report=report,
+                     geometry=geometry, tile_size=args.tiled, layer_cache=layer_cache, workers=args.workers,
+                     chunk=args.chunk)
+
+    if layer_cache is not None:
+        with report.stage("cache save"):
+            layer_cache.save()
+        print(layer_cache.summary())
+
+    if geometry is not None:
+        with report.stage("write geometry"):
+            write_geometry(args.geometry_out, geometry)
+        print(f"Géométrie résolue écrite dans {args.geometry_out} ({len(geometry)} couches)")
+
+    # sans catégorie modifiée rien n'est résolu: le résumé du cache suffit
+    if layer_cache is None or not layer_cache.kept_layers:
+        print(f"{geometry_stats['layers']} couches, {geometry_stats['vertices']} sommets, "
+              f"{geometry_stats['placemarks']} placemarks")
+        print_cache_stats()
+    report.save()
+
+# === Lancement ===
+if __name__ == "__main__":
+    main()
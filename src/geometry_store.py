@@ -0,0 +1,180 @@
+import sys
+import json
+import mmap
+import struct
+import argparse
+
+# === Géométrie résolue, format binaire mappable en mémoire ===
+#
+# Produit par generate_kml_from_json.py --geometry-out, après résolution des
+# arcs, cercles et frontières: les outils qui le lisent n'ont besoin ni de
+# geographiclib ni des expressions régulières de parsing.
+#
+# Disposition du fichier (petit-boutiste, sections alignées sur 8 octets):
+#   magic      8 octets  b"EAIPGEO1"
+#   taille     u32       longueur de l'en-tête JSON
+#   en-tête    JSON      version, nombres de couches/sommets, table des
+#                        classes, (catégorie, espace, couche) par couche
+#   offsets    u64[n+1]  indice du premier sommet de chaque couche
+#   altitudes  f64[2n]   plancher, plafond en mètres
+#   classes    u16[n]    indice dans la table des classes
+#   sommets    f64[2m]   lat, lon en degrés décimaux
+
+MAGIC = b"EAIPGEO1"
+VERSION = 1
+
+
+def _pad(n):
+    return (8 - n % 8) % 8
+
+
+def write_geometry(path, layers):
+    """layers: itérable de (catégorie, espace, couche, classe, plancher, plafond, [(lat, lon), ...])."""
+    names = []
+    classes = []
+    class_codes = {}
+    offsets = [0]
+    altitudes = []
+    codes = []
+    vertices = []
+
+    for cat, airspace, ident, airspace_class, lower, upper, coords in layers:
+        names.append([cat, airspace, ident])
+        code = class_codes.setdefault(airspace_class, len(classes))
+        if code == len(classes):
+            classes.append(airspace_class)
+        codes.append(code)
+        altitudes.extend((float(lower), float(upper)))
+        for lat, lon in coords:
+            vertices.extend((lat, lon))
+        offsets.append(len(vertices) // 2)
+
+    n = len(names)
+    header = json.dumps({
+        "version": VERSION,
+        "layers": n,
+        "vertices": offsets[-1],
+        "classes": classes,
+        "names": names,
+    }, ensure_ascii=False).encode("utf-8")
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(b"\0" * _pad(len(MAGIC) + 4 + len(header)))
+        f.write(struct.pack(f"<{n + 1}Q", *offsets))
+        f.write(struct.pack(f"<{2 * n}d", *altitudes))
+        f.write(struct.pack(f"<{n}H", *codes))
+        f.write(b"\0" * _pad(2 * n))
+        f.write(struct.pack(f"<{len(vertices)}d", *vertices))
+
+
+class GeometryStore:
+    """Lecture mappée en mémoire: les tableaux sont des memoryview sur le fichier, sans copie.
+
+    close() libère les memoryview du magasin. Une vue créée par l'appelant
+    (numpy.frombuffer(store.vertices)) reste lisible après close(): la
+    projection n'est alors fermée qu'à la disparition de la dernière vue.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.map)
+
+        if view[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a geometry file: {path}")
+        (header_len,) = struct.unpack_from("<I", self.map, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(bytes(view[start:start + header_len]).decode("utf-8"))
+        if self.header["version"] != VERSION:
+            raise ValueError(f"Unsupported geometry file version: {self.header['version']}")
+
+        n = self.header["layers"]
+        m = self.header["vertices"]
+        self.names = self.header["names"]
+        self.classes = self.header["classes"]
+
+        pos = start + header_len
+        pos += _pad(pos)
+        self.offsets = view[pos:pos + 8 * (n + 1)].cast("Q")
+        pos += 8 * (n + 1)
+        self.altitudes = view[pos:pos + 16 * n].cast("d")
+        pos += 16 * n
+        self.class_codes = view[pos:pos + 2 * n].cast("H")
+        pos += 2 * n + _pad(2 * n)
+        # lat, lon entrelacés; numpy.frombuffer(store.vertices) les lit sans copie
+        self.vertices = view[pos:pos + 16 * m].cast("d")
+
+    def __len__(self):
+        return len(self.names)
+
+    def layer(self, i):
+        cat, airspace, ident = self.names[i]
+        return {
+            "category": cat,
+            "airspace": airspace,
+            "ident": ident,
+            "class": self.classes[self.class_codes[i]],
+            "lower": self.altitudes[2 * i],
+            "upper": self.altitudes[2 * i + 1],
+            "coords": self.coords(i),
+        }
+
+    def coords(self, i):
+        flat = self.vertices[2 * self.offsets[i]:2 * self.offsets[i + 1]]
+        return list(zip(flat[0::2], flat[1::2]))
+
+    def close(self):
+        # des vues exportées (numpy) peuvent encore être vivantes: le ramasse-miettes fermera la projection après elles
+        try:
+            for view in (self.offsets, self.altitudes, self.class_codes, self.vertices):
+                view.release()
+            self.map.close()
+        except BufferError:
+            pass
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# === Export GeoJSON depuis la géométrie résolue ===
+def geojson_feature(layer):
+    ring = [[lon, lat] for lat, lon in layer["coords"]]
+    # RFC 7946 §3.1.6: un anneau se referme sur son premier sommet
+    closed = ring + [ring[0]] if ring and ring[0] != ring[-1] else ring
+    return {
+        "type": "Feature",
+        "properties": {
+            "category": layer["category"],
+            "airspace": layer["airspace"],
+            "ident": layer["ident"],
+            "class": layer["class"],
+            "lower_m": layer["lower"],
+            "upper_m": layer["upper"],
+        },
+        "geometry": {"type": "Polygon", "coordinates": [closed]} if len(ring) >= 3 else None,
+    }
+
+
+def to_geojson(store):
+    features = [geojson_feature(store.layer(i)) for i in range(len(store))]
+    return {"type": "FeatureCollection", "features": features}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lecture de la géométrie résolue des espaces aériens")
+    parser.add_argument("path", nargs="?", default="../extracts/airspaces_geometry.bin")
+    parser.add_argument("--geojson", metavar="OUT", help="exporte les couches en GeoJSON")
+    args = parser.parse_args()
+
+    with GeometryStore(args.path) as store:
+        print(f"{len(store)} couches, {store.header['vertices']} sommets, classes {store.classes}", file=sys.stderr)
+        if args.geojson:
+            with open(args.geojson, "w", encoding="utf-8") as f:
+                json.dump(to_geojson(store), f, ensure_ascii=False)
@@ -0,0 +1,95 @@
+import io
+import tempfile
+import zipfile
+
+# === Écriture KML en flux, directement dans l'entrée doc.kml d'un KMZ ===
+#
+# Le document n'est jamais construit en mémoire: les dossiers et placemarks
+# sont écrits au fur et à mesure, la mémoire utilisée ne dépend que du
+# fragment en cours. Une copie .kml peut être écrite en parallèle.
+
+KML_HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+              '<kml xmlns="http://www.opengis.net/kml/2.2" xmlns:gx="http://www.google.com/kml/ext/2.2">'
+              '<Document>')
+KML_FOOTER = '</Document></kml>\n'
+
+
+# même résultat que xml.sax.saxutils.escape, dont l'import charge urllib.request et ssl
+def escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def kml_name(name):
+    return f"<name>{escape(name)}</name>"
+
+
+class KmlStreamWriter:
+    def __init__(self, kmz_path, kml_path=None):
+        self.kmz = zipfile.ZipFile(kmz_path, "w", zipfile.ZIP_DEFLATED)
+        # nom attendu dans un KMZ
+        self.entry = io.TextIOWrapper(self.kmz.open("doc.kml", "w"), encoding="utf-8")
+        self.copy = open(kml_path, "w", encoding="utf-8") if kml_path else None
+        self.depth = 0
+        self.write(KML_HEADER)
+
+    def write(self, text):
+        self.entry.write(text)
+        if self.copy is not None:
+            self.copy.write(text)
+
+    def begin_folder(self, name):
+        self.write(f"<Folder>{kml_name(name)}")
+        self.depth += 1
+
+    def end_folder(self):
+        if self.depth == 0:
+            raise ValueError("No folder to close")
+        self.write("</Folder>")
+        self.depth -= 1
+
+    def close(self):
+        while self.depth:
+            self.end_folder()
+        self.write(KML_FOOTER)
+        self.entry.close()
+        self.kmz.close()
+        if self.copy is not None:
+            self.copy.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# === KMZ découpé en tuiles, reliées par des NetworkLink ===
+#
+# Une entrée de zip ne peut être ouverte qu'une à la fois: les fragments de
+# toutes les tuiles sont écrits à la suite dans un fichier temporaire, avec
+# leur position, puis recopiés tuile par tuile dans le KMZ à la fermeture.
+# doc.kml, qui dépend de l'emprise finale de chaque tuile, est écrit en
+# dernier.
+class TiledKmzWriter:
+    def __init__(self, kmz_path, tile_header=""):
+        self.kmz_path = kmz_path
+        self.tile_header = tile_header
+        self.spool = tempfile.TemporaryFile()
+        self.chunks = {}
+
+    def write_tile(self, href, text):
+        data = text.encode("utf-8")
+        self.chunks.setdefault(href, []).append((self.spool.tell(), len(data)))
+        self.spool.write(data)
+
+    def close(self, doc):
+        with zipfile.ZipFile(self.kmz_path, "w", zipfile.ZIP_DEFLATED) as kmz:
+            kmz.writestr("doc.kml", doc)
+            for href, chunks in self.chunks.items():
+                with kmz.open(href, "w") as entry:
+                    entry.write((KML_HEADER + self.tile_header).encode("utf-8"))
+                    for offset, length in chunks:
+                        self.spool.seek(offset)
+                        entry.write(self.spool.read(length))
+                    entry.write(KML_FOOTER.encode("utf-8"))
+        self.spool.close()
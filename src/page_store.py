@@ -0,0 +1,320 @@
+import os
+import sys
+import json
+import mmap
+import zlib
+import hashlib
+import argparse
+from collections import namedtuple
+
+# === Magasin des pages eAIP, par édition AIRAC ===
+#
+# Au lieu d'un fichier HTML par page dans sample_data, le magasin tient toutes
+# les pages dans un seul fichier de blobs partagé par les éditions. Les pages
+# y sont compressées une à une et adressées par l'empreinte SHA-256 de leur
+# contenu: une page identique dans une autre édition (ou dans la même) n'est
+# stockée qu'une fois. Chaque édition n'est qu'un index <édition>.pages.
+#
+# Fichiers du magasin:
+#   <édition>.pages    JSON: version, édition, pages [catégorie, nom,
+#                      empreinte] dans l'ordre d'import
+#   blobs.json         JSON: version, nom du fichier de blobs courant, blobs
+#                      {empreinte: [offset, longueur, taille, compression]}
+#   blobs-<n>.pack     magic b"EAIPPGS1" puis les contenus compressés, à la
+#                      suite
+#
+# Une nouvelle édition ajoute ses pages inconnues à la fin du fichier de blobs
+# (les octets déjà indexés ne changent jamais), puis réécrit blobs.json et
+# écrit son index (fichier temporaire puis renommage). Supprimer une édition
+# retire son index puis compacte le magasin (prune): les blobs qu'aucune
+# édition restante ne référence sont abandonnés, les autres recopiés tels
+# quels dans blobs-<n+1>.pack. Un blob n'est donc jamais retiré tant qu'une
+# édition le référence; le compactage ne doit pas tourner pendant une lecture
+# d'un autre processus. Une interruption laisse au pire des blobs ou un fichier
+# de blobs orphelins, que le prune suivant supprime.
+#
+# Les lecteurs projettent le fichier de blobs en mémoire (mmap) et
+# décompressent la page directement depuis la projection.
+
+MAGIC = b"EAIPPGS1"
+VERSION = 3
+SUFFIX = ".pages"
+POOL_INDEX = "blobs.json"
+
+CODECS = ["zlib", "lzma"]
+
+# page dans le magasin: de quoi la relire depuis un autre processus
+PageRef = namedtuple("PageRef", "path offset length codec")
+
+
+def compress(content, codec):
+    if codec == "zlib":
+        return zlib.compress(content, 9)
+    import lzma
+    return lzma.compress(content)
+
+
+def decompress(data, codec):
+    if codec == "zlib":
+        return zlib.decompress(data)
+    import lzma
+    return lzma.decompress(data)
+
+
+# projections ouvertes, par processus
+open_maps = {}
+
+def read_page(ref):
+    """Contenu d'une page, décompressé depuis la projection mémoire du fichier de blobs."""
+    m = open_maps.get(ref.path)
+    if m is None or ref.offset + ref.length > len(m):
+        # absente, ou antérieure à un ajout d'édition qui a allongé le fichier
+        with open(ref.path, "rb") as f:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        open_maps[ref.path] = m
+    return decompress(memoryview(m)[ref.offset:ref.offset + ref.length], ref.codec)
+
+
+def read_json(path):
+    with open(path, "rb") as f:
+        head = f.read(len(MAGIC))
+        if head == MAGIC:
+            # archive autonome des versions précédentes
+            raise ValueError(f"Version d'archive non gérée, réimporter l'édition: {path}")
+        index = json.loads(head + f.read())
+    if index.get("version") != VERSION:
+        raise ValueError(f"Version d'archive non gérée: {path}")
+    return index
+
+
+def write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class PageStore:
+    def __init__(self, root):
+        self.root = root
+        self.indexes = {}
+        self.pool = None
+
+    def path(self, edition):
+        return os.path.join(self.root, edition + SUFFIX)
+
+    def editions(self):
+        if not os.path.isdir(self.root):
+            return []
+        # AIRAC-AAAA-MM-JJ: l'ordre alphabétique est l'ordre chronologique
+        return sorted(name[:-len(SUFFIX)] for name in os.listdir(self.root) if name.endswith(SUFFIX))
+
+    def latest(self):
+        editions = self.editions()
+        if not editions:
+            raise ValueError(f"Aucune édition dans {self.root}")
+        return editions[-1]
+
+    def index(self, edition):
+        if edition not in self.indexes:
+            if not os.path.exists(self.path(edition)):
+                raise ValueError(f"Édition inconnue: {edition} (disponibles: {', '.join(self.editions()) or 'aucune'})")
+            self.indexes[edition] = read_json(self.path(edition))
+        return self.indexes[edition]
+
+    def blobs(self):
+        """Index du fichier de blobs: {"pack": nom du fichier, "blobs": {empreinte: [offset, longueur, taille, compression]}}."""
+        if self.pool is None:
+            path = os.path.join(self.root, POOL_INDEX)
+            if os.path.exists(path):
+                self.pool = read_json(path)
+            else:
+                self.pool = {"version": VERSION, "generation": 0, "pack": "blobs-0.pack", "blobs": {}}
+        return self.pool
+
+    def pack_path(self):
+        return os.path.join(self.root, self.blobs()["pack"])
+
+    def pages(self, edition=None, categories=None):
+        """[(catégorie, nom, PageRef)] dans l'ordre d'import."""
+        index = self.index(edition or self.latest())
+        pool = self.blobs()
+        pack = self.pack_path()
+        result = []
+        for cat, name, digest in index["pages"]:
+            if categories is not None and cat not in categories:
+                continue
+            offset, length, _, codec = pool["blobs"][digest]
+            result.append((cat, name, PageRef(pack, offset, length, codec)))
+        return result
+
+    def refcounts(self):
+        """Nombre d'éditions qui référencent chaque blob."""
+        counts = {}
+        for edition in self.editions():
+            for digest in {digest for _, _, digest in self.index(edition)["pages"]}:
+                counts[digest] = counts.get(digest, 0) + 1
+        return counts
+
+    def add_edition(self, edition, pages, codec="zlib"):
+        """pages: [(catégorie, nom, contenu)]; ajoute les pages inconnues aux blobs, écrit l'index de l'édition
+        et renvoie ses compteurs."""
+        if codec not in CODECS:
+            raise ValueError(f"Compression inconnue: {codec}")
+        path = self.path(edition)
+        if os.path.exists(path):
+            raise ValueError(f"Édition déjà présente: {path}")
+
+        os.makedirs(self.root, exist_ok=True)
+        pool = self.blobs()
+        index = {"version": VERSION, "edition": edition, "pages": []}
+        stats = {"pages": 0, "stored": 0, "shared": 0, "raw_bytes": 0, "added_bytes": 0}
+        seen = set()
+        with open(self.pack_path(), "ab") as f:
+            # les blobs déjà indexés restent en place; une fin laissée par une interruption n'est pas indexée
+            if f.tell() == 0:
+                f.write(MAGIC)
+            offset = f.tell()
+            for cat, name, content in pages:
+                digest = hashlib.sha256(content).hexdigest()
+                index["pages"].append([cat, name, digest])
+                stats["pages"] += 1
+                stats["raw_bytes"] += len(content)
+                if digest in seen:
+                    continue
+                seen.add(digest)
+                if digest in pool["blobs"]:
+                    stats["shared"] += 1
+                    continue
+                data = compress(content, codec)
+                f.write(data)
+                pool["blobs"][digest] = [offset, len(data), len(content), codec]
+                offset += len(data)
+                stats["stored"] += 1
+                stats["added_bytes"] += len(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        write_json(os.path.join(self.root, POOL_INDEX), pool)
+        write_json(path, index)
+        self.indexes[edition] = index
+        return stats
+
+    def remove_edition(self, edition):
+        """Retire l'index d'une édition puis compacte le magasin; renvoie les compteurs de prune()."""
+        path = self.path(edition)
+        if not os.path.exists(path):
+            raise ValueError(f"Édition inconnue: {edition} (disponibles: {', '.join(self.editions()) or 'aucune'})")
+        os.remove(path)
+        self.indexes.pop(edition, None)
+        return self.prune()
+
+    def prune(self):
+        """Recopie dans un nouveau fichier de blobs ceux qu'une édition référence encore, supprime les autres."""
+        pool = self.blobs()
+        live = self.refcounts()
+        dead = [digest for digest in pool["blobs"] if digest not in live]
+        stats = {"removed": len(dead), "kept": len(pool["blobs"]) - len(dead)}
+        old_pack = self.pack_path()
+        if dead:
+            generation = pool["generation"] + 1
+            new_pool = {"version": VERSION, "generation": generation, "pack": f"blobs-{generation}.pack", "blobs": {}}
+            new_pack = os.path.join(self.root, new_pool["pack"])
+            with open(old_pack, "rb") as src, open(new_pack, "wb") as dst:
+                dst.write(MAGIC)
+                offset = len(MAGIC)
+                for digest, (old_offset, length, size, codec) in pool["blobs"].items():
+                    if digest not in live:
+                        continue
+                    src.seek(old_offset)
+                    dst.write(src.read(length))
+                    new_pool["blobs"][digest] = [offset, length, size, codec]
+                    offset += length
+                dst.flush()
+                os.fsync(dst.fileno())
+            write_json(os.path.join(self.root, POOL_INDEX), new_pool)
+            self.pool = pool = new_pool
+        # fichiers de blobs remplacés, y compris ceux d'un compactage interrompu
+        for name in os.listdir(self.root):
+            if name.startswith("blobs-") and name.endswith(".pack") and name != pool["pack"]:
+                os.remove(os.path.join(self.root, name))
+        return stats
+
+    def footprint(self):
+        """Octets occupés sur le disque par le magasin (blocs alloués)."""
+        if not os.path.isdir(self.root):
+            return 0
+        return sum(os.stat(os.path.join(self.root, name)).st_blocks * 512 for name in os.listdir(self.root))
+
+
+# === Import d'un répertoire au format de sample_data ===
+def scan_directory(input_dir, categories):
+    """[(catégorie, nom, chemin)] dans l'ordre de os.listdir, comme parse_local."""
+    files = []
+    for cat in categories:
+        cat_dir = os.path.join(input_dir, cat)
+        if not os.path.isdir(cat_dir):
+            continue
+        for name in os.listdir(cat_dir):
+            if name.endswith(".html") or name.endswith(".htm"):
+                files.append((cat, name, os.path.join(cat_dir, name)))
+    return files
+
+
+def import_directory(store, edition, input_dir, categories, codec="zlib"):
+    def contents():
+        for cat, name, path in scan_directory(input_dir, categories):
+            with open(path, "rb") as f:
+                yield cat, name, f.read()
+    return store.add_edition(edition, contents(), codec)
+
+
+def edition_name(airac):
+    """Nom d'édition depuis le chemin --airac de download_eaip.py (eAIP_.../FRANCE/AIRAC-2025-10-02)."""
+    return airac.rstrip("/").split("/")[-1]
+
+
+if __name__ == "__main__":
+    from generate_json_from_eaip import CATEGORIES
+
+    parser = argparse.ArgumentParser(description="Magasin des pages eAIP, indexées par édition AIRAC")
+    parser.add_argument("--store", default="../store/", help="répertoire du magasin")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="archive un répertoire au format de sample_data")
+    add.add_argument("input_dir", nargs="?", default="../sample_data/")
+    add.add_argument("--edition", required=True, help="nom de l'édition, par exemple AIRAC-2025-10-02")
+    add.add_argument("--codec", choices=CODECS, default="zlib")
+    sub.add_parser("list", help="éditions, pages et taille du magasin")
+    remove = sub.add_parser("remove", help="retire une édition et les pages qu'elle est seule à référencer")
+    remove.add_argument("edition")
+    sub.add_parser("prune", help="supprime les pages qu'aucune édition ne référence")
+    extract = sub.add_parser("extract", help="réécrit les pages d'une édition dans un répertoire")
+    extract.add_argument("output_dir")
+    extract.add_argument("--edition", help="édition (la plus récente par défaut)")
+    args = parser.parse_args()
+
+    store = PageStore(args.store)
+    if args.command == "add":
+        stats = import_directory(store, args.edition, args.input_dir, CATEGORIES, args.codec)
+        print(f"{stats['pages']} pages ({stats['raw_bytes'] / 1024:.0f} Ko): {stats['stored']} stockées, "
+              f"{stats['shared']} déjà présentes, {stats['added_bytes'] / 1024:.0f} Ko ajoutés -> {store.pack_path()}")
+    elif args.command == "list":
+        counts = store.refcounts()
+        for edition in store.editions():
+            digests = {digest for _, _, digest in store.index(edition)["pages"]}
+            own = sum(1 for digest in digests if counts[digest] == 1)
+            print(f"{edition}: {len(store.index(edition)['pages'])} pages, {len(digests)} distinctes "
+                  f"dont {own} propres à l'édition")
+        print(f"{len(store.blobs()['blobs'])} pages stockées, {len(counts)} référencées, "
+              f"total sur disque: {store.footprint() / 1024:.0f} Ko", file=sys.stderr)
+    elif args.command in ("remove", "prune"):
+        stats = store.remove_edition(args.edition) if args.command == "remove" else store.prune()
+        print(f"{stats['removed']} pages supprimées, {stats['kept']} conservées, "
+              f"{store.footprint() / 1024:.0f} Ko sur disque")
+    elif args.command == "extract":
+        for cat, name, ref in store.pages(args.edition):
+            os.makedirs(os.path.join(args.output_dir, cat), exist_ok=True)
+            with open(os.path.join(args.output_dir, cat, name), "wb") as f:
+                f.write(read_page(ref))
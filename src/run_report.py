@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import cProfile
+import platform
+from contextlib import contextmanager
+from collections import Counter
+
+# === Instrumentation des exécutions ===
+#
+# RunReport collecte les durées par étape, les mesures par page ou par espace,
+# des compteurs et les problèmes rencontrés, puis les écrit en un rapport
+# JSON. NullReport offre la même interface sans rien enregistrer, pour que
+# les appels restent gratuits quand --profile n'est pas demandé.
+
+
+class NullReport:
+    enabled = False
+
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    @contextmanager
+    def profiled(self):
+        yield
+
+    def record(self, section, **values):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def problem(self, kind, message):
+        pass
+
+    def save(self):
+        pass
+
+
+class RunReport(NullReport):
+    enabled = True
+
+    def __init__(self, name, path, cprofile_path=None):
+        self.name = name
+        self.path = path
+        self.cprofile_path = cprofile_path
+        self.profiler = cProfile.Profile() if cprofile_path else None
+        self.started = time.time()
+        self.stages = {}
+        self.sections = {}
+        self.counters = Counter()
+        self.problems = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0) + time.perf_counter() - start
+
+    @contextmanager
+    def profiled(self):
+        """Active cProfile autour des boucles critiques si un fichier de sortie est demandé."""
+        if self.profiler is None:
+            yield
+            return
+        self.profiler.enable()
+        try:
+            yield
+        finally:
+            self.profiler.disable()
+
+    def record(self, section, **values):
+        self.sections.setdefault(section, []).append(values)
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def problem(self, kind, message):
+        self.counters[f"problems.{kind}"] += 1
+        self.problems.append({"kind": kind, "message": message})
+
+    def save(self):
+        report = {
+            "name": self.name,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "python": platform.python_version(),
+            "total_s": time.time() - self.started,
+            "stages_s": self.stages,
+            "counters": dict(self.counters),
+            "problems": self.problems,
+        }
+        report.update(self.sections)
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Rapport d'exécution écrit dans {self.path}")
+
+        if self.profiler is not None:
+            os.makedirs(os.path.dirname(self.cprofile_path) or ".", exist_ok=True)
+            self.profiler.dump_stats(self.cprofile_path)
+            print(f"Profil cProfile écrit dans {self.cprofile_path}")
+
+
+def make_report(name, path, cprofile_path=None):
+    if path is None and cprofile_path is None:
+        return NullReport()
+    return RunReport(name, path or f"../reports/{name}_run_report.json", cprofile_path)
+
+
+class RecordingReport(NullReport):
+    """Enregistre les appels faits dans un processus fils, rejoués ensuite sur le rapport du parent."""
+
+    def __init__(self):
+        self.calls = []
+
+    def record(self, section, **values):
+        self.calls.append(("record", (section,), values))
+
+    def count(self, name, n=1):
+        self.calls.append(("count", (name, n), {}))
+
+    def problem(self, kind, message):
+        self.calls.append(("problem", (kind, message), {}))
+
+
+def replay(calls, report):
+    for method, args, kwargs in calls:
+        getattr(report, method)(*args, **kwargs)
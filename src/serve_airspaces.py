@@ -0,0 +1,261 @@
+import gzip
+import json
+import math
+import time
+import hashlib
+import argparse
+import itertools
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import airspace_query as aq
+from generate_kml_from_json import add_volume_to_kml, class_styles
+from geometry_store import geojson_feature
+from kml_stream import KML_HEADER, KML_FOOTER, kml_name
+
+# === Serveur local des volumes par fenêtre, catégorie et altitude ===
+#
+# Les couches sont résolues une fois au démarrage (airspaces.json ou
+# géométrie binaire de geometry_store.py) et indexées par la grille
+# d'airspace_query.py. Le fragment KML (volume compact, style partagé par
+# classe) et la Feature GeoJSON de chaque couche sont aussi calculés au
+# démarrage: une réponse n'est qu'une concaténation de fragments.
+#
+#   GET /airspaces.geojson?bbox=OUEST,SUD,EST,NORD&category=AD-2-AERODROMES&lower=0&upper=3000
+#   GET /airspaces.kml?bbox=...          mêmes filtres, document KML
+#   GET /stats                           couches, requêtes, cache
+#
+# Altitudes en mètres: une couche est gardée si [plancher, plafond] coupe
+# [lower, upper]. La fenêtre est comparée aux emprises des couches.
+#
+# Les réponses sont gardées dans un cache LRU borné en entrées et en octets,
+# indexé par le format, l'encodage et la liste des couches retenues: deux
+# fenêtres voisines qui donnent les mêmes couches partagent la même réponse.
+# L'ETag est l'empreinte de cette clé, suffixée de -gz pour la réponse
+# compressée (réponse 304 si le client l'a déjà); Vary: Accept-Encoding
+# évite qu'un cache intermédiaire serve une variante à la place de l'autre.
+
+FORMATS = {
+    "geojson": "application/geo+json",
+    "kml": "application/vnd.google-earth.kml+xml",
+}
+
+
+class ResponseCache:
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            body = self.entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        if self.max_entries <= 0 or len(body) > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self.entries[key] = body
+            self.size += len(body)
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+
+class AirspaceLayers:
+    def __init__(self, index):
+        self.index = index
+        self.categories = sorted({layer["category"] for layer in index.layers})
+        self.features = [json.dumps(geojson_feature(layer), ensure_ascii=False) for layer in index.layers]
+        self.placemarks = []
+        for layer in index.layers:
+            kml_buffer = []
+            add_volume_to_kml(kml_buffer, layer["coords"], layer["lower"], layer["upper"], name=layer["ident"],
+                              airspace_class=layer["class"])
+            self.placemarks.append("".join(kml_buffer))
+
+    def select(self, bbox=None, lower=None, upper=None, categories=None):
+        if bbox is None:
+            bbox = (-180.0, -90.0, 180.0, 90.0)
+        west, south, east, north = bbox
+        return self.index.query_bbox(south, west, north, east, lower, upper, categories)
+
+    def geojson(self, ids):
+        return '{"type":"FeatureCollection","features":[' + ",".join(self.features[k] for k in ids) + "]}"
+
+    def kml(self, ids):
+        # même arborescence que les KMZ: dossier par catégorie puis par espace
+        parts = [KML_HEADER, class_styles()]
+        layers = self.index.layers
+        for cat, by_cat in itertools.groupby(ids, key=lambda k: layers[k]["category"]):
+            parts.append(f"<Folder>{kml_name(cat)}")
+            for airspace, by_airspace in itertools.groupby(by_cat, key=lambda k: layers[k]["airspace"]):
+                parts.append(f"<Folder>{kml_name(airspace)}")
+                parts.extend(self.placemarks[k] for k in by_airspace)
+                parts.append("</Folder>")
+            parts.append("</Folder>")
+        parts.append(KML_FOOTER)
+        return "".join(parts)
+
+
+def parse_query(query):
+    """(bbox, lower, upper, catégories) depuis la chaîne de requête; ValueError si un paramètre est invalide."""
+    params = parse_qs(query)
+
+    bbox = None
+    if "bbox" in params:
+        bbox = tuple(float(v) for v in params["bbox"][0].split(","))
+        if len(bbox) != 4:
+            raise ValueError("bbox attend OUEST,SUD,EST,NORD")
+        if not all(math.isfinite(v) for v in bbox):
+            raise ValueError("bbox attend des nombres finis")
+        if bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+            raise ValueError("bbox vide")
+
+    lower = float(params["lower"][0]) if "lower" in params else None
+    upper = float(params["upper"][0]) if "upper" in params else None
+    # nan et inf passent float() mais pas la grille de l'index
+    if not all(math.isfinite(v) for v in (lower, upper) if v is not None):
+        raise ValueError("lower et upper attendent des nombres finis")
+
+    categories = None
+    if "category" in params:
+        categories = frozenset(c for value in params["category"] for c in value.split(",") if c)
+    return bbox, lower, upper, categories
+
+
+class AirspaceHandler(BaseHTTPRequestHandler):
+    # connexions persistantes: toutes les réponses ont un Content-Length
+    protocol_version = "HTTP/1.1"
+    # en-têtes et corps sont écrits séparément: sans TCP_NODELAY, chaque réponse attend l'ACK retardé du client
+    disable_nagle_algorithm = True
+    airspaces = None
+    cache = None
+    version = ""
+    started = 0.0
+    # compteur propre à chaque serveur (make_server), incrémenté par tous ses threads
+    requests_lock = None
+    requests_served = 0
+
+    def do_GET(self):
+        with self.requests_lock:
+            type(self).requests_served += 1
+        url = urlsplit(self.path)
+        if url.path == "/stats":
+            self.send_body(json.dumps(self.stats()).encode("utf-8"), "application/json")
+            return
+
+        name, _, fmt = url.path.lstrip("/").rpartition(".")
+        if name != "airspaces" or fmt not in FORMATS:
+            self.send_error(404)
+            return
+        try:
+            bbox, lower, upper, categories = parse_query(url.query)
+        except ValueError as e:
+            # le message peut contenir des caractères hors latin-1: dans le corps, pas dans la ligne de statut
+            self.send_error(400, "Bad Request", explain=str(e))
+            return
+
+        ids = self.airspaces.select(bbox, lower, upper, categories)
+        compressed = "gzip" in self.headers.get("Accept-Encoding", "")
+        key = (fmt, compressed, tuple(ids))
+        digest = hashlib.sha1(f"{self.version}:{fmt}:{ids}".encode("utf-8")).hexdigest()
+        etag = f'"{digest}-gz"' if compressed else f'"{digest}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = self.cache.get(key)
+        if body is None:
+            text = self.airspaces.geojson(ids) if fmt == "geojson" else self.airspaces.kml(ids)
+            body = text.encode("utf-8")
+            if compressed:
+                body = gzip.compress(body, compresslevel=5)
+            self.cache.put(key, body)
+
+        headers = {"ETag": etag, "Vary": "Accept-Encoding", "X-Layers": str(len(ids))}
+        if compressed:
+            headers["Content-Encoding"] = "gzip"
+        self.send_body(body, FORMATS[fmt], headers)
+
+    def send_body(self, body, content_type, headers=None):
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stats(self):
+        return {
+            "layers": len(self.airspaces.index),
+            "categories": self.airspaces.categories,
+            "requests": self.requests_served,
+            "uptime_s": round(time.time() - self.started, 1),
+            "cache": self.cache.stats(),
+        }
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(airspaces, host="127.0.0.1", port=0, cache_entries=512, cache_bytes=64 * 1024 * 1024, version=""):
+    handler = type("AirspaceLayersHandler", (AirspaceHandler,), {
+        "airspaces": airspaces,
+        "cache": ResponseCache(cache_entries, cache_bytes),
+        "version": version,
+        "started": time.time(),
+        "requests_lock": threading.Lock(),
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur local des espaces aériens par fenêtre, en KML ou GeoJSON")
+    parser.add_argument("--airspaces", default="../extracts/airspaces.json")
+    parser.add_argument("--geometry", metavar="PATH", help="géométrie binaire de geometry_store.py au lieu du JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8390)
+    parser.add_argument("--cell-size", type=float, default=0.25, help="taille des cellules de la grille en degrés")
+    parser.add_argument("--cache-entries", type=int, default=512, help="réponses gardées en cache (0 = sans cache)")
+    parser.add_argument("--cache-mb", type=float, default=64, help="taille maximale du cache des réponses en Mo")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    source = args.geometry or args.airspaces
+    index = aq.load_index(args.geometry, args.airspaces, cell_size=args.cell_size)
+    airspaces = AirspaceLayers(index)
+    with open(source, "rb") as f:
+        version = hashlib.sha256(f.read()).hexdigest()[:16]
+
+    server = make_server(airspaces, args.host, args.port, args.cache_entries, int(args.cache_mb * 1024 * 1024), version)
+    print(f"{len(index)} couches chargées en {time.perf_counter() - start:.2f}s, "
+          f"servies sur http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
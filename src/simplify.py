@@ -0,0 +1,249 @@
+import math
+
+from border_index import BorderIndex
+
+
+# === Simplification des portions de frontière d'un contour ===
+#
+# Douglas-Peucker sur le parcours d'une frontière entre les deux points publiés
+# qui l'encadrent, ces extrémités restant fixes. Les distances sont calculées en mètres dans
+# une projection équirectangulaire locale. Le résultat ne dépend que de la
+# frontière et des deux points: les zones voisines qui suivent la même
+# portion reçoivent les mêmes sommets, sans trou ni chevauchement entre elles.
+# Un raccourci n'est accepté que s'il ne coupe aucune arête de la frontière
+# ni un autre raccourci; les arêtes candidates sont prises dans la grille de
+# BorderIndex, autour du raccourci. Une fois l'anneau de la zone assemblé, une
+# portion dont un raccourci couperait une autre arête de l'anneau reprend ses
+# sommets d'origine.
+
+EARTH_M_PER_DEG = 111320.0
+
+
+def project(coords):
+    lat0 = sum(lat for lat, _ in coords) / len(coords)
+    kx = EARTH_M_PER_DEG * math.cos(math.radians(lat0))
+    return [(lon * kx, lat * EARTH_M_PER_DEG) for lat, lon in coords]
+
+
+def point_segment_distance(p, a, b):
+    dx = b[0] - a[0]
+    dy = b[1] - a[1]
+    length2 = dx * dx + dy * dy
+    if length2 == 0:
+        return math.hypot(p[0] - a[0], p[1] - a[1])
+    t = max(0.0, min(1.0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / length2))
+    return math.hypot(p[0] - a[0] - t * dx, p[1] - a[1] - t * dy)
+
+
+def orientation(a, b, c):
+    value = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    return (value > 0) - (value < 0)
+
+
+def segments_cross(a, b, c, d):
+    """Intersection propre ou contact entre [ab] et [cd]."""
+    if max(a[0], b[0]) < min(c[0], d[0]) or max(c[0], d[0]) < min(a[0], b[0]):
+        return False
+    if max(a[1], b[1]) < min(c[1], d[1]) or max(c[1], d[1]) < min(a[1], b[1]):
+        return False
+    o1 = orientation(a, b, c)
+    o2 = orientation(a, b, d)
+    o3 = orientation(c, d, a)
+    o4 = orientation(c, d, b)
+    if o1 != o2 and o3 != o4:
+        return True
+    # points alignés: chevauchement sur la droite support
+    if o1 == o2 == o3 == o4 == 0:
+        return True
+    return False
+
+
+def simplify_polyline(points, tolerance_m, crosses):
+    """Indices conservés de points (projetés en mètres), extrémités fixes; crosses(i0, i1) refuse un raccourci."""
+    last = len(points) - 1
+    keep = {0, last}
+    shortcuts = []
+    stack = [(0, last)]
+    while stack:
+        i0, i1 = stack.pop()
+        if i1 - i0 < 2:
+            continue
+        a = points[i0]
+        b = points[i1]
+        worst = i0 + 1
+        worst_distance = -1.0
+        for k in range(i0 + 1, i1):
+            d = point_segment_distance(points[k], a, b)
+            if d > worst_distance:
+                worst, worst_distance = k, d
+        if (worst_distance <= tolerance_m and not crosses(i0, i1)
+                and not any(segments_cross(a, b, points[j0], points[j1])
+                            for j0, j1 in shortcuts if j0 != i1 and j1 != i0)):
+            shortcuts.append((i0, i1))
+            continue
+        keep.add(worst)
+        stack.append((i0, worst))
+        stack.append((worst, i1))
+    return sorted(keep)
+
+
+def simplify_border_walk(border, start, end, i0, i1, tolerance_m):
+    """Sommets simplifiés de start, du parcours de border (BorderIndex) de i0 à i1, puis de end."""
+    indices = border.walk_indices(i0, i1)
+    polyline = [start] + [border.points[i] for i in indices] + [end]
+    if tolerance_m <= 0:
+        return polyline
+
+    def crosses(k0, k1):
+        a = polyline[k0]
+        b = polyline[k1]
+        # sommets de la frontière remplacés par le raccourci (polyline[k] est le sommet indices[k - 1])
+        replaced = set(indices[max(k0 - 1, 0):k1])
+        for u, v in border.edges_near(a, b):
+            if u in replaced or v in replaced:
+                continue
+            if segments_cross(a, b, border.points[u], border.points[v]):
+                return True
+        return False
+
+    return [polyline[k] for k in simplify_polyline(project(polyline), tolerance_m, crosses)]
+
+
+def crosses_ring(index, a, b):
+    """[ab] coupe-t-il une arête de l'anneau indexé (BorderIndex) sans sommet commun avec lui ?"""
+    for u, v in index.edges_near(a, b):
+        p = index.points[u]
+        q = index.points[v]
+        if p not in (a, b) and q not in (a, b) and segments_cross(a, b, p, q):
+            return True
+    return False
+
+
+def restore_crossing_spans(coords, spans):
+    """coords (lat, lon) dont les portions spans [(début, fin, sommets d'origine)] sont simplifiées; renvoie
+    l'anneau où les portions dont une nouvelle arête couperait l'anneau reprennent leurs sommets d'origine."""
+    if len(coords) < 4:
+        return coords
+
+    pieces = []
+    position = 0
+    for k, (start, end, original) in enumerate(spans):
+        pieces.append((coords[position:start], None))
+        pieces.append((coords[start:end + 1], k))
+        position = end + 1
+    pieces.append((coords[position:], None))
+
+    def assemble(restored):
+        ring = []
+        # arêtes de chaque portion: de celle qui y entre à celle qui en sort, une seule si elle est vide
+        edges = []
+        for points, k in pieces:
+            if k in restored:
+                points = spans[k][2]
+            if k is not None:
+                edges.append((k, len(ring) - 1, len(ring) + len(points)))
+            ring.extend(points)
+        return ring, edges
+
+    unsimplified, _ = assemble(set(range(len(spans))))
+    original_edges = set(zip(unsimplified, unsimplified[1:]))
+
+    restored = set()
+    while True:
+        ring, edges = assemble(restored)
+        # le point de fermeture éventuel est retiré par BorderIndex: les positions restent celles de ring
+        index = BorderIndex([ring])
+        n = len(index)
+        crossing = set()
+        for k, first, last in edges:
+            if k in restored:
+                continue
+            for j in range(first, last):
+                a = index.points[j % n]
+                b = index.points[(j + 1) % n]
+                if (a, b) in original_edges or not crosses_ring(index, a, b):
+                    continue
+                crossing.add(k)
+                break
+        if not crossing - restored:
+            return ring
+        restored |= crossing
+
+
+if __name__ == "__main__":
+    import sys
+    import json
+    import time
+    import argparse
+
+    import coord_parser
+    import generate_kml_from_json as kmlgen
+
+    # === Vérification sur extracts/airspaces.json ===
+    # Chaque contour est résolu sans puis avec simplification; les raccourcis
+    # sont comparés à toutes les arêtes de l'anneau (recherche exhaustive, sans
+    # la grille) et chaque portion de frontière doit se retrouver telle que
+    # simplifiée une fois pour toutes, sauf si elle a été rétablie.
+    parser = argparse.ArgumentParser(description="Vérification de la simplification des portions de frontière")
+    parser.add_argument("--airspaces", default="../extracts/airspaces.json")
+    parser.add_argument("--data", default="../data/")
+    parser.add_argument("--tolerance", type=float, default=100, help="tolérance de simplification en mètres")
+    args = parser.parse_args()
+
+    with open(args.airspaces, encoding="utf-8") as f:
+        data = json.load(f)
+    programs = []
+    for cat in data:
+        for page in data[cat].values():
+            for airspace in page:
+                for layer in airspace["layers"]:
+                    try:
+                        program = coord_parser.compile_coords(layer["coord"])
+                    except ValueError:
+                        continue
+                    if any(isinstance(op, coord_parser.Border) for op in program.ops):
+                        programs.append(program)
+    borders = {"france": kmlgen.load_france_boundary(f"{args.data}/metropole-version-simplifiee.geojson"),
+               "sea": kmlgen.load_france_boundary(f"{args.data}/EspMar_FR_MT_WGS84.geojson")}
+
+    # premier passage pour remplir les caches d'arcs et de cercles, mesure sur le second
+    for program in programs:
+        kmlgen.resolve_program(program, borders["france"], borders["sea"])
+    start = time.perf_counter()
+    originals = [kmlgen.resolve_program(p, borders["france"], borders["sea"]) for p in programs]
+    original_time = time.perf_counter() - start
+    kmlgen.simplify_tolerance_m = args.tolerance
+    start = time.perf_counter()
+    simplified = [kmlgen.resolve_program(p, borders["france"], borders["sea"]) for p in programs]
+    simplified_time = time.perf_counter() - start
+
+    def contains(ring, span):
+        return any(ring[k:k + len(span)] == span for k in range(len(ring) - len(span) + 1))
+
+    crossings = 0
+    spans = set()
+    restored = 0
+    for program, original, ring in zip(programs, originals, simplified):
+        for op in program.ops:
+            if isinstance(op, coord_parser.Border):
+                spans.add((op.border, min(op.start, op.end), max(op.start, op.end)))
+                span = kmlgen.simplified_border_points(borders[op.border], op.start, op.end, args.tolerance)
+                if not contains(ring, span[1:-1]):
+                    restored += 1
+        edges = set(zip(original, original[1:]))
+        for a, b in zip(ring, ring[1:]):
+            if (a, b) in edges:
+                continue
+            for p, q in zip(ring, ring[1:]):
+                if p not in (a, b) and q not in (a, b) and segments_cross(a, b, p, q):
+                    crossings += 1
+                    print(f"Raccourci sécant {a} -> {b} dans un contour de {len(ring)} sommets")
+                    break
+
+    uses = sum(1 for p in programs for op in p.ops if isinstance(op, coord_parser.Border))
+    print(f"{len(programs)} contours avec frontière, {uses} portions suivies dont {len(spans)} distinctes, "
+          f"{restored} rétablies")
+    print(f"sommets {sum(map(len, originals))} -> {sum(map(len, simplified))} (tolérance {args.tolerance:.0f} m), "
+          f"résolution {original_time * 1000:.0f} ms -> {simplified_time * 1000:.0f} ms, {crossings} raccourcis sécants")
+    if crossings:
+        sys.exit(1)
@@ -0,0 +1,323 @@
+import os
+import gzip
+import json
+import shutil
+import struct
+import hashlib
+import tempfile
+
+# === Archive de tuiles en un seul fichier (format PMTiles v3) ===
+#
+# Les tuiles sont ajoutées dans l'ordre de leur identifiant (courbe de Hilbert
+# par niveau de zoom) et écrites à la suite dans un fichier temporaire; à la
+# fermeture, l'en-tête, le répertoire racine, les métadonnées et les
+# répertoires feuilles sont écrits devant les données. Un client lit une tuile
+# avec deux ou trois requêtes HTTP Range, sans serveur de tuiles.
+#
+# Les tuiles identiques (mer, intérieur d'une FIR) ne sont stockées qu'une
+# fois; des identifiants consécutifs de même contenu partagent une entrée.
+#
+# Disposition (petit-boutiste):
+#   en-tête        127 octets
+#   racine         répertoire compressé, en-tête + racine <= 16 Kio
+#   métadonnées    JSON compressé
+#   feuilles       répertoires compressés
+#   données        tuiles
+
+HEADER_SIZE = 127
+ROOT_MAX_SIZE = 16384 - HEADER_SIZE
+
+COMPRESSION_NONE = 1
+COMPRESSION_GZIP = 2
+TILE_TYPE_MVT = 1
+
+
+def zxy_to_tile_id(z, x, y):
+    """Identifiant PMTiles: tuiles des niveaux inférieurs puis indice de Hilbert dans le niveau z."""
+    acc = ((1 << (2 * z)) - 1) // 3
+    d = 0
+    s = 1 << (z - 1) if z else 0
+    while s > 0:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        d += s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x = s - 1 - (x & (s - 1))
+                y = s - 1 - (y & (s - 1))
+            x, y = y, x
+        s >>= 1
+    return acc + d
+
+
+def tile_id_to_zxy(tile_id):
+    z = 0
+    acc = 0
+    while acc + (1 << (2 * z)) <= tile_id:
+        acc += 1 << (2 * z)
+        z += 1
+    d = tile_id - acc
+    x = y = 0
+    s = 1
+    while s < (1 << z):
+        rx = 1 & (d // 2)
+        ry = 1 & (d ^ rx)
+        if ry == 0:
+            if rx == 1:
+                x = s - 1 - x
+                y = s - 1 - y
+            x, y = y, x
+        x += s * rx
+        y += s * ry
+        d //= 4
+        s <<= 1
+    return z, x, y
+
+
+# --- Encodage des répertoires ---
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def serialize_directory(entries):
+    """entries: [(tile_id, offset, length, run_length)]; run_length 0 = pointeur vers un répertoire feuille."""
+    out = bytearray()
+    write_varint(out, len(entries))
+    previous = 0
+    for tile_id, _, _, _ in entries:
+        write_varint(out, tile_id - previous)
+        previous = tile_id
+    for _, _, _, run_length in entries:
+        write_varint(out, run_length)
+    for _, _, length, _ in entries:
+        write_varint(out, length)
+    for i, (_, offset, _, _) in enumerate(entries):
+        # 0: à la suite de l'entrée précédente
+        if i > 0 and offset == entries[i - 1][1] + entries[i - 1][2]:
+            write_varint(out, 0)
+        else:
+            write_varint(out, offset + 1)
+    return gzip.compress(bytes(out), mtime=0)
+
+
+def deserialize_directory(data):
+    data = gzip.decompress(data)
+    count, pos = read_varint(data, 0)
+    columns = []
+    for _ in range(4):
+        column = []
+        for _ in range(count):
+            value, pos = read_varint(data, pos)
+            column.append(value)
+        columns.append(column)
+    deltas, run_lengths, lengths, offsets = columns
+    entries = []
+    tile_id = 0
+    for i in range(count):
+        tile_id += deltas[i]
+        if offsets[i] == 0 and i > 0:
+            offset = entries[-1][1] + entries[-1][2]
+        else:
+            offset = offsets[i] - 1
+        entries.append((tile_id, offset, lengths[i], run_lengths[i]))
+    return entries
+
+
+def build_directories(entries):
+    """(racine, feuilles): toutes les entrées dans la racine si elle tient, sinon des feuilles de taille croissante."""
+    root = serialize_directory(entries)
+    if len(root) <= ROOT_MAX_SIZE:
+        return root, b""
+
+    leaf_size = 4096
+    while True:
+        leaves = bytearray()
+        root_entries = []
+        for start in range(0, len(entries), leaf_size):
+            chunk = entries[start:start + leaf_size]
+            leaf = serialize_directory(chunk)
+            root_entries.append((chunk[0][0], len(leaves), len(leaf), 0))
+            leaves += leaf
+        root = serialize_directory(root_entries)
+        if len(root) <= ROOT_MAX_SIZE:
+            return root, bytes(leaves)
+        leaf_size *= 2
+
+
+# --- En-tête ---
+HEADER_FORMAT = "<7sB" + "Q" * 11 + "BBBBBB" + "iiii" + "Bii"
+
+
+def pack_header(h):
+    return struct.pack(
+        HEADER_FORMAT, b"PMTiles", 3,
+        h["root_offset"], h["root_length"], h["metadata_offset"], h["metadata_length"],
+        h["leaf_offset"], h["leaf_length"], h["data_offset"], h["data_length"],
+        h["addressed_tiles"], h["tile_entries"], h["tile_contents"],
+        1, COMPRESSION_GZIP, h["tile_compression"], h["tile_type"], h["min_zoom"], h["max_zoom"],
+        *(round(v * 1e7) for v in h["bounds"]),
+        h["center_zoom"], *(round(v * 1e7) for v in h["center"]))
+
+
+def unpack_header(data):
+    fields = struct.unpack(HEADER_FORMAT, data[:HEADER_SIZE])
+    if fields[0] != b"PMTiles" or fields[1] != 3:
+        raise ValueError("Fichier PMTiles v3 attendu")
+    names = ["root_offset", "root_length", "metadata_offset", "metadata_length", "leaf_offset", "leaf_length",
+             "data_offset", "data_length", "addressed_tiles", "tile_entries", "tile_contents", "clustered",
+             "internal_compression", "tile_compression", "tile_type", "min_zoom", "max_zoom"]
+    h = dict(zip(names, fields[2:19]))
+    h["bounds"] = tuple(v / 1e7 for v in fields[19:23])
+    h["center_zoom"] = fields[23]
+    h["center"] = tuple(v / 1e7 for v in fields[24:26])
+    return h
+
+
+class TileArchiveWriter:
+    def __init__(self, path, tile_type=TILE_TYPE_MVT, tile_compression=COMPRESSION_GZIP):
+        self.path = path
+        self.tile_type = tile_type
+        self.tile_compression = tile_compression
+        self.data = tempfile.TemporaryFile()
+        self.data_length = 0
+        self.entries = []
+        self.contents = {}
+        self.addressed = 0
+        self.last_id = -1
+        self.zooms = set()
+
+    def add_tile(self, z, x, y, tile):
+        """tile: contenu déjà compressé selon tile_compression; les identifiants doivent être croissants."""
+        tile_id = zxy_to_tile_id(z, x, y)
+        if tile_id <= self.last_id:
+            raise ValueError(f"Tuile {z}/{x}/{y} hors de l'ordre des identifiants")
+        self.last_id = tile_id
+        self.addressed += 1
+        self.zooms.add(z)
+
+        digest = hashlib.sha256(tile).digest()
+        location = self.contents.get(digest)
+        if location is None:
+            location = (self.data_length, len(tile))
+            self.contents[digest] = location
+            self.data.write(tile)
+            self.data_length += len(tile)
+
+        # même contenu que la tuile précédente, identifiant suivant: l'entrée est prolongée
+        if self.entries:
+            last_id, last_offset, last_length, run_length = self.entries[-1]
+            if (last_offset, last_length) == location and last_id + run_length == tile_id:
+                self.entries[-1] = (last_id, last_offset, last_length, run_length + 1)
+                return
+        self.entries.append((tile_id, location[0], location[1], 1))
+
+    def close(self, metadata, bounds, center_zoom=None):
+        """bounds: (ouest, sud, est, nord) en degrés; écrit le fichier et renvoie sa taille."""
+        root, leaves = build_directories(self.entries)
+        metadata_bytes = gzip.compress(json.dumps(metadata, ensure_ascii=False).encode("utf-8"), mtime=0)
+        min_zoom = min(self.zooms, default=0)
+        max_zoom = max(self.zooms, default=0)
+
+        header = {
+            "root_offset": HEADER_SIZE,
+            "root_length": len(root),
+            "metadata_offset": HEADER_SIZE + len(root),
+            "metadata_length": len(metadata_bytes),
+            "leaf_offset": HEADER_SIZE + len(root) + len(metadata_bytes),
+            "leaf_length": len(leaves),
+            "data_offset": HEADER_SIZE + len(root) + len(metadata_bytes) + len(leaves),
+            "data_length": self.data_length,
+            "addressed_tiles": self.addressed,
+            "tile_entries": len(self.entries),
+            "tile_contents": len(self.contents),
+            "tile_compression": self.tile_compression,
+            "tile_type": self.tile_type,
+            "min_zoom": min_zoom,
+            "max_zoom": max_zoom,
+            "bounds": bounds,
+            "center_zoom": center_zoom if center_zoom is not None else min_zoom,
+            "center": ((bounds[0] + bounds[2]) / 2, (bounds[1] + bounds[3]) / 2),
+        }
+
+        with open(self.path, "wb") as f:
+            f.write(pack_header(header))
+            f.write(root)
+            f.write(metadata_bytes)
+            f.write(leaves)
+            self.data.seek(0)
+            shutil.copyfileobj(self.data, f)
+        self.data.close()
+        return os.path.getsize(self.path)
+
+
+class TileArchiveReader:
+    def __init__(self, path):
+        self.f = open(path, "rb")
+        self.header = unpack_header(self.f.read(HEADER_SIZE))
+
+    def read(self, offset, length):
+        self.f.seek(offset)
+        return self.f.read(length)
+
+    def metadata(self):
+        h = self.header
+        return json.loads(gzip.decompress(self.read(h["metadata_offset"], h["metadata_length"])))
+
+    def get_tile(self, z, x, y):
+        """Contenu stocké de la tuile (compressé selon tile_compression), None si elle est absente."""
+        tile_id = zxy_to_tile_id(z, x, y)
+        h = self.header
+        offset, length = h["root_offset"], h["root_length"]
+        # racine puis au plus quelques niveaux de feuilles
+        for _ in range(4):
+            entries = deserialize_directory(self.read(offset, length))
+            entry = find_entry(entries, tile_id)
+            if entry is None:
+                return None
+            _, entry_offset, entry_length, run_length = entry
+            if run_length > 0:
+                return self.read(h["data_offset"] + entry_offset, entry_length)
+            offset, length = h["leaf_offset"] + entry_offset, entry_length
+        return None
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def find_entry(entries, tile_id):
+    lo, hi = 0, len(entries) - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if entries[mid][0] < tile_id:
+            lo = mid + 1
+        elif entries[mid][0] > tile_id:
+            hi = mid - 1
+        else:
+            return entries[mid]
+    # entrée précédente: une plage (run_length) ou une feuille qui commence avant tile_id
+    if hi >= 0:
+        entry = entries[hi]
+        if entry[3] == 0 or tile_id - entry[0] < entry[3]:
+            return entry
+    return None
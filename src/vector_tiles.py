@@ -0,0 +1,356 @@
+import math
+import gzip
+import time
+import argparse
+from collections import defaultdict
+
+import airspace_query as aq
+from simplify import point_segment_distance
+from tile_archive import TileArchiveWriter, write_varint, zxy_to_tile_id
+
+# === Export des volumes en tuiles vectorielles (Mapbox Vector Tile) ===
+#
+# Les couches résolues (les mêmes polygones et limites que add_zone_to_kml)
+# sont projetées une fois en Web Mercator, puis pour chaque niveau de zoom:
+# simplifiées (Douglas-Peucker, tolérance en unités de tuile, donc plus
+# grossière aux petits zooms), découpées sur chaque tuile avec une marge et
+# encodées en MVT, une couche MVT par catégorie. Classe, identifiants et
+# limites verticales en mètres sont des attributs des entités.
+#
+# Les tuiles sont calculées par lots dans des processus fils (-j N) et
+# écrites dans l'ordre des identifiants dans une archive PMTiles
+# (tile_archive.py), compressées en gzip.
+
+EXTENT = 4096
+BUFFER = 64
+MAX_LAT = 85.05112878
+
+LAYER_FIELDS = {"ident": "String", "airspace": "String", "class": "String", "lower_m": "Number", "upper_m": "Number"}
+
+
+# --- Projection ---
+def mercator(lat, lon):
+    """(x, y) Web Mercator ramenés à [0, 1], y vers le sud."""
+    lat = max(-MAX_LAT, min(MAX_LAT, lat))
+    s = math.sin(math.radians(lat))
+    return (lon + 180.0) / 360.0, 0.5 - math.log((1 + s) / (1 - s)) / (4 * math.pi)
+
+
+def project_layer(layer):
+    ring = [mercator(lat, lon) for lat, lon in layer["coords"]]
+    if ring[0] != ring[-1]:
+        ring.append(ring[0])
+    return ring
+
+
+# --- Simplification par zoom ---
+def simplify_projected(ring, tolerance):
+    """Douglas-Peucker sur un anneau fermé (premier point répété à la fin)."""
+    n = len(ring)
+    if tolerance <= 0 or n <= 4:
+        return ring
+    # coupé au point le plus éloigné du premier: les deux moitiés ont une corde non nulle
+    x0, y0 = ring[0]
+    far = max(range(n), key=lambda i: (ring[i][0] - x0) ** 2 + (ring[i][1] - y0) ** 2)
+    keep = [False] * n
+    keep[0] = keep[far] = keep[n - 1] = True
+    stack = [(0, far), (far, n - 1)]
+    while stack:
+        i0, i1 = stack.pop()
+        if i1 - i0 < 2:
+            continue
+        a = ring[i0]
+        b = ring[i1]
+        worst = i0 + 1
+        worst_distance = -1.0
+        for k in range(i0 + 1, i1):
+            d = point_segment_distance(ring[k], a, b)
+            if d > worst_distance:
+                worst, worst_distance = k, d
+        if worst_distance > tolerance:
+            keep[worst] = True
+            stack.append((i0, worst))
+            stack.append((worst, i1))
+    return [p for p, kept in zip(ring, keep) if kept]
+
+
+# --- Découpage sur la tuile (Sutherland-Hodgman) ---
+def clip_axis(points, axis, value, keep_greater):
+    out = []
+    if not points:
+        return out
+    previous = points[-1]
+    previous_in = previous[axis] >= value if keep_greater else previous[axis] <= value
+    for p in points:
+        p_in = p[axis] >= value if keep_greater else p[axis] <= value
+        if p_in != previous_in:
+            t = (value - previous[axis]) / (p[axis] - previous[axis])
+            other = 1 - axis
+            crossing = [0.0, 0.0]
+            crossing[axis] = value
+            crossing[other] = previous[other] + t * (p[other] - previous[other])
+            out.append(tuple(crossing))
+        if p_in:
+            out.append(p)
+        previous, previous_in = p, p_in
+    return out
+
+
+def clip_ring(points, x0, y0, x1, y1):
+    """Anneau ouvert (sans point de fermeture) découpé sur la boîte [x0, x1] x [y0, y1]."""
+    points = clip_axis(points, 0, x0, True)
+    points = clip_axis(points, 0, x1, False)
+    points = clip_axis(points, 1, y0, True)
+    return clip_axis(points, 1, y1, False)
+
+
+def tile_ring(points, x0, y0, scale):
+    """Coordonnées entières dans la tuile, sommets confondus retirés, anneau extérieur de surface positive."""
+    ring = []
+    for x, y in points:
+        p = (round((x - x0) * scale), round((y - y0) * scale))
+        if not ring or p != ring[-1]:
+            ring.append(p)
+    if len(ring) > 1 and ring[0] == ring[-1]:
+        ring.pop()
+    if len(ring) < 3:
+        return None
+    area = sum(ring[i - 1][0] * ring[i][1] - ring[i][0] * ring[i - 1][1] for i in range(len(ring)))
+    if area == 0:
+        return None
+    # MVT: extérieur dans le sens horaire à l'écran (y vers le bas), soit une surface positive
+    return ring if area > 0 else ring[::-1]
+
+
+# --- Encodage protobuf ---
+def zigzag(n):
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+
+def command(command_id, count):
+    return (command_id & 0x7) | (count << 3)
+
+
+def ring_commands(ring):
+    x, y = ring[0]
+    commands = [command(1, 1), zigzag(x), zigzag(y), command(2, len(ring) - 1)]
+    for px, py in ring[1:]:
+        commands.append(zigzag(px - x))
+        commands.append(zigzag(py - y))
+        x, y = px, py
+    commands.append(command(7, 1))
+    return commands
+
+
+def pb_key(out, field, wire_type):
+    write_varint(out, (field << 3) | wire_type)
+
+
+def pb_uint(out, field, value):
+    pb_key(out, field, 0)
+    write_varint(out, value)
+
+
+def pb_bytes(out, field, data):
+    pb_key(out, field, 2)
+    write_varint(out, len(data))
+    out += data
+
+
+def pb_packed(out, field, values):
+    packed = bytearray()
+    for value in values:
+        write_varint(packed, value)
+    pb_bytes(out, field, packed)
+
+
+def pb_value(value):
+    out = bytearray()
+    if isinstance(value, str):
+        pb_bytes(out, 1, value.encode("utf-8"))
+    elif value >= 0:
+        pb_uint(out, 5, value)
+    else:
+        pb_uint(out, 6, zigzag(value))
+    return out
+
+
+def encode_layer(name, features):
+    """features: [(id, commandes de géométrie, attributs)]."""
+    keys = {}
+    values = {}
+    body = bytearray()
+    pb_uint(body, 15, 2)
+    pb_bytes(body, 1, name.encode("utf-8"))
+    for feature_id, commands, properties in features:
+        tags = []
+        for key, value in properties.items():
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value), value), len(values)))
+        feature = bytearray()
+        pb_uint(feature, 1, feature_id)
+        pb_packed(feature, 2, tags)
+        pb_uint(feature, 3, 3)  # POLYGON
+        pb_packed(feature, 4, commands)
+        pb_bytes(body, 2, feature)
+    for key in keys:
+        pb_bytes(body, 3, key.encode("utf-8"))
+    for _, value in values:
+        pb_bytes(body, 4, pb_value(value))
+    pb_uint(body, 5, EXTENT)
+    return body
+
+
+# === Calcul des tuiles dans des processus fils ===
+worker_layers = None
+
+def init_worker(rings, properties, categories, tolerance):
+    global worker_layers
+    worker_layers = {"rings": rings, "properties": properties, "categories": categories, "tolerance": tolerance,
+                     "simplified": {}}
+
+def simplified_ring(k, z):
+    key = (k, z)
+    cache = worker_layers["simplified"]
+    if key not in cache:
+        ring = simplify_projected(worker_layers["rings"][k], worker_layers["tolerance"] / (EXTENT << z))
+        cache[key] = ring[:-1]
+    return cache[key]
+
+def render_tile(z, x, y, ids):
+    scale = EXTENT << z
+    margin = BUFFER / scale
+    x0, y0 = x / (1 << z), y / (1 << z)
+    x1, y1 = (x + 1) / (1 << z), (y + 1) / (1 << z)
+
+    by_category = defaultdict(list)
+    for k in ids:
+        points = simplified_ring(k, z)
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        # anneau entièrement dans la tuile et sa marge: pas de découpage
+        if min(xs) < x0 - margin or max(xs) > x1 + margin or min(ys) < y0 - margin or max(ys) > y1 + margin:
+            points = clip_ring(points, x0 - margin, y0 - margin, x1 + margin, y1 + margin)
+        ring = tile_ring(points, x0, y0, scale) if points else None
+        if ring is None:
+            continue
+        by_category[worker_layers["categories"][k]].append((k + 1, ring_commands(ring), worker_layers["properties"][k]))
+
+    if not by_category:
+        return None
+    tile = bytearray()
+    for cat in sorted(by_category):
+        pb_bytes(tile, 3, encode_layer(cat, by_category[cat]))
+    # mtime fixe: deux tuiles de même contenu donnent les mêmes octets (dédoublonnées dans l'archive)
+    return gzip.compress(bytes(tile), compresslevel=6, mtime=0)
+
+def render_tiles_job(job):
+    z, tiles = job
+    return [(z, x, y, render_tile(z, x, y, ids)) for x, y, ids in tiles]
+
+
+# === Export ===
+def tile_layers(rings, min_zoom, max_zoom):
+    """Par zoom, les tuiles couvertes (avec la marge) par l'emprise de chaque couche, dans l'ordre des identifiants."""
+    extents = []
+    for ring in rings:
+        xs = [p[0] for p in ring]
+        ys = [p[1] for p in ring]
+        extents.append((min(xs), min(ys), max(xs), max(ys)))
+
+    for z in range(min_zoom, max_zoom + 1):
+        n = 1 << z
+        margin = BUFFER / (EXTENT << z)
+        tiles = defaultdict(list)
+        for k, (min_x, min_y, max_x, max_y) in enumerate(extents):
+            for x in range(max(0, math.floor((min_x - margin) * n)), min(n - 1, math.floor((max_x + margin) * n)) + 1):
+                for y in range(max(0, math.floor((min_y - margin) * n)), min(n - 1, math.floor((max_y + margin) * n)) + 1):
+                    tiles[(x, y)].append(k)
+        yield z, sorted(tiles.items(), key=lambda item: zxy_to_tile_id(z, *item[0]))
+
+
+def export_tiles(layers, path, min_zoom=4, max_zoom=10, tolerance=8.0, workers=1, chunk=64):
+    """Écrit l'archive; renvoie les compteurs (tuiles, contenus distincts, octets, durée, tuiles et octets par zoom)."""
+    start = time.perf_counter()
+    layers = [layer for layer in layers if len(layer["coords"]) >= 3]
+    rings = [project_layer(layer) for layer in layers]
+    categories = [layer["category"] for layer in layers]
+    properties = [{
+        "ident": layer["ident"],
+        "airspace": layer["airspace"],
+        "class": layer["class"],
+        "lower_m": round(layer["lower"]),
+        "upper_m": round(layer["upper"]),
+    } for layer in layers]
+
+    jobs = []
+    for z, tiles in tile_layers(rings, min_zoom, max_zoom):
+        for i in range(0, len(tiles), chunk):
+            jobs.append((z, [(x, y, ids) for (x, y), ids in tiles[i:i + chunk]]))
+
+    initargs = (rings, properties, categories, tolerance)
+    executor = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=initargs)
+        results = executor.map(render_tiles_job, jobs)
+    else:
+        init_worker(*initargs)
+        results = map(render_tiles_job, jobs)
+
+    writer = TileArchiveWriter(path)
+    per_zoom = defaultdict(lambda: [0, 0])
+    # map() restitue les lots dans l'ordre de soumission, donc des identifiants
+    for batch in results:
+        for z, x, y, data in batch:
+            if data is None:
+                continue
+            writer.add_tile(z, x, y, data)
+            per_zoom[z][0] += 1
+            per_zoom[z][1] += len(data)
+    if executor is not None:
+        executor.shutdown()
+
+    lats = [lat for layer in layers for lat, _ in layer["coords"]]
+    lons = [lon for layer in layers for _, lon in layer["coords"]]
+    metadata = {
+        "name": "eAIP France airspaces",
+        "format": "pbf",
+        "type": "overlay",
+        "vector_layers": [{"id": cat, "fields": LAYER_FIELDS, "minzoom": min_zoom, "maxzoom": max_zoom}
+                          for cat in sorted(set(categories))],
+    }
+    size = writer.close(metadata, (min(lons), min(lats), max(lons), max(lats)))
+    return {
+        "tiles": writer.addressed,
+        "contents": len(writer.contents),
+        "entries": len(writer.entries),
+        "bytes": size,
+        "seconds": time.perf_counter() - start,
+        "zooms": {z: tuple(v) for z, v in sorted(per_zoom.items())},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export des espaces aériens en tuiles vectorielles (archive PMTiles)")
+    parser.add_argument("--airspaces", default="../extracts/airspaces.json")
+    parser.add_argument("--geometry", metavar="PATH", help="géométrie binaire de geometry_store.py au lieu du JSON")
+    parser.add_argument("-o", "--output", default="../extracts/airspaces.pmtiles")
+    parser.add_argument("--min-zoom", type=int, default=4)
+    parser.add_argument("--max-zoom", type=int, default=10)
+    parser.add_argument("--tolerance", type=float, default=8.0,
+                        help=f"tolérance de simplification en unités de tuile (tuile de {EXTENT} unités)")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="nombre de processus de calcul des tuiles")
+    parser.add_argument("--chunk", type=int, default=64, help="nombre de tuiles par lot envoyé à un processus")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    layers = aq.load_layers(args.geometry, args.airspaces)
+    load_s = time.perf_counter() - start
+    stats = export_tiles(layers, args.output, args.min_zoom, args.max_zoom, args.tolerance, args.workers, args.chunk)
+
+    for z, (tiles, size) in stats["zooms"].items():
+        print(f"zoom {z:2d}: {tiles:6d} tuiles {size / 1024:9.1f} Ko")
+    print(f"{stats['tiles']} tuiles ({stats['contents']} contenus distincts, {stats['entries']} entrées), "
+          f"archive {stats['bytes'] / 1024:.1f} Ko, {len(layers)} couches chargées en {load_s:.2f}s, "
+          f"tuiles en {stats['seconds']:.2f}s -> {args.output}")
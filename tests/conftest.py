@@ -0,0 +1,30 @@
+import os
+import json
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DATA = os.path.join(ROOT, "sample_data")
+
+
+@pytest.fixture(scope="session")
+def airspaces():
+    """extracts/airspaces.json, produit par generate_json_from_eaip.py sur sample_data."""
+    with open(os.path.join(ROOT, "extracts", "airspaces.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="session")
+def borders():
+    """(frontière de la France, eaux territoriales) des fichiers de data/."""
+    import generate_kml_from_json as kmlgen
+    data_dir = os.path.join(ROOT, "data")
+    return (kmlgen.load_france_boundary(os.path.join(data_dir, "metropole-version-simplifiee.geojson")),
+            kmlgen.load_france_boundary(os.path.join(data_dir, "EspMar_FR_MT_WGS84.geojson")))
+
+
+@pytest.fixture(scope="session")
+def coord_corpus(airspaces):
+    """Toutes les chaînes coord de extracts/airspaces.json."""
+    return [layer["coord"] for pages in airspaces.values() for page in pages.values() for airspace in page
+            for layer in airspace["layers"]]
@@ -0,0 +1,46 @@
+import pytest
+
+import airspace_query
+from airspace_query import AirspaceIndex, point_in_polygon
+
+
+@pytest.fixture(scope="module")
+def index(airspaces, borders):
+    return AirspaceIndex(airspace_query.layers_from_json(airspaces, *borders))
+
+
+@pytest.fixture(scope="module")
+def points(index):
+    # points tirés sur la métropole, plus le centre de l'emprise de chaque couche pour avoir des volumes touchés
+    import random
+    rng = random.Random(0)
+    points = [(rng.uniform(41, 51.5), rng.uniform(-5.5, 10), rng.uniform(0, 6000)) for _ in range(2000)]
+    for (south, west, north, east), layer in zip(index.bboxes, index.layers):
+        alt = min(max(layer["lower"], 0), 20000)
+        points.append(((south + north) / 2, (west + east) / 2, alt))
+    return points
+
+
+def brute_force(index, lat, lon, alt):
+    return [k for k, layer in enumerate(index.layers)
+            if layer["lower"] <= alt <= layer["upper"] and point_in_polygon(lat, lon, layer["coords"])]
+
+
+def test_grid_query_matches_brute_force(index, points):
+    expected = [brute_force(index, *point) for point in points]
+    assert sum(map(bool, expected)) > len(points) // 4
+    assert [sorted(index.query(*point)) for point in points] == expected
+
+
+def test_batch_query_matches_brute_force(index, points):
+    pytest.importorskip("numpy")
+    lats, lons, alts = zip(*points)
+    assert index.query_batch(lats, lons, alts) == [brute_force(index, *point) for point in points]
+
+
+def test_bbox_query_matches_brute_force(index):
+    for box in [(43, 1, 44, 2), (48.5, 2, 49, 3), (41, -5.5, 51.5, 10), (45.1, 5.7, 45.2, 5.8)]:
+        south, west, north, east = box
+        expected = [k for k, (b_south, b_west, b_north, b_east) in enumerate(index.bboxes)
+                    if not (b_south > north or b_north < south or b_west > east or b_east < west)]
+        assert index.query_bbox(*box) == expected
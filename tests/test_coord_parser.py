@@ -0,0 +1,20 @@
+import coord_parser
+from benchmark_coord_parser import legacy_parse_polygon_coords, new_parse, run
+
+
+def test_compiled_program_matches_legacy_parser(coord_corpus, borders):
+    legacy = run(legacy_parse_polygon_coords, coord_corpus, *borders)
+    new = run(new_parse, coord_corpus, *borders)
+    for coord, (old_coords, old_problems, old_error), (coords, problems, error) in zip(coord_corpus, legacy, new):
+        assert (coords, problems, error is None) == (old_coords, old_problems, old_error is None), coord
+
+
+def test_pair_fast_path_matches_parse_coord_pair(coord_corpus):
+    segments = [segment for coord in coord_corpus for _, segment in coord_parser.tokenize(coord)]
+    matched = 0
+    for segment in segments:
+        match = coord_parser.re_pair.fullmatch(segment)
+        if match:
+            matched += 1
+            assert coord_parser.match_pair(match) == coord_parser.parse_coord_pair(segment), segment
+    assert matched > len(segments) // 2
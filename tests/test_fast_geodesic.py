@@ -0,0 +1,34 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import fast_geodesic
+from geographiclib.geodesic import Geodesic
+
+g = Geodesic.WGS84
+
+
+@pytest.fixture(scope="module")
+def samples():
+    # centres sur la zone de l'eAIP France, rayons jusqu'à 500 km
+    rng = np.random.default_rng(0)
+    n = 2000
+    return rng.uniform(-25, 60, n), rng.uniform(-65, 60, n), rng.uniform(0, 360, n), rng.uniform(10, 500000, n)
+
+
+def test_direct_matches_geographiclib(samples):
+    lat2, lon2 = fast_geodesic.direct(*samples)
+    for args, a, b in zip(zip(*samples), lat2, lon2):
+        ref = g.Direct(*args)
+        assert g.Inverse(a, b, ref["lat2"], ref["lon2"])["s12"] < fast_geodesic.TOLERANCE_M, args
+
+
+def test_inverse_azimuth_matches_geographiclib(samples):
+    lat, lon, azi, dist = samples
+    refs = [g.Direct(*args) for args in zip(lat, lon, azi, dist)]
+    lat2 = np.array([r["lat2"] for r in refs])
+    lon2 = np.array([r["lon2"] for r in refs])
+    azi_back = fast_geodesic.inverse_azimuth(lat, lon, lat2, lon2)
+    for a, b, c, d, computed in zip(lat, lon, lat2, lon2, azi_back):
+        ref = g.Inverse(a, b, c, d)["azi1"] % 360
+        assert abs((computed - ref + 180) % 360 - 180) < fast_geodesic.TOLERANCE_AZI_DEG
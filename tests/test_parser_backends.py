@@ -0,0 +1,14 @@
+import json
+
+import pytest
+
+from conftest import SAMPLE_DATA
+
+
+def test_lxml_backend_gives_same_json_as_html_parser():
+    pytest.importorskip("lxml")
+    import generate_json_from_eaip as eaip
+    reference = eaip.parse_local(SAMPLE_DATA, workers=1, nb_slowest=0, backend="html.parser")
+    fast = eaip.parse_local(SAMPLE_DATA, workers=1, nb_slowest=0, backend="lxml")
+    assert sum(len(pages) for pages in reference.values()) > 0
+    assert json.dumps(fast, ensure_ascii=False, indent=2) == json.dumps(reference, ensure_ascii=False, indent=2)
@@ -0,0 +1,64 @@
+import os
+import random
+
+import pytest
+
+import tile_archive
+from tile_archive import TileArchiveReader, TileArchiveWriter, tile_id_to_zxy, zxy_to_tile_id
+
+# identifiants 0 à 5 de la spécification PMTiles v3
+SPEC_TILE_IDS = [(0, 0, 0), (1, 0, 0), (1, 0, 1), (1, 1, 1), (1, 1, 0), (2, 0, 0)]
+
+
+@pytest.mark.parametrize("tile_id, zxy", list(enumerate(SPEC_TILE_IDS)))
+def test_hilbert_tile_ids(tile_id, zxy):
+    assert zxy_to_tile_id(*zxy) == tile_id
+    assert tile_id_to_zxy(tile_id) == zxy
+
+
+def test_tile_ids_round_trip_and_cover_each_zoom():
+    for z in range(6):
+        ids = sorted(zxy_to_tile_id(z, x, y) for x in range(1 << z) for y in range(1 << z))
+        first = ((1 << (2 * z)) - 1) // 3
+        assert ids == list(range(first, first + (1 << (2 * z))))
+        assert all(zxy_to_tile_id(*tile_id_to_zxy(tile_id)) == tile_id for tile_id in ids)
+
+
+def test_header_round_trip():
+    header = {
+        "root_offset": 127, "root_length": 1000, "metadata_offset": 1127, "metadata_length": 200,
+        "leaf_offset": 1327, "leaf_length": 3000, "data_offset": 4327, "data_length": 1 << 40,
+        "addressed_tiles": 123456, "tile_entries": 2345, "tile_contents": 678,
+        "tile_compression": tile_archive.COMPRESSION_GZIP, "tile_type": tile_archive.TILE_TYPE_MVT,
+        "min_zoom": 4, "max_zoom": 12, "bounds": (-5.5, 41.25, 9.75, 51.5), "center_zoom": 6,
+        "center": (2.125, 46.375),
+    }
+    packed = tile_archive.pack_header(header)
+    assert len(packed) == tile_archive.HEADER_SIZE
+    assert packed[:8] == b"PMTiles\x03"
+    assert tile_archive.unpack_header(packed) == dict(header, clustered=1, internal_compression=2)
+
+
+def test_archive_round_trip_with_leaf_directories(tmp_path):
+    # assez d'entrées irrégulières pour que la racine déborde sur des feuilles, plus des tuiles identiques
+    rng = random.Random(0)
+    path = os.path.join(tmp_path, "tiles.pmtiles")
+    writer = TileArchiveWriter(path)
+    tiles = {}
+    tile_id = zxy_to_tile_id(10, 0, 0)
+    for _ in range(20000):
+        tile_id += rng.randint(1, 3)
+        zxy = tile_id_to_zxy(tile_id)
+        tiles[zxy] = b"mer" if rng.random() < 0.2 else rng.randbytes(rng.randint(1, 300))
+        writer.add_tile(*zxy, tiles[zxy])
+    writer.close({"name": "test"}, (-5.5, 41.25, 9.75, 51.5))
+
+    with TileArchiveReader(path) as reader:
+        assert reader.header["leaf_length"] > 0
+        assert reader.header["addressed_tiles"] == len(tiles)
+        assert reader.header["tile_contents"] == len(set(tiles.values()))
+        assert reader.metadata() == {"name": "test"}
+        # chaque lecture décompresse racine et feuille: un échantillon suffit
+        for zxy in rng.sample(sorted(tiles), 500):
+            assert reader.get_tile(*zxy) == tiles[zxy]
+        assert reader.get_tile(9, 0, 0) is None
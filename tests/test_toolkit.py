@@ -0,0 +1,40 @@
+import pytest
+
+import generate_kml_from_json as kmlgen
+from eaip_airspaces import Toolkit
+
+
+def clear_memos():
+    for fn in (kmlgen.cached_dms_to_decimal, kmlgen.cached_parse_coord_pair, kmlgen.cached_arc_points,
+               kmlgen.cached_circle, kmlgen.cached_border_span):
+        fn.cache_clear()
+
+
+def resolve_all(toolkit, layers):
+    result = []
+    for layer in layers:
+        try:
+            result.append(toolkit.resolve_layer(layer))
+        except ValueError:
+            result.append(None)
+    return result
+
+
+def test_toolkits_with_different_options_coexist(airspaces):
+    layers = [layer for pages in airspaces.values() for page in pages.values()
+              for airspace in page for layer in airspace["layers"]]
+    default = Toolkit()
+    tolerant = Toolkit(chord_tolerance=100, simplify=200)
+
+    # chacun après l'autre, les arcs et frontières mémorisés par le premier étant encore en cache
+    after_other = (resolve_all(tolerant, layers), resolve_all(default, layers))
+
+    clear_memos()
+    alone_default = resolve_all(default, layers)
+    clear_memos()
+    alone_tolerant = resolve_all(tolerant, layers)
+
+    assert alone_default != alone_tolerant
+    assert after_other == (alone_tolerant, alone_default)
+    # les options du module sont restaurées après chaque appel
+    assert kmlgen.chord_tolerance_m is None and kmlgen.simplify_tolerance_m is None